@@ -1,5 +1,96 @@
+import os
+import sys
 import argparse
-from .pipeline import run_processing_pipeline, run_upload_pipeline # Updated import
+# Los pipelines se importan dentro de cada comando: `upload` no carga OpenCV
+# ni torch, y `--help` responde al instante
+from .config import (YOLO_BATCH_SIZE, UPLOAD_WORKERS, UPLOAD_RATE, JPEG_QUALITY, JPEG_SUBSAMPLING,
+                     JPEG_PROGRESSIVE, JPEG_OPTIMIZE, JPEG_KEEP_METADATA, JPEG_CODEC, JPEG_CODECS,
+                     JPEG_SUBSAMPLINGS, RENDER_PROFILES, JOBQUEUE_LEASE, BURST_THRESHOLD, DETECTOR_BACKEND,
+                     DETECTOR_BACKENDS, DETECTION_IMGSZ, DETECTION_CONF, DETECTION_CLASS_FILTER, DETECTION_INT8,
+                     CACHE_GRADED)
+
+def add_encoding_arguments(parser):
+    parser.add_argument("--quality", type=int, default=JPEG_QUALITY, help="Calidad JPEG de salida (1-100).")
+    parser.add_argument("--subsampling", choices=JPEG_SUBSAMPLINGS, default=JPEG_SUBSAMPLING, help="Submuestreo de croma del JPEG.")
+    parser.add_argument("--progressive", action="store_true", default=JPEG_PROGRESSIVE, help="Guardar JPEG progresivo.")
+    parser.add_argument("--optimize", action="store_true", default=JPEG_OPTIMIZE, help="Optimizar las tablas Huffman (archivo algo menor).")
+    parser.add_argument("--keep-metadata", action="store_true", default=JPEG_KEEP_METADATA, help="Copiar EXIF e ICC de la foto original.")
+    parser.add_argument("--codec", choices=["auto", *JPEG_CODECS], default=JPEG_CODEC, help="Códec JPEG; auto elige el más rápido instalado.")
+
+def add_cache_arguments(parser):
+    parser.add_argument("--no-cache", action="store_true", help="Reprocesar todo sin usar la caché de resultados.")
+    parser.add_argument("--cache-graded", action="store_true", default=CACHE_GRADED, help="Guardar también los intermedios graduados (~72 MB por foto de 24 MP, hasta CACHE_MAX_MB) para repetir marca de agua o codificación sin re-graduar.")
+
+def add_scan_arguments(parser):
+    parser.add_argument("--recursive", action="store_true", help="Recorrer también las subcarpetas (la salida replica la estructura).")
+    parser.add_argument("--include", action="append", default=[], help="Glob de archivos a incluir (repetible), p. ej. '2024-*/*.jpg'.")
+    parser.add_argument("--exclude", action="append", default=[], help="Glob de archivos o carpetas a excluir (repetible).")
+
+def add_profile_argument(parser):
+    parser.add_argument("--profile", action="store_true", help="Medir cada etapa: tabla p50/p95/total y reporte JSON/CSV.")
+
+def add_render_argument(parser):
+    parser.add_argument("--render", action="append", default=[], choices=list(RENDER_PROFILES),
+                        help="Perfil de salida de config.RENDER_PROFILES (repetible). Varios = una decodificación, una detección y un grading para todos.")
+
+def add_deskew_argument(parser):
+    parser.add_argument("--deskew", action="store_true", help="Enderezar fotos levemente inclinadas (hasta DESKEW_MAX_ANGLE grados) antes de recortar.")
+
+def add_burst_argument(parser):
+    parser.add_argument("--burst", nargs="?", type=float, const=BURST_THRESHOLD, default=None, metavar="UMBRAL",
+                        help=f"Ráfagas: YOLO solo en el primer cuadro y el resto reutiliza su centro si la miniatura difiere menos que UMBRAL (0-255, por defecto {BURST_THRESHOLD}).")
+
+def add_watch_argument(parser):
+    parser.add_argument("--watch", action="store_true", help="Vigilar la carpeta de entrada y procesar cada foto nueva al terminar de copiarse (Ctrl+C para salir).")
+
+def add_server_argument(parser):
+    parser.add_argument("--server", nargs="?", const="", default=None, metavar="SOCKET",
+                        help="Enviar el trabajo al daemon de 'autoedit serve' (modelo ya cargado). Sin daemon se corre aquí.")
+
+def add_detector_arguments(parser):
+    parser.add_argument("--detector", choices=DETECTOR_BACKENDS, default=DETECTOR_BACKEND, help="Backend de detección: ultralytics (PyTorch), onnx (ONNX Runtime) u openvino. El modelo se exporta la primera vez.")
+    parser.add_argument("--imgsz", type=int, default=DETECTION_IMGSZ, help="Lado de entrada del modelo de detección.")
+    parser.add_argument("--conf", type=float, default=DETECTION_CONF, help="Confianza mínima de las detecciones.")
+    parser.add_argument("--class-filter", action="store_true", default=DETECTION_CLASS_FILTER, help="Solo las clases de CLASS_WEIGHTS entran al NMS (el resto deja de competir por el ROI).")
+    parser.add_argument("--int8", action="store_true", default=DETECTION_INT8, help="Pesos cuantizados a int8 (con --detector onnx u openvino).")
+
+def add_destination_arguments(parser):
+    parser.add_argument("--dest", "--drive-folder", dest="dest", required=True,
+                        help="Destino: ID de una carpeta de Google Drive (o drive://ID), o s3://bucket/prefijo para S3 y compatibles.")
+    parser.add_argument("--endpoint", "--drive-endpoint", dest="endpoint", default=None,
+                        help="Endpoint alternativo: el Drive falso de autoEdit.fakedrive (sin OAuth) o un S3 compatible (MinIO, moto).")
+
+def add_distributed_arguments(parser):
+    role = parser.add_mutually_exclusive_group()
+    role.add_argument("--coordinator", action="store_true", help="Encolar las fotos en la cola compartida y mostrar el avance; las procesan los workers.")
+    role.add_argument("--worker", action="store_true", help="Tomar trabajos de la cola compartida hasta vaciarla (solo necesita --jobs o --output).")
+    parser.add_argument("--jobs", default=None, help="Cola de trabajos SQLite (por defecto <output>/.autoedit_jobs.sqlite).")
+    parser.add_argument("--lease", type=float, default=JOBQUEUE_LEASE, help="Segundos sin señales de un worker antes de repartir sus trabajos.")
+
+def encoding_from_args(args):
+    from .codec import EncodeOptions
+    return EncodeOptions(args.quality, args.subsampling, args.progressive, args.optimize, args.keep_metadata)
+
+def detector_from_args(args):
+    from .detector import DetectorSettings
+    return DetectorSettings(args.detector, imgsz=args.imgsz, conf=args.conf, class_filter=args.class_filter,
+                            int8=args.int8)
+
+def submit_to_server(args, command, kwargs):
+    """
+    Delega en el daemon si se pidió --server. Devuelve True si el trabajo se hizo allí.
+    """
+    if args.server is None:
+        return False
+    from .serve import submit
+    try:
+        status = submit(command, kwargs, args.server or None)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        print(f"⚠️ No se pudo contactar al daemon ({e}); se procesa en este proceso.")
+        return False
+    if status != 0:
+        sys.exit(status)
+    return True
 
 def main():
     parser = argparse.ArgumentParser(description="AutoEdit Drive: Procesamiento y carga de imágenes.")
@@ -7,33 +98,215 @@ def main():
 
     # --- Comando 'process' ---
     parser_process = subparsers.add_parser("process", help="Procesa las imágenes localmente.")
-    parser_process.add_argument("--input", required=True, help="Carpeta de entrada.")
-    parser_process.add_argument("--output", required=True, help="Carpeta de salida.")
-    parser_process.add_argument("--water-mark", required=True, help="Ruta a la marca de agua.")
-    parser_process.add_argument("--preview", action="store_true", help="Procesar solo la primera imagen y mostrarla.")
+    # --input/--output/--water-mark se validan a mano: un --worker los lee de la cola
+    parser_process.add_argument("--input", help="Carpeta de entrada.")
+    parser_process.add_argument("--output", help="Carpeta de salida.")
+    parser_process.add_argument("--water-mark", help="Ruta a la marca de agua.")
+    parser_process.add_argument("--preview", action="store_true", help="Vista previa rápida: hojas de contacto antes/después de todas las fotos en <salida>/preview (sin escribir la salida).")
     parser_process.add_argument("--log", action="store_true", help="Guardar log de procesamiento.")
+    parser_process.add_argument("--workers", type=int, default=1, help="Workers por etapa (decode, presets, escritura). 1 = secuencial.")
+    parser_process.add_argument("--batch-size", type=int, default=YOLO_BATCH_SIZE, help="Imágenes por lote de inferencia YOLO.")
+    add_cache_arguments(parser_process)
+    add_encoding_arguments(parser_process)
+    add_scan_arguments(parser_process)
+    add_profile_argument(parser_process)
+    add_render_argument(parser_process)
+    add_deskew_argument(parser_process)
+    add_burst_argument(parser_process)
+    add_watch_argument(parser_process)
+    add_server_argument(parser_process)
+    add_detector_arguments(parser_process)
+    add_distributed_arguments(parser_process)
+
+    # --- Comando 'detect' ---
+    parser_detect = subparsers.add_parser("detect", help="Solo llena el índice de detecciones YOLO de la carpeta.")
+    parser_detect.add_argument("--input", required=True, help="Carpeta de entrada.")
+    parser_detect.add_argument("--workers", type=int, default=1, help="Procesos para decodificar los proxies.")
+    parser_detect.add_argument("--batch-size", type=int, default=YOLO_BATCH_SIZE, help="Imágenes por lote de inferencia YOLO.")
+    add_scan_arguments(parser_detect)
+    add_server_argument(parser_detect)
+    add_detector_arguments(parser_detect)
 
     # --- Comando 'upload' ---
-    parser_upload = subparsers.add_parser("upload", help="Sube las imágenes procesadas a Google Drive.")
+    parser_upload = subparsers.add_parser("upload", help="Sube las imágenes procesadas a Google Drive o S3.")
     parser_upload.add_argument("--source", required=True, help="Carpeta local con archivos a subir.")
-    parser_upload.add_argument("--drive-folder", required=True, help="ID de la carpeta de destino en Google Drive.")
+    add_destination_arguments(parser_upload)
     parser_upload.add_argument("--log", action="store_true", help="Guardar log de subida.")
+    parser_upload.add_argument("--workers", type=int, default=UPLOAD_WORKERS, help="Subidas concurrentes.")
+    parser_upload.add_argument("--rate", type=float, default=UPLOAD_RATE, help="Máximo de peticiones por segundo a la API.")
+    parser_upload.add_argument("--reconcile", action="store_true", help="Listar la carpeta de destino y conciliar todo el manifiesto local.")
+    add_scan_arguments(parser_upload)
+    add_profile_argument(parser_upload)
+
+    # --- Comando 'publish' ---
+    parser_publish = subparsers.add_parser("publish", help="Procesa y sube a Drive o S3 en streaming (process + upload a la vez).")
+    parser_publish.add_argument("--input", required=True, help="Carpeta de entrada.")
+    parser_publish.add_argument("--output", required=True, help="Carpeta de salida.")
+    parser_publish.add_argument("--water-mark", required=True, help="Ruta a la marca de agua.")
+    add_destination_arguments(parser_publish)
+    parser_publish.add_argument("--log", action="store_true", help="Guardar logs de procesamiento y subida.")
+    parser_publish.add_argument("--workers", type=int, default=1, help="Workers por etapa de procesamiento. 1 = secuencial.")
+    parser_publish.add_argument("--batch-size", type=int, default=YOLO_BATCH_SIZE, help="Imágenes por lote de inferencia YOLO.")
+    add_cache_arguments(parser_publish)
+    parser_publish.add_argument("--upload-workers", type=int, default=UPLOAD_WORKERS, help="Subidas concurrentes.")
+    parser_publish.add_argument("--rate", type=float, default=UPLOAD_RATE, help="Máximo de peticiones por segundo a la API.")
+    add_encoding_arguments(parser_publish)
+    add_scan_arguments(parser_publish)
+    add_profile_argument(parser_publish)
+    add_render_argument(parser_publish)
+    add_deskew_argument(parser_publish)
+    add_burst_argument(parser_publish)
+    add_detector_arguments(parser_publish)
+    add_watch_argument(parser_publish)
+
+    # --- Comando 'serve' ---
+    parser_serve = subparsers.add_parser("serve", help="Daemon con el modelo cargado para 'process'/'detect' con --server.")
+    parser_serve.add_argument("--socket", default=None, help="Ruta del socket Unix (por defecto en el directorio temporal).")
+    add_detector_arguments(parser_serve)
 
     args = parser.parse_args()
 
     if args.command == "process":
-        run_processing_pipeline(
-            input_folder = args.input,
-            output_folder = args.output,
-            watermark_path = args.water_mark,
-            preview = args.preview,
-            log = args.log
+        if args.worker:
+            if not (args.jobs or args.output):
+                parser_process.error("--worker necesita --jobs o --output")
+            from .distributed import run_worker, default_store
+            run_worker(
+                store_path = args.jobs or default_store(os.path.abspath(args.output)),
+                workers = args.workers,
+                batch_size = args.batch_size,
+                codec = args.codec,
+                lease = args.lease,
+                log = args.log,
+                profile = args.profile
+            )
+            return
+        missing = [flag for flag, value in (("--input", args.input), ("--output", args.output),
+                                            ("--water-mark", args.water_mark)) if not value]
+        if missing:
+            parser_process.error(f"faltan los argumentos: {', '.join(missing)}")
+        if args.watch and args.server is not None:
+            parser_process.error("--watch no se puede enviar al daemon con --server (lo ocuparía hasta Ctrl+C)")
+        if args.preview:
+            kwargs = dict(
+                input_folder = os.path.abspath(args.input),
+                output_folder = os.path.abspath(args.output),
+                watermark_path = os.path.abspath(args.water_mark),
+                workers = args.workers if args.workers > 1 else None,  # por defecto, todos los núcleos
+                batch_size = args.batch_size,
+                recursive = args.recursive,
+                include = args.include,
+                exclude = args.exclude,
+                renders = args.render,
+                deskew = args.deskew,
+                detector = detector_from_args(args)
+            )
+            if submit_to_server(args, "preview", kwargs):
+                return
+            from .pipeline import run_preview_pipeline
+            run_preview_pipeline(**kwargs)
+            return
+        if args.coordinator:
+            from .distributed import run_coordinator
+            run_coordinator(
+                input_folder = args.input,
+                output_folder = args.output,
+                watermark_path = args.water_mark,
+                store_path = args.jobs,
+                use_cache = not args.no_cache,
+                cache_graded = args.cache_graded,
+                encoding = encoding_from_args(args),
+                recursive = args.recursive,
+                include = args.include,
+                exclude = args.exclude,
+                renders = args.render,
+                deskew = args.deskew,
+                burst = args.burst,
+                detector = detector_from_args(args)
+            )
+            return
+        kwargs = dict(
+            input_folder = os.path.abspath(args.input),
+            output_folder = os.path.abspath(args.output),
+            watermark_path = os.path.abspath(args.water_mark),
+            log = args.log,
+            workers = args.workers,
+            batch_size = args.batch_size,
+            use_cache = not args.no_cache,
+            cache_graded = args.cache_graded,
+            codec = args.codec,
+            recursive = args.recursive,
+            include = args.include,
+            exclude = args.exclude,
+            profile = args.profile,
+            watch = args.watch,
+            renders = args.render,
+            deskew = args.deskew,
+            burst = args.burst,
+            detector = detector_from_args(args)
+        )
+        if submit_to_server(args, "process", dict(kwargs, encoding=list(encoding_from_args(args)))):
+            return
+        from .pipeline import run_processing_pipeline
+        run_processing_pipeline(encoding = encoding_from_args(args), **kwargs)
+    elif args.command == "detect":
+        kwargs = dict(
+            input_folder = os.path.abspath(args.input),
+            workers = args.workers,
+            batch_size = args.batch_size,
+            recursive = args.recursive,
+            include = args.include,
+            exclude = args.exclude,
+            detector = detector_from_args(args)
         )
+        if submit_to_server(args, "detect", kwargs):
+            return
+        from .pipeline import run_detection_pipeline
+        run_detection_pipeline(**kwargs)
+    elif args.command == "serve":
+        from .serve import serve
+        serve(args.socket, detector_from_args(args))
     elif args.command == "upload":
+        from .upload import run_upload_pipeline
         run_upload_pipeline(
             source_folder = args.source,
-            drive_folder_id = args.drive_folder,
-            log = args.log
+            destination = args.dest,
+            log = args.log,
+            workers = args.workers,
+            rate = args.rate,
+            endpoint = args.endpoint,
+            reconcile = args.reconcile,
+            recursive = args.recursive,
+            include = args.include,
+            exclude = args.exclude,
+            profile = args.profile
+        )
+    elif args.command == "publish":
+        from .pipeline import run_publish_pipeline
+        run_publish_pipeline(
+            input_folder = args.input,
+            output_folder = args.output,
+            watermark_path = args.water_mark,
+            destination = args.dest,
+            log = args.log,
+            workers = args.workers,
+            batch_size = args.batch_size,
+            use_cache = not args.no_cache,
+            cache_graded = args.cache_graded,
+            upload_workers = args.upload_workers,
+            rate = args.rate,
+            endpoint = args.endpoint,
+            encoding = encoding_from_args(args),
+            codec = args.codec,
+            recursive = args.recursive,
+            include = args.include,
+            exclude = args.exclude,
+            profile = args.profile,
+            watch = args.watch,
+            renders = args.render,
+            deskew = args.deskew,
+            burst = args.burst,
+            detector = detector_from_args(args)
         )
 
 if __name__ == "__main__":
@@ -42,4 +42,41 @@ def find_related_objects(main_box, other_boxes, img_size, max_dist_ratio=0.25):
     for box in other_boxes:
         if np.linalg.norm(box_center(box)-main_center) < max_dist_ratio*max(W,H):
             related.append(box)
-    return related
\ No newline at end of file
+    return related
+
+#  --- Versiones vectorizadas: boxes (N,4) y classes (N,) ---
+def box_areas(boxes):
+    return (boxes[:, 2] - boxes[:, 0])*(boxes[:, 3] - boxes[:, 1])
+
+def box_centers(boxes):
+    return np.stack([(boxes[:, 0]+boxes[:, 2])/2, (boxes[:, 1]+boxes[:, 3])/2], axis=1)
+
+def union_box_array(boxes):
+    return np.concatenate([boxes[:, :2].min(axis=0), boxes[:, 2:].max(axis=0)])
+
+def class_weights(classes, default=0.2):
+    table = np.full(max(int(classes.max(initial=0)), max(CLASS_WEIGHTS)) + 1, default)
+    table[list(CLASS_WEIGHTS)] = list(CLASS_WEIGHTS.values())
+    return table[classes]
+
+def candidate_mask(boxes, classes, img_area, min_ratio=0.02):
+    """
+    Filtro de tamaño y clase (is_big_enough + c in CLASS_WEIGHTS) en una operación.
+    """
+    return np.isin(classes, list(CLASS_WEIGHTS)) & (box_areas(boxes)/img_area >= min_ratio)
+
+def score_boxes(boxes, classes, img_center, alpha=0.6):
+    dist = np.linalg.norm(box_centers(boxes)-img_center, axis=1)
+    return class_weights(classes) * (alpha*box_areas(boxes) - (1-alpha)*dist)
+
+def is_group_array(person_boxes, img_size, max_dist_ratio=0.35):
+    if len(person_boxes)<2: return False
+    W,H = img_size
+    centers = box_centers(person_boxes)
+    max_dist = np.linalg.norm(centers-centers.mean(axis=0), axis=1).max()
+    return max_dist < max_dist_ratio*max(W,H)
+
+def related_mask(main_box, other_boxes, img_size, max_dist_ratio=0.25):
+    W,H = img_size
+    dist = np.linalg.norm(box_centers(other_boxes)-box_center(main_box), axis=1)
+    return dist < max_dist_ratio*max(W,H)
@@ -0,0 +1,80 @@
+from datetime import datetime
+import numpy as np
+import cv2
+from PIL import Image
+from .profiling import stage
+from .config import BURST_MAX_GAP, BURST_MAX_FRAMES, BURST_THUMB_SIZE
+
+# ================= RÁFAGAS =================
+# En deportes y eventos se disparan ráfagas de 5-15 cuadros casi idénticos.
+# Con --burst solo el primer cuadro de cada ráfaga (el cuadro clave) pasa por
+# YOLO; los siguientes reutilizan su centro ROI mientras:
+#   - la hora EXIF (con subsegundos) esté a menos de BURST_MAX_GAP s del cuadro anterior,
+#   - tengan el mismo tamaño y
+#   - la diferencia media de una miniatura en grises contra la del cuadro
+#     clave no pase el umbral (0-255), lo que re-verifica cada cuadro.
+# La comparación es siempre contra el cuadro clave, así un paneo lento
+# termina abriendo una ráfaga nueva; cada BURST_MAX_FRAMES cuadros se vuelve
+# a detectar igual. La miniatura sale del proxy de detección ya decodificado.
+
+_EXIF_IFD = 0x8769
+_DATETIME, _DATETIME_ORIGINAL, _SUBSEC_ORIGINAL = 306, 36867, 37521
+
+
+def exif_timestamp(input_path):
+    """
+    Hora de captura en segundos (DateTimeOriginal + SubSecTimeOriginal), o None.
+    """
+    try:
+        with Image.open(input_path) as image:
+            exif = image.getexif()
+        ifd = exif.get_ifd(_EXIF_IFD)
+        value = ifd.get(_DATETIME_ORIGINAL) or exif.get(_DATETIME)
+        if not value:
+            return None
+        seconds = datetime.strptime(str(value).strip("\x00 "), "%Y:%m:%d %H:%M:%S").timestamp()
+        subsec = str(ifd.get(_SUBSEC_ORIGINAL) or "").strip("\x00 ")
+        return seconds + (float("0." + subsec) if subsec.isdigit() else 0.0)
+    except (OSError, ValueError):
+        return None
+
+
+def frame_thumb(proxy, size=BURST_THUMB_SIZE):
+    gray = np.asarray(proxy.convert("L"))
+    return cv2.resize(gray, (size, size), interpolation=cv2.INTER_AREA).astype(np.float32)
+
+
+class BurstTracker:
+    """
+    Decide, cuadro a cuadro y en orden de entrada, qué cuadros necesitan
+    detección. Vive en el proceso dueño del modelo y cruza los lotes.
+    """
+    def __init__(self, threshold, max_gap=BURST_MAX_GAP, max_frames=BURST_MAX_FRAMES):
+        self.threshold = threshold
+        self.max_gap = max_gap
+        self.max_frames = max_frames
+        self.key = None        # (tamaño, miniatura, lugar del centro) del cuadro clave
+        self.last_time = None
+        self.frames = 0
+        self.reused = 0
+
+    def assign(self, input_path, proxy, size):
+        """
+        Devuelve (lugar, es_clave). `lugar` es una lista de un elemento que
+        recibe (centro, detecciones) cuando el cuadro clave se detecta.
+        """
+        with stage("burst"):
+            timestamp = exif_timestamp(input_path)
+            thumb = frame_thumb(proxy)
+            follows = (self.key is not None and self.frames < self.max_frames and self.key[0] == size
+                       and (timestamp is None or self.last_time is None
+                            or abs(timestamp - self.last_time) <= self.max_gap)
+                       and float(np.mean(np.abs(thumb - self.key[1]))) <= self.threshold)
+        self.last_time = timestamp
+        if follows:
+            self.frames += 1
+            self.reused += 1
+            return self.key[2], False
+        self.key = (size, thumb, [None])
+        self.frames = 1
+        return self.key[2], True
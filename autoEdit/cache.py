@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import inspect
+from collections import namedtuple
+import numpy as np
+from . import config
+from .config import CACHE_DIR, CACHE_MAX_MB, CACHE_GRADED
+from .presets import grade_image
+from .boxes import candidate_mask, score_boxes, class_weights, is_group_array, related_mask
+from .crop import choose_target_ratio
+from .hashing import file_hash
+
+
+# ================= CACHÉ DE RESULTADOS =================
+# Manifiesto SQLite en <output>/.autoedit_cache, indexado por el hash del
+# contenido de cada entrada (con atajo tamaño+mtime). Guarda tres niveles:
+#   detect -> centro ROI, grade -> intermedio graduado (.npy), output -> JPEG final
+# Centro e intermedio son del contenido; las salidas, de cada ruta (dos
+# copias idénticas en carpetas distintas tienen cada una la suya).
+# Cada nivel tiene su huella de configuración, así un cambio de watermark
+# reutiliza los centros (y, con `graded`, los intermedios) sin volver a
+# correr YOLO. Los intermedios se expulsan (LRU) a medida que se guardan,
+# así el disco nunca pasa de CACHE_MAX_MB más lo que está en vuelo.
+
+# Constantes de config.py que cambian el JPEG final (marca de agua, perfiles y
+# codificación por defecto); las de subida, cola, watch, etc. no invalidan nada
+OUTPUT_CONSTANTS = ("LOGO_SCALE", "LOGO_OPACITY", "LOGO_MARGIN", "RENDER_PROFILES", "JPEG_QUALITY",
+                    "JPEG_SUBSAMPLING", "JPEG_PROGRESSIVE", "JPEG_OPTIMIZE", "JPEG_KEEP_METADATA")
+
+CacheEntry = namedtuple("CacheEntry", ["key", "center", "graded_path", "graded_cached", "done"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    detect_fp TEXT, cx REAL, cy REAL,
+    grade_fp TEXT, graded_bytes INTEGER,
+    last_used REAL
+);
+CREATE TABLE IF NOT EXISTS outputs (
+    key TEXT, output_path TEXT, output_fp TEXT,
+    PRIMARY KEY (key, output_path)
+);
+"""
+
+
+def _digest(obj):
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _defaults(*funcs):
+    return {f.__name__: {k: p.default for k, p in inspect.signature(f).parameters.items()
+                         if p.default is not p.empty}
+            for f in funcs}
+
+
+def settings_fingerprints(watermark_path, model_name, encoding=None, renders=None, deskew=False, burst=None):
+    """
+    Huellas de configuración por nivel; cada una incluye a la anterior.
+    `encoding` (codec.EncodeOptions) entra en la huella de salida; de los
+    perfiles (`renders`), las proporciones definen la región graduada y el
+    resto, la salida. El enderezado (`deskew`) cambia la región graduada y
+    el umbral de ráfagas (`burst`), los centros.
+    """
+    detect = {"model": model_name, "size": config.DETECTION_SIZE, "weights": config.CLASS_WEIGHTS,
+              "roi": _defaults(candidate_mask, score_boxes, class_weights, is_group_array, related_mask)}
+    if burst is not None:
+        # Sin --burst la huella no cambia: los centros ya guardados siguen valiendo
+        detect["burst"] = {"threshold": burst, **{k: v for k, v in vars(config).items() if k.startswith("BURST_")}}
+    detect = _digest(detect)
+    grade = _digest({"detect": detect, "grade": _defaults(grade_image), "crop": _defaults(choose_target_ratio),
+                     "ratios": [render.ratio for render in renders] if renders else None,
+                     "deskew": {k: v for k, v in vars(config).items() if k.startswith("DESKEW_")} if deskew else None})
+    constants = {k: getattr(config, k) for k in OUTPUT_CONSTANTS}
+    output = _digest({"grade": grade, "config": constants, "watermark": file_hash(watermark_path),
+                      "encoding": encoding._asdict() if encoding is not None else None,
+                      "renders": [render._asdict() for render in renders] if renders else None})
+    return {"detect": detect, "grade": grade, "output": output}
+
+
+def store_graded(image, path):
+    tmp_path = path[:-len(".npy")] + ".tmp.npy"
+    np.save(tmp_path, np.asarray(image))
+    os.replace(tmp_path, path)
+
+
+def load_graded(path):
+    # Array RGB escribible (se le compone la marca de agua en el lugar)
+    return np.load(path)
+
+
+class ResultCache:
+    def __init__(self, output_folder, fingerprints, max_mb=CACHE_MAX_MB, graded=CACHE_GRADED):
+        self.root = os.path.join(output_folder, CACHE_DIR)
+        self.graded_dir = os.path.join(self.root, "graded")
+        os.makedirs(self.graded_dir, exist_ok=True)
+        self.fingerprints = fingerprints
+        self.graded = graded
+        self.max_bytes = max_mb * 1024 * 1024
+        # Varios workers (process --worker) pueden compartir la caché: esperan el lock en vez de fallar
+        self.db = sqlite3.connect(os.path.join(self.root, "cache.sqlite"), timeout=60)
+        self.db.executescript(SCHEMA)
+
+    def _content_key(self, input_path):
+        path = os.path.abspath(input_path)
+        st = os.stat(path)
+        row = self.db.execute("SELECT hash FROM files WHERE path=? AND size=? AND mtime_ns=?",
+                              (path, st.st_size, st.st_mtime_ns)).fetchone()
+        if row:
+            return row[0]
+        key = file_hash(path)
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO files VALUES (?,?,?,?)", (path, st.st_size, st.st_mtime_ns, key))
+        return key
+
+    def lookup(self, input_path, output_paths):
+        key = self._content_key(input_path)
+        graded_path = os.path.join(self.graded_dir, key + ".npy") if self.graded else None
+        row = self.db.execute("SELECT detect_fp, cx, cy, grade_fp, graded_bytes FROM entries WHERE key=?",
+                              (key,)).fetchone()
+        if row is None:
+            return CacheEntry(key, None, graded_path, False, False)
+
+        detect_fp, cx, cy, grade_fp, graded_bytes = row
+        output_fp = self.db.execute("SELECT output_fp FROM outputs WHERE key=? AND output_path=?",
+                                    (key, "\n".join(output_paths))).fetchone()
+        with self.db:  # sin transacciones abiertas entre lookup y store: no retiene el lock de escritura
+            self.db.execute("UPDATE entries SET last_used=? WHERE key=?", (time.time(), key))
+        center = (cx, cy) if detect_fp == self.fingerprints["detect"] else None
+        graded_cached = (graded_path is not None and center is not None and grade_fp == self.fingerprints["grade"]
+                         and graded_bytes is not None and os.path.exists(graded_path))
+        done = (output_fp == (self.fingerprints["output"],)
+                and all(os.path.exists(path) for path in output_paths))
+        return CacheEntry(key, center, graded_path, graded_cached, done)
+
+    def store(self, key, center, graded_path, output_paths):
+        graded_bytes = os.path.getsize(graded_path) if graded_path and os.path.exists(graded_path) else None
+        grade_fp = self.fingerprints["grade"] if graded_bytes is not None else None
+        with self.db:
+            # Sin intermedio nuevo se conserva el que hubiera (sigue contando para la expulsión)
+            self.db.execute("INSERT INTO entries VALUES (?,?,?,?,?,?,?) "
+                            "ON CONFLICT (key) DO UPDATE SET detect_fp=excluded.detect_fp, "
+                            "cx=excluded.cx, cy=excluded.cy, last_used=excluded.last_used, "
+                            "grade_fp=COALESCE(excluded.grade_fp, grade_fp), "
+                            "graded_bytes=COALESCE(excluded.graded_bytes, graded_bytes)",
+                            (key, self.fingerprints["detect"], float(center[0]), float(center[1]),
+                             grade_fp, graded_bytes, time.time()))
+            self.db.execute("INSERT OR REPLACE INTO outputs VALUES (?,?,?)",
+                            (key, "\n".join(output_paths), self.fingerprints["output"]))
+        if graded_bytes is not None:
+            self.evict()
+
+    def evict(self):
+        """
+        Expulsa intermedios graduados (LRU) hasta quedar bajo el tope.
+        Los centros ROI y las huellas de salida se conservan.
+        """
+        total = self.db.execute("SELECT COALESCE(SUM(graded_bytes), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.db.execute("SELECT key, graded_bytes FROM entries "
+                               "WHERE graded_bytes IS NOT NULL ORDER BY last_used").fetchall()
+        with self.db:
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.graded_dir, key + ".npy"))
+                except FileNotFoundError:
+                    pass
+                self.db.execute("UPDATE entries SET graded_bytes=NULL, grade_fp=NULL WHERE key=?", (key,))
+                total -= size
+
+    def close(self):
+        self.evict()
+        self.db.commit()
+        self.db.close()
@@ -0,0 +1,284 @@
+import io
+import time
+from collections import namedtuple
+import numpy as np
+import cv2
+from PIL import Image, ImageOps
+from .profiling import stage
+from .config import (JPEG_QUALITY, JPEG_SUBSAMPLING, JPEG_PROGRESSIVE, JPEG_OPTIMIZE,
+                     JPEG_KEEP_METADATA, JPEG_SUBSAMPLINGS)
+
+try:
+    import simplejpeg
+except ImportError:  # opcional
+    simplejpeg = None
+
+
+# ================= CÓDECS JPEG =================
+# Decodificación y codificación intercambiables (Pillow, OpenCV/libjpeg-turbo,
+# simplejpeg). Todos trabajan con arrays RGB uint8; la orientación EXIF y los
+# metadatos (EXIF/ICC) se resuelven aquí, igual para cualquier códec.
+# Con "auto" se elige el más rápido de los instalados con un micro-benchmark.
+
+EXIF_ORIENTATION = 0x0112
+SUBSAMPLINGS = JPEG_SUBSAMPLINGS
+JPEG_EXTENSIONS = (".jpg", ".jpeg")
+
+# decode(bytes) -> RGB sin orientar ; encode(rgb, options) -> bytes JPEG
+# `features`: opciones de salida que el códec soporta además de calidad y submuestreo
+Codec = namedtuple("Codec", ["name", "decode", "encode", "features"])
+
+EncodeOptions = namedtuple("EncodeOptions", ["quality", "subsampling", "progressive", "optimize", "keep_metadata"],
+                           defaults=(JPEG_QUALITY, JPEG_SUBSAMPLING, JPEG_PROGRESSIVE, JPEG_OPTIMIZE,
+                                     JPEG_KEEP_METADATA))
+
+
+# --- Pillow (siempre disponible) ---
+def _pillow_decode(data):
+    return np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
+
+
+def _pillow_encode(img, options):
+    buffer = io.BytesIO()
+    Image.fromarray(img).save(buffer, "JPEG", quality=options.quality, subsampling=options.subsampling,
+                              progressive=options.progressive, optimize=options.optimize)
+    return buffer.getvalue()
+
+
+# --- OpenCV (libjpeg-turbo) ---
+_CV_SAMPLING = {"4:4:4": "IMWRITE_JPEG_SAMPLING_FACTOR_444", "4:2:2": "IMWRITE_JPEG_SAMPLING_FACTOR_422",
+                "4:2:0": "IMWRITE_JPEG_SAMPLING_FACTOR_420"}
+
+
+def _cv2_decode(data):
+    buffer = np.frombuffer(data, np.uint8)
+    if hasattr(cv2, "IMREAD_COLOR_RGB"):
+        return cv2.imdecode(buffer, cv2.IMREAD_COLOR_RGB | cv2.IMREAD_IGNORE_ORIENTATION)
+    return cv2.cvtColor(cv2.imdecode(buffer, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION), cv2.COLOR_BGR2RGB)
+
+
+def _cv2_encode(img, options):
+    params = [cv2.IMWRITE_JPEG_QUALITY, options.quality,
+              cv2.IMWRITE_JPEG_PROGRESSIVE, int(options.progressive),
+              cv2.IMWRITE_JPEG_OPTIMIZE, int(options.optimize),
+              cv2.IMWRITE_JPEG_SAMPLING_FACTOR, getattr(cv2, _CV_SAMPLING[options.subsampling])]
+    ok, encoded = cv2.imencode(".jpg", cv2.cvtColor(img, cv2.COLOR_RGB2BGR), params)
+    if not ok:
+        raise ValueError("cv2.imencode no pudo codificar la imagen")
+    return encoded.tobytes()
+
+
+# --- simplejpeg ---
+def _simplejpeg_decode(data):
+    return simplejpeg.decode_jpeg(data, colorspace="RGB", fastdct=False, fastupsample=False)
+
+
+def _simplejpeg_encode(img, options):
+    return simplejpeg.encode_jpeg(np.ascontiguousarray(img), quality=options.quality, colorspace="RGB",
+                                  colorsubsampling=options.subsampling.replace(":", ""), fastdct=False)
+
+
+CODECS = {"pillow": Codec("pillow", _pillow_decode, _pillow_encode, {"progressive", "optimize"})}
+if hasattr(cv2, "IMWRITE_JPEG_SAMPLING_FACTOR"):
+    CODECS["opencv"] = Codec("opencv", _cv2_decode, _cv2_encode, {"progressive", "optimize"})
+if simplejpeg is not None:
+    CODECS["simplejpeg"] = Codec("simplejpeg", _simplejpeg_decode, _simplejpeg_encode, set())
+
+_ACTIVE = {"decode": CODECS["pillow"], "encode": CODECS["pillow"]}
+_AUTO_CHOICE = {}  # elección de "auto" por opciones requeridas: se mide una vez por proceso
+
+
+def _required_features(options):
+    return {name for name in ("progressive", "optimize") if getattr(options, name)}
+
+
+def _sample_image(size=(1280, 853), seed=0):
+    """
+    Imagen sintética con gradientes y textura, parecida a una foto para el códec.
+    """
+    W, H = size
+    y, x = np.mgrid[0:H, 0:W].astype(np.float32)
+    base = np.stack([x / W * 255, y / H * 255, (np.sin(x / 37) * np.cos(y / 23) + 1) * 127], axis=-1)
+    noise = np.random.default_rng(seed).normal(0, 12, base.shape)
+    return np.clip(base + noise, 0, 255).astype(np.uint8)
+
+
+def benchmark_codecs(options=EncodeOptions(), rounds=3):
+    """
+    Mide cada códec instalado. Devuelve {nombre: (segundos decode, segundos encode o None)}.
+    """
+    sample = _sample_image()
+    encoded = _pillow_encode(sample, options)
+    timings = {}
+    for name, codec in CODECS.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            codec.decode(encoded)
+        decode_time = (time.perf_counter() - start) / rounds
+        encode_time = None
+        if _required_features(options) <= codec.features:
+            start = time.perf_counter()
+            for _ in range(rounds):
+                codec.encode(sample, options)
+            encode_time = (time.perf_counter() - start) / rounds
+        timings[name] = (decode_time, encode_time)
+    return timings
+
+
+def select_codecs(preference="auto", options=EncodeOptions()):
+    """
+    Activa los códecs de decodificación y codificación. Con "auto" elige el más
+    rápido de cada lado; un nombre fijo usa ese códec (si no soporta las
+    opciones de salida pedidas, la codificación vuelve a Pillow).
+    Devuelve (decoder, encoder) como nombres, para pasarlos a otros procesos.
+    """
+    if preference == "auto":
+        required = frozenset(_required_features(options))
+        if required not in _AUTO_CHOICE:
+            timings = benchmark_codecs(options)
+            _AUTO_CHOICE[required] = (min(timings, key=lambda name: timings[name][0]),
+                                      min((name for name in timings if timings[name][1] is not None),
+                                          key=lambda name: timings[name][1]))
+        decoder, encoder = _AUTO_CHOICE[required]
+    else:
+        if preference not in CODECS:
+            raise ValueError(f"Códec '{preference}' no disponible (instalados: {', '.join(CODECS)})")
+        decoder = encoder = preference
+        if not _required_features(options) <= CODECS[preference].features:
+            encoder = "pillow"
+    use_codecs(decoder, encoder)
+    return decoder, encoder
+
+
+def use_codecs(decoder, encoder):
+    _ACTIVE["decode"] = CODECS[decoder]
+    _ACTIVE["encode"] = CODECS[encoder]
+
+
+# ================= LECTURA =================
+def oriented_size(image):
+    """
+    (W, H) de una imagen PIL abierta con la orientación EXIF aplicada, sin decodificarla.
+    """
+    W, H = image.size
+    if image.getexif().get(EXIF_ORIENTATION) in (5, 6, 7, 8):
+        W, H = H, W
+    return W, H
+
+
+def orient_array(img, orientation):
+    """
+    Equivalente a ImageOps.exif_transpose sobre un array (vistas de NumPy + una copia contigua).
+    """
+    if orientation in (None, 1):
+        return img
+    if orientation == 2:
+        img = img[:, ::-1]
+    elif orientation == 3:
+        img = img[::-1, ::-1]
+    elif orientation == 4:
+        img = img[::-1]
+    elif orientation == 5:
+        img = img.transpose(1, 0, 2)
+    elif orientation == 6:
+        img = img.transpose(1, 0, 2)[:, ::-1]
+    elif orientation == 7:
+        img = img[::-1, ::-1].transpose(1, 0, 2)
+    elif orientation == 8:
+        img = img.transpose(1, 0, 2)[::-1]
+    return np.ascontiguousarray(img)
+
+
+def read_rgb(input_path):
+    """
+    Decodifica la imagen a un array RGB uint8 ya orientado. Los JPEG RGB van
+    por el códec activo; el resto (PNG, escala de grises, CMYK) por Pillow.
+    """
+    # Siempre con `with`: en --watch y serve el proceso vive horas y no debe acumular descriptores
+    with Image.open(input_path) as image:
+        orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+        if image.format == "JPEG" and image.mode == "RGB":
+            with stage("decode"):
+                with open(input_path, "rb") as f:
+                    img = _ACTIVE["decode"].decode(f.read())
+            with stage("exif_transpose"):
+                return orient_array(img, orientation)
+        with stage("decode"):
+            image.load()
+        with stage("exif_transpose"):
+            if orientation != 1:
+                image = ImageOps.exif_transpose(image)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            return np.asarray(image)
+
+
+# ================= ESCRITURA =================
+def read_metadata(source_path):
+    """
+    EXIF (con la orientación ya normalizada a 1) y perfil ICC de la imagen original.
+    Un EXIF que no entra en un segmento APP1 (maker notes o miniaturas grandes)
+    se descarta: partido en varios segmentos, los lectores no lo reconocen.
+    """
+    with Image.open(source_path) as image:
+        exif = image.getexif()
+        icc = image.info.get("icc_profile")
+    if EXIF_ORIENTATION in exif:
+        exif[EXIF_ORIENTATION] = 1
+    exif = exif.tobytes() if exif else None
+    if exif and len(_exif_payload(exif)) > _MAX_SEGMENT:
+        print(f"⚠️ EXIF de '{source_path}' demasiado grande ({len(exif)} bytes): la salida va sin EXIF.")
+        exif = None
+    return exif, icc
+
+
+_MAX_SEGMENT = 65533  # el largo del segmento (2 bytes) se cuenta a sí mismo
+
+
+def _exif_payload(exif):
+    return exif if exif.startswith(b"Exif\x00\x00") else b"Exif\x00\x00" + exif
+
+
+def _segment(marker, payload):
+    return bytes((0xFF, marker)) + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+def insert_metadata(jpeg, exif=None, icc=None):
+    """
+    Inserta los segmentos APP1 (EXIF) y APP2 (ICC, en trozos) tras SOI/APP0,
+    sin recodificar la imagen. Un EXIF de más de un segmento no se inserta.
+    """
+    segments = b""
+    if exif and len(_exif_payload(exif)) <= _MAX_SEGMENT:
+        segments += _segment(0xE1, _exif_payload(exif))
+    if icc:
+        chunk = 65519
+        parts = [icc[i:i + chunk] for i in range(0, len(icc), chunk)]
+        for i, part in enumerate(parts):
+            segments += _segment(0xE2, b"ICC_PROFILE\x00" + bytes((i + 1, len(parts))) + part)
+    if not segments:
+        return jpeg
+    pos = 2
+    if jpeg[2:4] == b"\xff\xe0":  # APP0 (JFIF) va primero
+        pos = 4 + int.from_bytes(jpeg[4:6], "big")
+    return jpeg[:pos] + segments + jpeg[pos:]
+
+
+def write_image(img, output_path, options=None, source_path=None):
+    """
+    Guarda un array RGB. Las salidas JPEG usan el códec activo; otros
+    formatos (p. ej. PNG) se guardan con Pillow.
+    """
+    options = options or EncodeOptions()
+    exif, icc = read_metadata(source_path) if options.keep_metadata and source_path else (None, None)
+    if not output_path.lower().endswith(JPEG_EXTENSIONS):
+        extra = {k: v for k, v in (("exif", exif), ("icc_profile", icc)) if v}
+        with stage("encode"):
+            Image.fromarray(img).save(output_path, **extra)
+        return output_path
+    with stage("encode"):
+        jpeg = insert_metadata(_ACTIVE["encode"].encode(img, options), exif, icc)
+    with stage("write"):
+        with open(output_path, "wb") as f:
+            f.write(jpeg)
+    return output_path
@@ -10,3 +10,116 @@ CLASS_WEIGHTS = {
     2: 0.0,  # car
     3: 0.0   # motorcycle
 }
+
+# Imágenes por llamada al modelo YOLO
+YOLO_BATCH_SIZE = 16
+
+# Lado máximo del proxy reducido sobre el que corre la detección
+DETECTION_SIZE = 640
+
+# Modelo de detección y calidad JPEG de salida
+YOLO_MODEL = "yolov8n.pt"
+JPEG_QUALITY = 95
+
+# Detector (se puede cambiar por CLI): ultralytics (PyTorch), onnx (ONNX
+# Runtime sobre el modelo exportado) u openvino. Los exportados se generan
+# una vez junto a los pesos (yolov8n.onnx, yolov8n.int8.onnx, ...)
+DETECTOR_BACKEND = "ultralytics"
+DETECTOR_BACKENDS = ("ultralytics", "onnx", "openvino")
+DETECTION_IMGSZ = 640           # lado de entrada del modelo (letterbox)
+DETECTION_CONF = 0.25           # confianza mínima
+DETECTION_IOU = 0.7             # IoU del NMS
+DETECTION_CLASS_FILTER = False  # solo las clases de CLASS_WEIGHTS entran al NMS
+DETECTION_INT8 = False          # pesos cuantizados a int8 (onnx/openvino)
+# Calibración del int8 estático de onnx: fotos representativas de las
+# sesiones (None: las de ejemplo de ultralytics, que también exporta)
+INT8_CALIBRATION_DIR = None
+INT8_CALIBRATION_IMAGES = 64    # máximo de fotos de calibración
+
+# Codificación JPEG de salida (se pueden cambiar por CLI)
+JPEG_SUBSAMPLING = "4:2:0"   # submuestreo de croma: 4:4:4, 4:2:2 o 4:2:0
+JPEG_PROGRESSIVE = False
+JPEG_OPTIMIZE = False        # tablas Huffman optimizadas (archivo algo menor, más lento)
+JPEG_KEEP_METADATA = False   # copiar EXIF e ICC de la foto original
+JPEG_CODEC = "auto"          # auto (micro-benchmark), pillow, opencv o simplejpeg
+JPEG_CODECS = ("pillow", "opencv", "simplejpeg")
+JPEG_SUBSAMPLINGS = ("4:4:4", "4:2:2", "4:2:0")
+
+# Índice de detecciones crudas (uno por carpeta de entrada)
+DETECTIONS_INDEX = ".autoedit_detections.npz"
+
+# Vista previa (--preview): hojas de contacto con el antes/después de cada
+# foto, procesadas sobre el proxy de detección en vez de la foto completa
+PREVIEW_DIR = "preview"  # subcarpeta de la salida con las hojas
+PREVIEW_THUMB = 320      # lado de cada miniatura (px)
+PREVIEW_COLUMNS = 4      # fotos por fila
+PREVIEW_ROWS = 6         # filas por hoja
+PREVIEW_QUALITY = 85
+
+# Caché de resultados (carpeta oculta dentro de la salida). Los centros ROI
+# y las salidas siempre se cachean; los intermedios graduados (.npy sin
+# comprimir, ~72 MB por foto de 24 MP) solo con --cache-graded, pensado para
+# iterar marca de agua o codificación sobre pocas fotos
+CACHE_DIR = ".autoedit_cache"
+CACHE_GRADED = False
+CACHE_MAX_MB = 2048  # tope de intermedios graduados, con expulsión LRU al escribir
+
+# Subida a Drive
+UPLOAD_WORKERS = 4           # subidas concurrentes
+UPLOAD_RATE = 10             # peticiones por segundo (token bucket)
+UPLOAD_MAX_RETRIES = 6       # reintentos con backoff exponencial
+UPLOAD_CHUNK_MB = 8          # tamaño de chunk en subidas resumibles (múltiplo de 256 KB)
+RESUMABLE_THRESHOLD_MB = 5   # a partir de este tamaño la subida es resumible
+UPLOAD_MANIFEST = ".autoedit_upload.json"  # manifiesto local de subidas (en la carpeta de origen)
+
+# Subida a S3 o compatibles (destino s3://bucket/prefijo). Credenciales y
+# región salen de AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_SESSION_TOKEN
+# y AWS_REGION; el endpoint (MinIO, moto...) de --endpoint o AWS_ENDPOINT_URL.
+S3_REGION = "us-east-1"        # si no hay AWS_REGION / AWS_DEFAULT_REGION
+S3_MULTIPART_THRESHOLD_MB = 8  # a partir de este tamaño la subida es multipart
+S3_PART_MB = 8                 # tamaño de parte (mínimo 5 MB); también define el ETag esperado
+S3_PART_WORKERS = 4            # partes subiendo a la vez, compartidas por todos los archivos
+S3_MAX_BUFFERS = 8             # partes en memoria como máximo (RAM <= S3_MAX_BUFFERS * S3_PART_MB)
+
+# Enderezado opcional (--deskew): las líneas se buscan en un proxy en grises
+# de DESKEW_SIZE px de lado mayor; solo se corrigen inclinaciones entre
+# DESKEW_MIN_ANGLE y DESKEW_MAX_ANGLE grados con al menos DESKEW_MIN_LINES líneas.
+# Con más de DESKEW_MAX_EDGES de píxeles de borde la foto se deja como está.
+DESKEW_SIZE = 768
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_MIN_ANGLE = 0.1
+DESKEW_MIN_LINES = 8
+DESKEW_MAX_EDGES = 0.15
+
+# Perfiles de salida (--render): cada uno es un entregable con su proporción
+# ("auto" = 5:4 o 4:5 según la foto, o "W:H"), lado mayor máximo en píxeles,
+# calidad JPEG y ancho del logo relativo a la imagen. Sin --render se usa
+# "default" (la salida de siempre).
+RENDER_PROFILES = {
+    "default": {"ratio": "auto"},
+    "instagram": {"ratio": "4:5", "max_size": 1350, "quality": 90},
+    "web": {"ratio": "16:9", "max_size": 1920, "quality": 85},
+    "thumb": {"ratio": "auto", "max_size": 400, "quality": 80, "watermark_scale": 0.3},
+}
+
+# Modo --watch: cada cuánto se re-escanea la entrada y cuánto debe quedar
+# quieto un archivo (tamaño y mtime) antes de procesarlo
+WATCH_INTERVAL = 0.5  # segundos
+WATCH_SETTLE = 1.0    # segundos
+
+# Daemon `autoedit serve`: socket Unix en el directorio temporal del sistema
+SERVE_SOCKET = "autoedit.sock"
+
+# Procesamiento distribuido (process --coordinator / --worker): cola SQLite
+# en la carpeta de salida compartida
+JOBQUEUE_STORE = ".autoedit_jobs.sqlite"
+JOBQUEUE_LEASE = 120         # segundos sin señales de un worker antes de repartir sus trabajos
+JOBQUEUE_MAX_ATTEMPTS = 3    # leases vencidos o errores antes de dar un trabajo por fallido
+JOBQUEUE_POLL = 2.0          # segundos entre consultas cuando no hay trabajos libres
+
+# Ráfagas (--burst): los cuadros casi idénticos reutilizan el centro ROI del
+# primero. Umbral = diferencia media (0-255) de miniaturas en grises
+BURST_THRESHOLD = 5.0
+BURST_MAX_GAP = 1.0      # segundos EXIF máximos entre cuadros consecutivos
+BURST_MAX_FRAMES = 15    # se vuelve a detectar al menos cada tantos cuadros
+BURST_THUMB_SIZE = 32    # lado de la miniatura comparada
@@ -2,12 +2,35 @@ import numpy as np
 from PIL import Image
 
 # ================= FUNCIONES DE RECORTE =================
-def choose_target_ratio(img):
-    W,H = img.size
+def image_size(img):
+    """
+    (W, H) de una imagen PIL, de un array HxWxC o de una tupla (W, H).
+    """
+    if isinstance(img, np.ndarray):
+        return img.shape[1], img.shape[0]
+    if isinstance(img, tuple):
+        return img
+    return img.size
+
+def parse_ratio(ratio):
+    # "4:5" -> 0.8 ; también acepta un número
+    if isinstance(ratio, str):
+        w, h = ratio.split(":")
+        return float(w)/float(h)
+    return float(ratio)
+
+def choose_target_ratio(img, ratio="auto"):
+    """
+    Proporción del recorte: "auto" = 5:4 para horizontales y 4:5 para verticales;
+    si no, la proporción fija pedida ("16:9", "4:5", 1.0...).
+    """
+    if ratio != "auto":
+        return parse_ratio(ratio)
+    W,H = image_size(img)
     return 5/4 if W>=H else 4/5
 
-def crop_to_aspect_max_area_centered(img, target_ratio, center_x, center_y):
-    W,H = img.size
+def crop_box(img_size, target_ratio, center_x, center_y):
+    W,H = img_size
     current_ratio = W/H
     if current_ratio>target_ratio:
         crop_h = H
@@ -17,5 +40,14 @@ def crop_to_aspect_max_area_centered(img, target_ratio, center_x, center_y):
         crop_h = int(W/target_ratio)
     left = max(0,min(int(center_x-crop_w/2), W-crop_w))
     top = max(0,min(int(center_y-crop_h/2), H-crop_h))
-    return img.crop((left, top, left+crop_w, top+crop_h))
+    return (left, top, left+crop_w, top+crop_h)
+
+def crop_to_aspect_max_area_centered(img, target_ratio, center_x, center_y):
+    return img.crop(crop_box(img.size, target_ratio, center_x, center_y))
 
+def crop_array_to_aspect(arr, target_ratio, center_x, center_y):
+    """
+    Mismo recorte que crop_to_aspect_max_area_centered, como vista del array (sin copia).
+    """
+    left, top, right, bottom = crop_box(image_size(arr), target_ratio, center_x, center_y)
+    return arr[top:bottom, left:right]
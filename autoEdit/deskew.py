@@ -0,0 +1,116 @@
+import math
+import numpy as np
+import cv2
+from PIL import Image, ImageOps
+from .codec import oriented_size
+from .profiling import stage
+from .config import DESKEW_SIZE, DESKEW_MAX_ANGLE, DESKEW_MIN_ANGLE, DESKEW_MIN_LINES, DESKEW_MAX_EDGES
+
+
+# ================= ENDEREZADO =================
+# Versión rápida del deskew_image de logo.py: las líneas (Canny + HoughLines)
+# se buscan en un proxy en grises de DESKEW_SIZE px decodificado en modo draft,
+# la rotación y el recorte de las esquinas vacías son un único warpAffine, y
+# el recorte válido (el mayor rectángulo inscrito en la imagen rotada) sale de
+# una fórmula en vez de recorrer una máscara. El ángulo depende solo del
+# archivo: es el mismo con o sin intermedios en caché.
+
+def load_gray_proxy(input_path, max_size=DESKEW_SIZE):
+    """
+    Proxy en grises ya orientado y el tamaño (W, H) de la imagen completa.
+    """
+    with Image.open(input_path) as image:
+        size = oriented_size(image)
+        # draft reduce en la decodificación JPEG (1/2, 1/4, 1/8) mientras la imagen
+        # cubra la caja pedida: con media caja el proxy queda entre max_size/2 y max_size
+        scale = max_size/max(image.size)/2
+        image.draft("L", (math.ceil(image.width*scale), math.ceil(image.height*scale)))
+        proxy = ImageOps.exif_transpose(image).convert("L")
+    proxy.thumbnail((max_size, max_size), Image.BILINEAR, reducing_gap=2.0)
+    return np.asarray(proxy), size
+
+
+def estimate_skew(gray, max_angle=DESKEW_MAX_ANGLE, min_lines=DESKEW_MIN_LINES, step=0.1, top=32):
+    """
+    Inclinación en grados (positiva = girar en sentido antihorario) a partir de
+    las líneas casi horizontales y casi verticales; 0.0 si no hay suficientes.
+    HoughLines solo vota en ±max_angle alrededor de la horizontal (las
+    verticales, sobre los bordes transpuestos), con pasos de `step` grados.
+    """
+    edges = cv2.Canny(gray, 50, 150, apertureSize=3)
+    if np.count_nonzero(edges) > DESKEW_MAX_EDGES*edges.size:
+        return 0.0  # textura (follaje, arena, ruido): sin líneas fiables y Hough se encarece
+    votes = max(gray.shape) // 4  # una línea debe cubrir al menos 1/4 del lado mayor
+    min_theta, max_theta = np.radians(90 - max_angle), np.radians(90 + max_angle)
+    angles = []
+    for edge_map, sign in ((edges, 1), (np.ascontiguousarray(edges.T), -1)):
+        lines = cv2.HoughLines(edge_map, 1, np.radians(step), votes, min_theta=min_theta, max_theta=max_theta)
+        if lines is not None:
+            # Ordenadas por votos: solo las más fuertes
+            angles.append(sign*(np.degrees(lines[:top, 0, 1].astype(np.float64)) - 90))
+    angles = np.concatenate(angles) if angles else np.empty(0)
+    if len(angles) < min_lines:
+        return 0.0
+    return float(np.median(angles))
+
+
+def skew_angle(input_path):
+    with stage("deskew.estimate"):
+        gray, _ = load_gray_proxy(input_path)
+        return estimate_skew(gray)
+
+
+def inscribed_size(size, angle):
+    """
+    Mayor rectángulo alineado a los ejes dentro de la imagen (W, H) rotada `angle` grados.
+    """
+    W, H = size
+    a = math.radians(angle)
+    sin_a, cos_a = abs(math.sin(a)), abs(math.cos(a))
+    long_side, short_side = max(W, H), min(W, H)
+    if short_side <= 2*sin_a*cos_a*long_side or abs(sin_a - cos_a) < 1e-10:
+        # Rectángulo limitado por dos esquinas: caso de ángulos grandes o imágenes muy alargadas
+        x = 0.5*short_side
+        w, h = (x/sin_a, x/cos_a) if W >= H else (x/cos_a, x/sin_a)
+    else:
+        cos_2a = cos_a*cos_a - sin_a*sin_a
+        w, h = (W*cos_a - H*sin_a)/cos_2a, (H*cos_a - W*sin_a)/cos_2a
+    return int(w), int(h)
+
+
+def deskew_transform(size, angle, min_angle=DESKEW_MIN_ANGLE):
+    """
+    (matriz 2x3, tamaño de salida): rota alrededor del centro y deja el
+    rectángulo inscrito en el origen. Con inclinación despreciable, (None, size).
+    """
+    if abs(angle) < min_angle:
+        return None, size
+    W, H = size
+    out_w, out_h = inscribed_size(size, angle)
+    M = cv2.getRotationMatrix2D((W/2, H/2), angle, 1.0)
+    M[0, 2] += (out_w - W)/2
+    M[1, 2] += (out_h - H)/2
+    return M, (out_w, out_h)
+
+
+def map_point(M, point, size):
+    """
+    Lleva un punto (p. ej. el centro ROI) a las coordenadas de la imagen enderezada.
+    """
+    if M is None:
+        return point
+    x, y = M @ (point[0], point[1], 1.0)
+    return min(max(float(x), 0.0), size[0]), min(max(float(y), 0.0), size[1])
+
+
+def deskew_array(img, angle, center):
+    """
+    Endereza un array RGB con un único warpAffine (rotación + recorte) y
+    devuelve (imagen, centro ROI en las nuevas coordenadas).
+    """
+    M, size = deskew_transform((img.shape[1], img.shape[0]), angle)
+    if M is None:
+        return img, center
+    with stage("deskew.warp"):
+        straight = cv2.warpAffine(img, M, size, flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    return straight, map_point(M, center, size)
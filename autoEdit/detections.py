@@ -0,0 +1,114 @@
+import os
+from contextlib import contextmanager
+import numpy as np
+from .config import DETECTIONS_INDEX, DETECTION_SIZE
+from .yolo_name import Detections
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos (no hay workers distribuidos concurrentes)
+    fcntl = None
+
+
+# ================= ÍNDICE DE DETECCIONES =================
+# Detecciones crudas de YOLO por carpeta de entrada, en arrays columnares (.npz):
+#   names, stats (tamaño, mtime_ns), sizes (W, H), offsets -> xyxy, cls, conf
+# Con el índice, cambiar CLASS_WEIGHTS o los umbrales de boxes.py solo
+# recalcula la selección de ROI, sin volver a correr el modelo.
+
+def detection_fingerprint(model_name):
+    return f"{model_name}@{DETECTION_SIZE}"
+
+
+def _file_stats(path):
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns)
+
+
+@contextmanager
+def _exclusive(lock_path):
+    """
+    Lock de escritura entre procesos; lockf (POSIX) también vale entre nodos
+    que comparten la carpeta por NFS. Se libera solo si el proceso muere.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(lock_path, "a") as lock:
+        fcntl.lockf(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.lockf(lock, fcntl.LOCK_UN)
+
+
+class DetectionIndex:
+    def __init__(self, path, model_fp):
+        self.path = path
+        self.model_fp = model_fp
+        self.rows = {}
+        self.dirty = False
+        if os.path.exists(path):
+            self._load()
+
+    @classmethod
+    def for_folder(cls, input_folder, model_name):
+        return cls(os.path.join(input_folder, DETECTIONS_INDEX), detection_fingerprint(model_name))
+
+    def _load(self):
+        self.rows.update(self._read())
+
+    def _read(self):
+        rows = {}
+        with np.load(self.path) as data:
+            if str(data["model"]) != self.model_fp:
+                return rows  # otro modelo o tamaño de detección: índice inválido
+            offsets, xyxy, cls, conf = data["offsets"], data["xyxy"], data["cls"], data["conf"]
+            for i, name in enumerate(data["names"]):
+                a, b = offsets[i], offsets[i+1]
+                rows[str(name)] = (tuple(data["stats"][i]), tuple(data["sizes"][i]),
+                                   Detections(xyxy[a:b], cls[a:b].astype(int), conf[a:b]))
+        return rows
+
+    def get(self, name, input_path):
+        """
+        Devuelve (detections, size) si el archivo no cambió desde que se indexó.
+        """
+        row = self.rows.get(name)
+        if row is None or row[0] != _file_stats(input_path):
+            return None
+        return row[2], row[1]
+
+    def put(self, name, input_path, detections, size):
+        self.rows[name] = (_file_stats(input_path), tuple(size), detections)
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        # Leer, sumar y reemplazar bajo el lock: dos workers que guardan a la vez
+        # no pueden partir del mismo archivo y pisar las filas del otro
+        with _exclusive(self.path + ".lock"):
+            if os.path.exists(self.path):
+                # Filas que otros procesos guardaron mientras tanto; las de este son las más recientes
+                self.rows = {**self._read(), **self.rows}
+            self._write()
+        self.dirty = False
+
+    def _write(self):
+        names = list(self.rows)
+        stats, sizes, dets = zip(*self.rows.values()) if names else ((), (), ())
+        counts = [len(d.boxes) for d in dets]
+        tmp_path = f"{self.path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            model=np.array(self.model_fp),
+            names=np.array(names, dtype=str),
+            stats=np.array(stats, dtype=np.int64).reshape(-1, 2),
+            sizes=np.array(sizes, dtype=np.int32).reshape(-1, 2),
+            offsets=np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            xyxy=np.concatenate([d.boxes for d in dets]).astype(np.float32) if dets else np.zeros((0, 4), np.float32),
+            cls=np.concatenate([d.classes for d in dets]).astype(np.int16) if dets else np.zeros(0, np.int16),
+            conf=np.concatenate([d.confs for d in dets]).astype(np.float32) if dets else np.zeros(0, np.float32),
+        )
+        os.replace(tmp_path, self.path)
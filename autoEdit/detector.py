@@ -0,0 +1,254 @@
+import os
+from collections import namedtuple
+import numpy as np
+import cv2
+from .yolo_name import Detections
+from .config import (CLASS_WEIGHTS, YOLO_MODEL, DETECTOR_BACKEND, DETECTION_IMGSZ, DETECTION_CONF, DETECTION_IOU,
+                     DETECTION_CLASS_FILTER, DETECTION_INT8, INT8_CALIBRATION_DIR, INT8_CALIBRATION_IMAGES)
+
+
+# ================= BACKENDS DE DETECCIÓN =================
+# Todos los backends son invocables como el YOLO de ultralytics:
+# detector(imágenes PIL, verbose=False) -> un resultado por imagen, en
+# coordenadas de esa imagen (yolo_name.result_to_detections acepta tanto
+# los resultados de ultralytics como Detections).
+#   ultralytics -> PyTorch (import pesado; no admite int8)
+#   onnx        -> ONNX Runtime sobre el modelo exportado (sin torch)
+#   openvino    -> OpenVINO sobre el mismo ONNX, o el IR int8 de ultralytics
+# Los exportados se generan una sola vez junto a los pesos (la exportación
+# sí necesita ultralytics). Letterbox y NMS replican a ultralytics para que
+# los centros ROI coincidan entre backends (ver benchmarks/parity.py y
+# tests/test_detector_parity.py).
+
+DetectorSettings = namedtuple("DetectorSettings", ["backend", "weights", "imgsz", "conf", "iou", "class_filter", "int8"],
+                              defaults=(DETECTOR_BACKEND, YOLO_MODEL, DETECTION_IMGSZ, DETECTION_CONF, DETECTION_IOU,
+                                        DETECTION_CLASS_FILTER, DETECTION_INT8))
+
+_MAX_WH = 7680     # desplazamiento por clase en el NMS (como ultralytics)
+_MAX_NMS = 30000   # candidatos máximos que entran al NMS
+_MAX_DET = 300     # detecciones máximas por imagen
+_STRIDE = 32
+
+
+def as_settings(detector=None):
+    """
+    None -> ajustes de config.py; lista o tupla (p. ej. llegada por JSON) -> DetectorSettings.
+    """
+    settings = DetectorSettings(*detector) if detector else DetectorSettings()
+    if settings.backend not in _BACKENDS:
+        raise ValueError(f"Backend de detección desconocido: {settings.backend!r} (disponibles: {', '.join(_BACKENDS)})")
+    if settings.int8 and settings.backend == "ultralytics":
+        raise ValueError("Los pesos int8 necesitan el backend onnx u openvino")
+    return settings
+
+
+def filtered_classes(settings):
+    return sorted(CLASS_WEIGHTS) if settings.class_filter else None
+
+
+def detector_fingerprint(settings):
+    """
+    Identifica pesos y ajustes de inferencia (entra en las huellas del índice y la caché).
+    """
+    backend, weights, imgsz, conf, iou, class_filter, int8 = settings
+    classes = ",".join(map(str, filtered_classes(settings))) if class_filter else "all"
+    return f"{weights}[{backend},imgsz={imgsz},conf={conf},iou={iou},classes={classes}{',int8' if int8 else ''}]"
+
+
+def load_detector(settings):
+    return _BACKENDS[settings.backend](settings)
+
+
+# ================= EXPORTACIÓN =================
+def _export(weights, **kwargs):
+    from ultralytics import YOLO  # solo la primera vez: después se carga el exportado
+    print(f"📦 Exportando {weights} ({', '.join(f'{k}={v}' for k, v in kwargs.items())})...")
+    return YOLO(weights).export(**kwargs)
+
+
+def onnx_model(settings):
+    """
+    Ruta del modelo ONNX (dinámico en lote y tamaño); con int8, su versión
+    cuantizada estáticamente (QDQ, calibrada con fotos; ver _calibration_images):
+    la cuantización dinámica (ConvInteger) es más lenta que fp32 en CPU.
+    """
+    stem = os.path.splitext(settings.weights)[0]
+    path = stem + ".onnx"
+    if not os.path.exists(path):
+        path = _export(settings.weights, format="onnx", imgsz=settings.imgsz, dynamic=True)
+    if not settings.int8:
+        return path
+    quantized = stem + ".int8.onnx"
+    if not os.path.exists(quantized):
+        from onnxruntime.quantization import quantize_static, CalibrationDataReader, QuantFormat, QuantType
+        images = _calibration_images()
+        print(f"📦 Cuantizando {path} a int8 (calibración con {len(images)} fotos)...")
+
+        class Calibration(CalibrationDataReader):
+            def __init__(self, input_name):
+                self.blobs = ({input_name: letterbox([image], settings.imgsz, False)[0]} for image in images)
+
+            def get_next(self):
+                return next(self.blobs, None)
+
+        import onnxruntime as ort
+        input_name = ort.InferenceSession(path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        quantize_static(path, quantized, Calibration(input_name), quant_format=QuantFormat.QDQ, per_channel=True,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    return quantized
+
+
+def _calibration_images():
+    """
+    Proxies de detección de INT8_CALIBRATION_DIR (hasta INT8_CALIBRATION_IMAGES)
+    o, sin carpeta, de las fotos de ejemplo de ultralytics.
+    """
+    from .scanner import scan_images
+    from .stages import load_detection_proxy
+    folder = INT8_CALIBRATION_DIR
+    if folder is None:
+        try:
+            from ultralytics.utils import ASSETS
+            folder = str(ASSETS)
+        except ImportError:
+            raise RuntimeError("Falta INT8_CALIBRATION_DIR en config.py (fotos para calibrar el modelo int8)")
+    paths = sorted(scan_images(folder, recursive=True))[:INT8_CALIBRATION_IMAGES]
+    if not paths:
+        raise RuntimeError(f"No hay imágenes para calibrar el modelo int8 en '{folder}'")
+    return [load_detection_proxy(os.path.join(folder, rel_path))[0] for rel_path in paths]
+
+
+def openvino_model(settings):
+    """
+    Ruta del modelo para OpenVINO: el mismo ONNX, o con int8 el IR cuantizado
+    por ultralytics (NNCF, calibrado con su dataset por defecto).
+    """
+    if not settings.int8:
+        return onnx_model(settings)
+    stem = os.path.splitext(settings.weights)[0]
+    folder = f"{stem}_int8_openvino_model"
+    if not os.path.isdir(folder):
+        folder = _export(settings.weights, format="openvino", imgsz=settings.imgsz, int8=True)
+    return os.path.join(folder, os.path.basename(stem) + ".xml")
+
+
+# ================= PRE Y POSTPROCESO =================
+def letterbox(images, imgsz, dynamic):
+    """
+    Lote NCHW float32 y ((escala_x, escala_y), (pad_x, pad_y)) por imagen. Como ultralytics:
+    reducción con INTER_LINEAR, relleno gris 114 centrado y, si el modelo
+    admite tamaños dinámicos y todas las imágenes miden lo mismo, solo el
+    relleno hasta múltiplos de 32.
+    """
+    arrays = [np.asarray(image if image.mode == "RGB" else image.convert("RGB")) for image in images]
+    same_shape = len({a.shape for a in arrays}) == 1
+    blobs, metas = [], []
+    for img in arrays:
+        h, w = img.shape[:2]
+        scale = min(imgsz / h, imgsz / w)
+        new_w, new_h = int(round(w * scale)), int(round(h * scale))
+        if (new_w, new_h) != (w, h):
+            img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        out_w, out_h = imgsz, imgsz
+        if dynamic and same_shape:
+            out_w, out_h = new_w + (-new_w) % _STRIDE, new_h + (-new_h) % _STRIDE
+        dw, dh = (out_w - new_w) / 2, (out_h - new_h) / 2
+        top, left = int(round(dh - 0.1)), int(round(dw - 0.1))
+        img = cv2.copyMakeBorder(img, top, out_h - new_h - top, left, out_w - new_w - left,
+                                 cv2.BORDER_CONSTANT, value=(114, 114, 114))
+        blobs.append(img)
+        metas.append(((new_w / w, new_h / h), (left, top)))  # escalas por eje, como scale_boxes
+    batch = np.stack(blobs).transpose(0, 3, 1, 2).astype(np.float32) / 255
+    return np.ascontiguousarray(batch), metas
+
+
+def postprocess(prediction, scale, pad, size, conf, iou, classes=None):
+    """
+    Salida cruda de YOLOv8 (4 + nc, N) -> Detections en coordenadas de la
+    imagen de entrada: umbral de confianza, filtro de clases y NMS por clase.
+    """
+    pred = prediction.T
+    scores = pred[:, 4:]
+    cls = scores.argmax(1)
+    confs = scores[np.arange(len(cls)), cls]
+    keep = confs > conf
+    if classes is not None:
+        keep &= np.isin(cls, classes)
+    boxes, cls, confs = pred[keep, :4], cls[keep], confs[keep]
+    order = np.argsort(-confs)[:_MAX_NMS]
+    boxes, cls, confs = boxes[order], cls[order], confs[order]
+
+    xyxy = np.concatenate([boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2], axis=1)
+    shifted = xyxy + (cls[:, None] * _MAX_WH)  # cajas de clases distintas no se suprimen
+    rects = np.concatenate([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]], axis=1)
+    kept = np.asarray(cv2.dnn.NMSBoxes(rects.tolist(), confs.tolist(), conf, iou), dtype=int).reshape(-1)[:_MAX_DET]
+
+    xyxy = (xyxy[kept] - np.array(pad * 2)) / np.array(scale * 2)
+    xyxy = xyxy.clip(0, np.array(size * 2, dtype=np.float32))
+    return Detections(xyxy.astype(np.float32), cls[kept].astype(int), confs[kept].astype(np.float32))
+
+
+# ================= BACKENDS =================
+class UltralyticsDetector:
+    def __init__(self, settings):
+        from ultralytics import YOLO  # torch se importa solo aquí
+        self.settings = settings
+        self.model = YOLO(settings.weights)
+
+    def __call__(self, images, verbose=False):
+        s = self.settings
+        return self.model(images, imgsz=s.imgsz, conf=s.conf, iou=s.iou, classes=filtered_classes(s), verbose=verbose)
+
+
+class _ExportedDetector:
+    """
+    Base de los backends sobre un modelo exportado: `_infer(lote NCHW)` devuelve (B, 4 + nc, N).
+    """
+    batched = True   # False: el modelo tiene lote fijo de 1
+    dynamic = False  # True: el modelo acepta cualquier alto/ancho
+
+    def __call__(self, images, verbose=False):
+        s = self.settings
+        batch, metas = letterbox(images, s.imgsz, self.dynamic)
+        if self.batched:
+            outputs = self._infer(batch)
+        else:
+            outputs = np.concatenate([self._infer(blob[None]) for blob in batch])
+        classes = filtered_classes(s)
+        return [postprocess(output, scale, pad, image.size, s.conf, s.iou, classes)
+                for output, (scale, pad), image in zip(outputs, metas, images)]
+
+
+class OnnxDetector(_ExportedDetector):
+    def __init__(self, settings):
+        import onnxruntime as ort
+        self.settings = settings
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_model(settings), options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.batched = not isinstance(model_input.shape[0], int)
+        self.dynamic = not all(isinstance(dim, int) for dim in model_input.shape[2:])
+
+    def _infer(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVinoDetector(_ExportedDetector):
+    def __init__(self, settings):
+        import openvino as ov
+        self.settings = settings
+        core = ov.Core()
+        model = core.read_model(openvino_model(settings))
+        shape = model.inputs[0].get_partial_shape()
+        self.batched = shape[0].is_dynamic
+        self.dynamic = shape[2].is_dynamic or shape[3].is_dynamic
+        self.compiled = core.compile_model(model, "CPU")
+        self.output = self.compiled.output(0)
+
+    def _infer(self, batch):
+        return self.compiled(batch)[self.output]
+
+
+_BACKENDS = {"ultralytics": UltralyticsDetector, "onnx": OnnxDetector, "openvino": OpenVinoDetector}
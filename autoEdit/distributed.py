@@ -0,0 +1,278 @@
+import os
+import re
+import json
+import time
+import socket
+import sqlite3
+import threading
+from .scanner import scan_images
+from .config import (JOBQUEUE_STORE, JOBQUEUE_LEASE, JOBQUEUE_MAX_ATTEMPTS, JOBQUEUE_POLL, YOLO_BATCH_SIZE, JPEG_CODEC,
+                     CACHE_GRADED)
+
+
+# ================= PROCESAMIENTO DISTRIBUIDO =================
+# `process --coordinator` encola las fotos de la entrada en un almacén de
+# trabajos SQLite (por defecto <output>/.autoedit_jobs.sqlite, en el disco
+# compartido) junto con la configuración de la corrida. Cada
+# `process --worker` (en esta u otra máquina, con las mismas rutas
+# montadas) toma lotes con un lease de JOBQUEUE_LEASE segundos, los pasa
+# por las etapas de siempre (detección, recorte, grading, marca de agua) y
+# los marca como terminados. Un hilo renueva los leases mientras el worker
+# vive; si el worker muere, sus trabajos vencen y otro los retoma. Una foto
+# que falla (archivo corrupto...) vuelve sola a la cola sin afectar al resto
+# del lote. Un trabajo que falla o vence JOBQUEUE_MAX_ATTEMPTS veces queda
+# como fallido.
+# Se usa SQLite y no un servicio TCP: no hay proceso central que mantener
+# vivo, y el journal por defecto (no WAL) funciona sobre NFS/SMB con locks.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    rel_path TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT, lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT, updated REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_until);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY, value TEXT
+);
+"""
+
+STATES = ("pending", "leased", "done", "failed")
+
+
+def default_store(output_folder):
+    return os.path.join(output_folder, JOBQUEUE_STORE)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobStore:
+    def __init__(self, path):
+        self.path = path
+        # isolation_level=None: las transacciones se abren a mano con BEGIN IMMEDIATE
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.executescript(SCHEMA)
+
+    def _write(self, sql, params=()):
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self.db.execute(sql, params)
+            self.db.execute("COMMIT")
+            return cursor.rowcount
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def save_settings(self, settings):
+        self._write("INSERT OR REPLACE INTO settings VALUES ('process', ?)", (json.dumps(settings),))
+
+    def settings(self):
+        row = self.db.execute("SELECT value FROM settings WHERE key='process'").fetchone()
+        if row is None:
+            raise RuntimeError(f"'{self.path}' no tiene una corrida encolada (falta process --coordinator)")
+        return json.loads(row[0])
+
+    def enqueue(self, rel_paths):
+        """
+        Encola (o vuelve a dejar pendientes) las rutas; los trabajos en curso no se tocan.
+        Los ya terminados se reencolan igual: la caché de resultados los omite si no cambiaron.
+        """
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.executemany(
+                "INSERT INTO jobs (rel_path, updated) VALUES (?, ?) "
+                "ON CONFLICT (rel_path) DO UPDATE SET state='pending', worker=NULL, lease_until=NULL, "
+                "attempts=0, error=NULL, updated=excluded.updated WHERE jobs.state != 'leased'",
+                ((rel_path, now) for rel_path in rel_paths))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def lease(self, worker, count, lease=JOBQUEUE_LEASE, max_attempts=JOBQUEUE_MAX_ATTEMPTS):
+        """
+        Toma hasta `count` trabajos pendientes o con lease vencido. Los que ya
+        agotaron sus intentos pasan a fallidos en vez de repartirse.
+        """
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute("UPDATE jobs SET state='failed', error=COALESCE(error, 'lease vencido (worker caído "
+                            "o bloqueado)'), updated=? WHERE attempts>=? "
+                            "AND (state='pending' OR (state='leased' AND lease_until<?))",
+                            (now, max_attempts, now))
+            rel_paths = [row[0] for row in self.db.execute(
+                "SELECT rel_path FROM jobs WHERE state='pending' OR (state='leased' AND lease_until<?) "
+                "ORDER BY rel_path LIMIT ?", (now, count))]
+            self.db.executemany("UPDATE jobs SET state='leased', worker=?, lease_until=?, attempts=attempts+1, "
+                                "updated=? WHERE rel_path=?",
+                                ((worker, now + lease, now, rel_path) for rel_path in rel_paths))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return rel_paths
+
+    def renew(self, worker, lease=JOBQUEUE_LEASE):
+        now = time.time()
+        return self._write("UPDATE jobs SET lease_until=? WHERE worker=? AND state='leased'", (now + lease, worker))
+
+    def complete(self, worker, rel_path):
+        """
+        Marca el trabajo como terminado si sigue siendo de `worker` (si otro lo
+        retomó tras un lease vencido, gana el que lo tiene ahora).
+        """
+        return self._write("UPDATE jobs SET state='done', lease_until=NULL, updated=? "
+                           "WHERE rel_path=? AND worker=? AND state='leased'", (time.time(), rel_path, worker))
+
+    def fail(self, worker, rel_path, error, max_attempts=JOBQUEUE_MAX_ATTEMPTS):
+        """
+        Un trabajo de `worker` falló: vuelve a la cola para otro intento, o
+        queda como fallido si ya agotó `max_attempts`. El resto del lote sigue.
+        """
+        return self._write("UPDATE jobs SET state=CASE WHEN attempts>=? THEN 'failed' ELSE 'pending' END, "
+                           "worker=NULL, lease_until=NULL, error=?, updated=? "
+                           "WHERE rel_path=? AND worker=? AND state='leased'",
+                           (max_attempts, error, time.time(), rel_path, worker))
+
+    def release(self, worker, error=None):
+        """
+        Devuelve a la cola los trabajos en curso de `worker`. Detenido a mano
+        (sin `error`) no gasta el intento; tras un error sí, y lo anota.
+        """
+        return self._write("UPDATE jobs SET state='pending', worker=NULL, lease_until=NULL, error=?, "
+                           "attempts=attempts-?, updated=? WHERE worker=? AND state='leased'",
+                           (error, 0 if error else 1, time.time(), worker))
+
+    def counts(self):
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(self.db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+        return counts
+
+    def failed(self):
+        return self.db.execute("SELECT rel_path, error FROM jobs WHERE state='failed' ORDER BY rel_path").fetchall()
+
+    def close(self):
+        self.db.close()
+
+
+def _progress(counts):
+    total = sum(counts.values())
+    return (f"📊 {counts['done']}/{total} terminados, {counts['leased']} en proceso, "
+            f"{counts['pending']} pendientes, {counts['failed']} fallidos")
+
+
+# ==================== COORDINADOR ====================
+def run_coordinator(input_folder, output_folder, watermark_path, store_path=None, use_cache=True, encoding=None,
+                    recursive=False, include=(), exclude=(), renders=(), deskew=False, burst=None,
+                    detector=None, wait=True, cache_graded=CACHE_GRADED):
+    """
+    Encola las fotos de `input_folder` con la configuración de la corrida y,
+    con `wait`, muestra el avance hasta que no quedan trabajos (Ctrl+C deja
+    de esperar; la cola sigue disponible para los workers).
+    """
+    input_folder, output_folder = os.path.abspath(input_folder), os.path.abspath(output_folder)
+    os.makedirs(output_folder, exist_ok=True)
+    store_path = store_path or default_store(output_folder)
+    store = JobStore(store_path)
+
+    # Los workers leen todo de aquí: solo necesitan la ruta del almacén
+    store.save_settings({"input_folder": input_folder, "output_folder": output_folder,
+                         "watermark_path": os.path.abspath(watermark_path), "use_cache": use_cache,
+                         "cache_graded": cache_graded,
+                         "encoding": list(encoding) if encoding is not None else None,
+                         "renders": list(renders), "deskew": deskew, "burst": burst,
+                         "detector": list(detector) if detector is not None else None})
+    rel_paths = list(scan_images(input_folder, recursive, include, exclude, prune=(output_folder,)))
+    store.enqueue(rel_paths)
+    print(f"📥 {len(rel_paths)} imágenes encoladas en '{store_path}'.")
+    print(f"👷 Inicia los workers con: autoedit process --worker --jobs {store_path}")
+
+    if wait:
+        last = None
+        try:
+            while True:
+                counts = store.counts()
+                if counts != last:
+                    print(_progress(counts))
+                    last = counts
+                if not counts["pending"] and not counts["leased"]:
+                    break
+                time.sleep(JOBQUEUE_POLL)
+        except KeyboardInterrupt:
+            print("\n🛑 Coordinador detenido; los workers siguen con la cola.")
+        for rel_path, error in store.failed():
+            print(f"❌ Falló: {rel_path} ({error})")
+    store.close()
+
+
+# ==================== WORKER ====================
+def _heartbeat(store_path, worker, lease, stop):
+    # Conexión propia: los objetos sqlite3 no se comparten entre hilos
+    store = JobStore(store_path)
+    try:
+        while not stop.wait(lease / 3):
+            store.renew(worker, lease)
+    finally:
+        store.close()
+
+
+def run_worker(store_path, workers=1, batch_size=YOLO_BATCH_SIZE, codec=JPEG_CODEC, lease=JOBQUEUE_LEASE,
+               model=None, log=False, profile=False):
+    """
+    Procesa trabajos de la cola hasta que no quedan pendientes ni en curso
+    (espera a que venzan los leases de workers caídos para retomarlos).
+    Con `log`/`profile` cada worker deja su log y su perfil en la salida,
+    con su nombre en el archivo.
+    """
+    from .codec import EncodeOptions
+    from .pipeline import run_processing_pipeline
+
+    if not os.path.exists(store_path):
+        raise RuntimeError(f"No existe la cola de trabajos '{store_path}' (falta process --coordinator)")
+    store = JobStore(store_path)
+    settings = store.settings()
+    if settings["encoding"] is not None:
+        settings["encoding"] = EncodeOptions(*settings["encoding"])
+    worker = worker_name()
+    print(f"👷 Worker {worker} tomando trabajos de '{store_path}'...")
+
+    def leased():
+        while True:
+            rel_paths = store.lease(worker, batch_size, lease)
+            if rel_paths:
+                yield from rel_paths
+                continue
+            counts = store.counts()
+            if not counts["pending"] and not counts["leased"]:
+                return
+            yield None  # nada libre por ahora: vaciar lo que está en vuelo y esperar
+            time.sleep(JOBQUEUE_POLL)
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(store_path, worker, lease, stop), daemon=True)
+    heartbeat.start()
+    error = None
+    try:
+        run_processing_pipeline(workers=workers, batch_size=batch_size, codec=codec, model=model,
+                                rel_paths=leased(), on_done=lambda rel_path: store.complete(worker, rel_path),
+                                on_error=lambda rel_path, e: store.fail(worker, rel_path, f"{type(e).__name__}: {e}"),
+                                log=log, profile=profile, report_suffix="_" + re.sub(r"[^\w.-]", "_", worker),
+                                **settings)
+    except KeyboardInterrupt:
+        print("\n🛑 Worker detenido.")
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        stop.set()
+        heartbeat.join()
+        if store.release(worker, error):
+            print("↩️ Trabajos sin terminar devueltos a la cola.")
+        print(_progress(store.counts()))
+        store.close()
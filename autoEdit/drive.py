@@ -0,0 +1,170 @@
+import os
+import json
+import uuid
+import threading
+import mimetypes
+import http.client
+from urllib.parse import urlencode
+from .transport import HttpSession, HttpError, _path
+from .config import UPLOAD_RATE, UPLOAD_MAX_RETRIES, UPLOAD_CHUNK_MB, RESUMABLE_THRESHOLD_MB
+
+
+# ================= CLIENTE DRIVE (API v3, REST) =================
+# Sesión HTTP compartida por todos los hilos de subida (ver transport.py):
+# un solo token OAuth (de pydrive) y una conexión keep-alive por hilo. Cada
+# petición pasa por un token bucket y los 429/5xx se reintentan con backoff
+# exponencial (un 401 renueva el token). Un 403 solo se reintenta si es por
+# límite de tasa; sin permisos o sin cuota se falla al instante.
+
+DRIVE_ENDPOINT = "https://www.googleapis.com"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+FILE_FIELDS = "id,name,md5Checksum,size,mimeType"
+FOLDER_MIME = "application/vnd.google-apps.folder"
+
+DriveError = HttpError
+
+
+def _error_reasons(body):
+    # {"error": {"errors": [{"reason": "rateLimitExceeded", ...}], ...}} -> {"rateLimitExceeded"}
+    try:
+        error = json.loads(body)["error"]
+        return {item.get("reason") for item in error.get("errors", [])}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return set()
+
+
+def _range_end(headers):
+    # "Range: bytes=0-1234" -> 1234 ; sin cabecera el servidor no tiene nada
+    value = headers.get("Range")
+    return int(value.rsplit("-", 1)[1]) if value else -1
+
+
+class DriveSession(HttpSession):
+    retry_statuses = RETRY_STATUSES
+
+    def __init__(self, endpoint=DRIVE_ENDPOINT, gauth=None, rate=UPLOAD_RATE,
+                 max_retries=UPLOAD_MAX_RETRIES, backoff_base=1.0):
+        super().__init__(endpoint, rate, max_retries, backoff_base)
+        self.gauth = gauth
+        self._auth_lock = threading.Lock()
+
+    # --- autenticación ---
+    def _headers(self, method, url, body, headers):
+        headers = dict(headers or {})
+        if self.gauth is not None:
+            if self.gauth.access_token_expired:
+                self._refresh()
+            headers["Authorization"] = f"Bearer {self.gauth.credentials.access_token}"
+        return headers
+
+    def _refresh(self):
+        with self._auth_lock:
+            self.gauth.Refresh()
+
+    def _expired(self, status):
+        if status == 401 and self.gauth is not None:
+            self._refresh()
+            return True
+        return False
+
+    def _retryable(self, status, body):
+        if status == 403:
+            return bool(_error_reasons(body) & RATE_LIMIT_REASONS)
+        return status in RETRY_STATUSES
+
+    # --- operaciones ---
+    def list_folder(self, folder_id, page_size=1000):
+        """
+        Genera los archivos de la carpeta (dicts id, name, md5Checksum, size), página a página.
+        """
+        page_token = None
+        while True:
+            params = {"q": f"'{folder_id}' in parents and trashed=false", "pageSize": page_size,
+                      "fields": f"nextPageToken,files({FILE_FIELDS})"}
+            if page_token:
+                params["pageToken"] = page_token
+            _, _, data = self.request("GET", "/drive/v3/files?" + urlencode(params))
+            page = json.loads(data)
+            yield from page.get("files", [])
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                return
+
+    def create_folder(self, name, parent_id):
+        """
+        Crea una subcarpeta y devuelve su recurso (id, name, mimeType...).
+        """
+        metadata = {"name": name, "mimeType": FOLDER_MIME, "parents": [parent_id]}
+        _, _, data = self.request("POST", f"/drive/v3/files?fields={FILE_FIELDS}", json.dumps(metadata).encode(),
+                                  {"Content-Type": "application/json; charset=UTF-8"})
+        return json.loads(data)
+
+    def upload_file(self, path, name, folder_id, file_id=None,
+                    chunk_size=UPLOAD_CHUNK_MB << 20, resumable_threshold=RESUMABLE_THRESHOLD_MB << 20):
+        """
+        Sube `path` como `name` dentro de la carpeta; con `file_id` reemplaza el
+        contenido de ese archivo. Archivos grandes van por subida resumible en chunks.
+        """
+        size = os.path.getsize(path)
+        mime = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        metadata = {"name": name}
+        if file_id is None:
+            metadata["parents"] = [folder_id]
+            method, url = "POST", "/upload/drive/v3/files"
+        else:
+            method, url = "PATCH", f"/upload/drive/v3/files/{file_id}"
+        if size <= resumable_threshold:
+            return self._upload_multipart(path, mime, method, url, metadata)
+        return self._upload_resumable(path, size, mime, method, url, metadata, chunk_size)
+
+    def _upload_multipart(self, path, mime, method, url, metadata):
+        boundary = uuid.uuid4().hex
+        with open(path, "rb") as f:
+            content = f.read()
+        body = (f"--{boundary}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{json.dumps(metadata)}\r\n--{boundary}\r\nContent-Type: {mime}\r\n\r\n").encode()
+        body += content + f"\r\n--{boundary}--".encode()
+        _, _, data = self.request(method, f"{url}?uploadType=multipart&fields={FILE_FIELDS}", body,
+                                  {"Content-Type": f"multipart/related; boundary={boundary}"})
+        return json.loads(data)
+
+    def _upload_resumable(self, path, size, mime, method, url, metadata, chunk_size):
+        _, headers, _ = self.request(method, f"{url}?uploadType=resumable&fields={FILE_FIELDS}",
+                                     json.dumps(metadata).encode(),
+                                     {"Content-Type": "application/json; charset=UTF-8",
+                                      "X-Upload-Content-Type": mime, "X-Upload-Content-Length": str(size)})
+        session_url = _path(headers["Location"])
+        offset, failures = 0, 0
+        with open(path, "rb") as f:
+            while True:
+                f.seek(offset)
+                chunk = f.read(chunk_size)
+                content_range = f"bytes {offset}-{offset + len(chunk) - 1}/{size}" if chunk else f"bytes */{size}"
+                try:
+                    status, headers, data = self.request("PUT", session_url, chunk, {"Content-Range": content_range},
+                                                         ok=(200, 201, 308), max_retries=0)
+                except (DriveError, OSError, http.client.HTTPException) as e:
+                    status = getattr(e, "status", None)
+                    auth_expired = status == 401 and self.gauth is not None
+                    if failures == self.max_retries or (isinstance(e, DriveError) and
+                                                        not self._retryable(status, e.body) and not auth_expired):
+                        raise
+                    if auth_expired:
+                        self._refresh()
+                    else:
+                        self._backoff(failures)
+                    failures += 1
+                    offset = self._resume_offset(session_url, size)
+                    continue
+                if status != 308:
+                    return json.loads(data)
+                offset = _range_end(headers) + 1
+
+    def _resume_offset(self, session_url, size):
+        """
+        Pregunta al servidor cuántos bytes recibió de la sesión resumible.
+        """
+        status, headers, _ = self.request("PUT", session_url, b"", {"Content-Range": f"bytes */{size}"},
+                                          ok=(200, 201, 308))
+        return size if status != 308 else _range_end(headers) + 1
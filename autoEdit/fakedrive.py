@@ -0,0 +1,199 @@
+import re
+import json
+import time
+import uuid
+import random
+import argparse
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+# ================= DRIVE FALSO LOCAL =================
+# Subconjunto de la API v3 de Drive (listado paginado, subida multipart,
+# subida resumible y PATCH por ID) en memoria, con latencia, ancho de banda y
+# fallos 429/503 simulados. Sirve para probar y medir el uploader sin red.
+
+class FakeDriveState:
+    def __init__(self, latency=0.0, fail_rate=0.0, bandwidth_mb=None, seed=None):
+        self.files = {}
+        self.sessions = {}
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.bandwidth = bandwidth_mb * (1 << 20) if bandwidth_mb else None
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+
+    def should_fail(self):
+        with self.lock:
+            self.requests += 1
+            if self.random.random() < self.fail_rate:
+                self.failures += 1
+                return True
+            return False
+
+    def save(self, metadata, content, file_id=None):
+        with self.lock:
+            record = self.files.get(file_id) or {"id": file_id or uuid.uuid4().hex, "parents": [],
+                                                 "mimeType": "application/octet-stream"}
+            record.update({k: v for k, v in metadata.items() if k in ("name", "parents")})
+            record.update({"md5Checksum": hashlib.md5(content).hexdigest(), "size": str(len(content))})
+            self.files[record["id"]] = record
+            return resource(record)
+
+    def create(self, metadata):
+        # Recurso sin contenido (carpetas)
+        with self.lock:
+            record = {"id": uuid.uuid4().hex, "parents": [], "mimeType": "application/octet-stream"}
+            record.update({k: v for k, v in metadata.items() if k in ("name", "parents", "mimeType")})
+            self.files[record["id"]] = record
+            return resource(record)
+
+
+def resource(record):
+    return {k: record[k] for k in ("id", "name", "md5Checksum", "size", "mimeType") if k in record}
+
+
+class FakeDriveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None  # FakeDriveState, asignado por make_fake_drive
+
+    def log_message(self, *args):
+        pass
+
+    # --- utilidades ---
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else b""
+        if self.state.bandwidth:
+            time.sleep(len(data) / self.state.bandwidth)
+        return data
+
+    def _reply(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, handler):
+        body = self._body()
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        if self.state.should_fail():
+            return self._reply(self.state.random.choice((429, 503)), {"error": "simulated"})
+        url = urlsplit(self.path)
+        return handler(url.path, parse_qs(url.query), body)
+
+    # --- verbos ---
+    def do_GET(self):
+        self._handle(self._list)
+
+    def do_POST(self):
+        self._handle(lambda path, query, body: self._create(body) if path == "/drive/v3/files"
+                     else self._upload(path, query, body, None))
+
+    def do_PATCH(self):
+        self._handle(lambda path, query, body: self._upload(path, query, body, path.rsplit("/", 1)[1]))
+
+    def do_PUT(self):
+        self._handle(self._chunk)
+
+    # --- endpoints ---
+    def _list(self, path, query, body):
+        match = re.search(r"'([^']+)' in parents", query.get("q", [""])[0])
+        folder = match.group(1) if match else None
+        page_size = int(query.get("pageSize", ["100"])[0])
+        start = int(query.get("pageToken", ["0"])[0])
+        with self.state.lock:
+            files = [f for f in self.state.files.values() if folder in f["parents"]]
+        page = files[start:start + page_size]
+        payload = {"files": [resource(f) for f in page]}
+        if start + page_size < len(files):
+            payload["nextPageToken"] = str(start + page_size)
+        self._reply(200, payload)
+
+    def _create(self, body):
+        self._reply(200, self.state.create(json.loads(body)))
+
+    def _upload(self, path, query, body, file_id):
+        if file_id is not None and file_id not in self.state.files:
+            return self._reply(404, {"error": "notFound"})
+        upload_type = query.get("uploadType", [""])[0]
+        if upload_type == "multipart":
+            boundary = self.headers["Content-Type"].split("boundary=")[1].encode()
+            parts = body.split(b"--" + boundary)
+            metadata = json.loads(parts[1].split(b"\r\n\r\n", 1)[1].strip())
+            content = parts[2].split(b"\r\n\r\n", 1)[1][:-2]
+            return self._reply(200, self.state.save(metadata, content, file_id))
+        if upload_type == "resumable":
+            session_id = uuid.uuid4().hex
+            with self.state.lock:
+                self.state.sessions[session_id] = {
+                    "metadata": json.loads(body or b"{}"), "file_id": file_id, "data": bytearray(),
+                    "total": int(self.headers["X-Upload-Content-Length"]),
+                }
+            host = self.headers.get("Host", "localhost")
+            return self._reply(200, headers={"Location": f"http://{host}/upload/resumable/{session_id}"})
+        self._reply(400, {"error": "uploadType"})
+
+    def _chunk(self, path, query, body):
+        session = self.state.sessions.get(path.rsplit("/", 1)[1])
+        if session is None:
+            return self._reply(404, {"error": "session"})
+        spec = self.headers["Content-Range"].split(" ", 1)[1]
+        received = session["data"]
+        if not spec.startswith("*") and int(spec.split("-", 1)[0]) == len(received):
+            received.extend(body)
+        if len(received) >= session["total"]:
+            return self._reply(200, self.state.save(session["metadata"], bytes(received), session["file_id"]))
+        headers = {"Range": f"bytes=0-{len(received) - 1}"} if received else {}
+        self._reply(308, headers=headers)
+
+
+def make_fake_drive(host="127.0.0.1", port=0, **options):
+    """
+    Crea el servidor (sin arrancarlo). Devuelve (server, state, url).
+    """
+    state = FakeDriveState(**options)
+    handler = type("BoundFakeDriveHandler", (FakeDriveHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server, state, f"http://{host}:{server.server_address[1]}"
+
+
+def start_fake_drive(**options):
+    """
+    Arranca el Drive falso en un hilo de fondo (para pruebas y benchmarks).
+    """
+    server, state, url = make_fake_drive(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive falso local para probar y medir subidas sin red.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia por petición, en segundos.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fracción de peticiones que responden 429/503.")
+    parser.add_argument("--bandwidth", type=float, default=None, help="Ancho de banda simulado por conexión, en MB/s.")
+    args = parser.parse_args()
+
+    server, _, url = make_fake_drive(args.host, args.port, latency=args.latency,
+                                     fail_rate=args.fail_rate, bandwidth_mb=args.bandwidth)
+    print(f"🧪 Drive falso escuchando en {url} (usa --drive-endpoint {url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
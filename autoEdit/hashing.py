@@ -0,0 +1,9 @@
+import hashlib
+
+
+def file_hash(path, algorithm="sha1", chunk_size=1 << 20):
+    h = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
@@ -0,0 +1,74 @@
+import os
+import json
+import time
+from .config import UPLOAD_MANIFEST
+from .hashing import file_hash
+
+
+# ================= MANIFIESTO DE SUBIDAS =================
+# Registro local por destino (ID de carpeta de Drive o s3://bucket/prefijo):
+# ruta relativa -> md5, tamaño, mtime, ID remoto (en S3, la clave) y fecha de
+# subida. Permite saber qué falta o cambió sin listar la carpeta remota, y
+# actualizar por ID los archivos re-procesados.
+# "dirs" guarda el ID de cada subcarpeta del destino (ruta relativa -> ID).
+
+class UploadManifest:
+    def __init__(self, path, folder_id):
+        self.path = path
+        self.folder_id = folder_id
+        self.data = {"folders": {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.data = json.load(f)
+        self.entries = self.data["folders"].setdefault(folder_id, {})
+        self.dirs = self.data.setdefault("dirs", {}).setdefault(folder_id, {})
+        self.dirty = False
+
+    @classmethod
+    def for_folder(cls, source_folder, folder_id):
+        return cls(os.path.join(source_folder, UPLOAD_MANIFEST), folder_id)
+
+    def get(self, name):
+        return self.entries.get(name)
+
+    def unchanged(self, name, path):
+        """
+        True si el archivo local coincide con lo subido: atajo por tamaño+mtime,
+        y si el mtime cambió, comparación del md5.
+        """
+        entry = self.entries[name]
+        st = os.stat(path)
+        if (entry["size"], entry["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+            return True
+        if entry["size"] == st.st_size and file_hash(path, "md5") == entry["md5"]:
+            entry["mtime_ns"] = st.st_mtime_ns
+            self.dirty = True
+            return True
+        return False
+
+    def put(self, name, path, remote):
+        st = os.stat(path)
+        self.entries[name] = {
+            "id": remote["id"],
+            "md5": remote.get("md5Checksum") or file_hash(path, "md5"),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "uploaded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.dirty = True
+
+    def folder(self, rel_dir):
+        return self.dirs.get(rel_dir)
+
+    def put_folder(self, rel_dir, folder_id):
+        self.dirs[rel_dir] = folder_id
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=1)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,140 @@
+import signal
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, BrokenExecutor
+from .stages import load_detection_proxy, fill_centers, render_job, save_outputs
+from .renders import DEFAULT_RENDERS, encode_options
+from .codec import use_codecs
+from . import profiling
+
+
+# ================= PIPELINE POR ETAPAS =================
+# decode del proxy (procesos) -> detección (proceso principal, dueño del modelo)
+# -> decode completo + presets + watermark (procesos) -> escritura (hilos)
+# Solo los proxies reducidos viajan al proceso principal.
+# Cada etapa es una cola acotada; los resultados salen en el orden de entrada.
+# Si `jobs` entrega None (fuente en espera, modo --watch) se vacía todo lo que
+# está en vuelo antes de pedir más: las fotos no esperan a completar un lote.
+# Con `on_error(job, error)` un archivo que falla (corrupto, ilegible...) se
+# informa y se saltea sin frenar a los demás; sin él, el error se propaga.
+
+_WATERMARK = None
+_RENDERS = DEFAULT_RENDERS
+_DESKEW = False
+_DONE = object()
+
+
+def _init_worker():
+    # Ctrl+C lo atiende el proceso principal (cierra los pools y guarda caché e índice)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _init_enhance_worker(watermark, codecs, renders, deskew):
+    global _WATERMARK, _RENDERS, _DESKEW
+    _init_worker()
+    _WATERMARK, _RENDERS, _DESKEW = watermark, renders, deskew
+    use_codecs(*codecs)  # mismos códecs que eligió el proceso principal
+
+
+def _render_job(job, profile=False):
+    return profiling.call_profiled(profile, render_job, job, _WATERMARK, _RENDERS, _DESKEW)
+
+
+def _load_proxy(input_path, profile=False):
+    return profiling.call_profiled(profile, load_detection_proxy, input_path)
+
+
+def _save_outputs(job, images, options):
+    save_outputs(images, job.output_paths, options, job.input_path)
+    return job, images
+
+
+def _unwrap(outcome):
+    # (resultado, muestras del worker) -> resultado, juntando las muestras
+    result, drained = outcome
+    if drained is not None:
+        profiling.merge(drained)
+    return result
+
+
+def job_failed(on_error, job, error):
+    """
+    Informa un trabajo fallido a `on_error`, o relanza si no hay quien lo reciba.
+    Un pool roto (proceso muerto) no es un error de la foto: siempre se relanza.
+    """
+    if on_error is None or isinstance(error, BrokenExecutor):
+        raise error
+    on_error(job, error)
+
+
+def _pop_ready(queue, limit, force=False, on_error=None):
+    """
+    Saca de la cola, en orden, los trabajos cuya cabeza ya terminó
+    (o todos si la cola está llena o se fuerza el vaciado).
+    """
+    while queue and (force or len(queue) >= limit or queue[0][1].done()):
+        job, future = queue.popleft()
+        try:
+            result = future.result()
+        except Exception as e:
+            job_failed(on_error, job, e)
+            continue
+        yield job, result
+
+
+def run_staged_pipeline(jobs, model, watermark, workers, batch_size=1, encoding=None, codecs=("pillow", "pillow"),
+                        renders=DEFAULT_RENDERS, deskew=False, bursts=None, on_error=None):
+    """
+    Procesa `jobs` (stages.Job) con pools por etapa.
+    Genera (job, imágenes) en el mismo orden de entrada, con el centro ROI ya
+    resuelto y una imagen por perfil de `renders`.
+    `codecs` = (decoder, encoder) de codec.select_codecs.
+    `bursts` (burst.BurstTracker) vive aquí, junto al modelo.
+    Con `on_error(job, error)` los trabajos que fallan no se generan.
+    """
+    options = encode_options(encoding, renders)
+    max_inflight = max(workers * 2, batch_size)
+    profile = profiling.is_enabled()
+    jobs = iter(jobs)
+    decoding, enhancing, writing = deque(), deque(), deque()
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as decode_pool, \
+         ProcessPoolExecutor(workers, initializer=_init_enhance_worker, initargs=(watermark, codecs, renders, deskew)) as enhance_pool, \
+         ThreadPoolExecutor(workers) as writer_pool:
+
+        pending, idle = True, False
+        while pending or decoding or enhancing or writing:
+            # Llenar la cola de decodificación (solo los trabajos sin centro en caché)
+            while pending and not idle and len(decoding) < max_inflight:
+                job = next(jobs, _DONE)
+                if job is _DONE:
+                    pending = False
+                    break
+                if job is None:
+                    idle = True
+                    break
+                future = decode_pool.submit(_load_proxy, job.input_path, profile) if job.center is None else None
+                decoding.append((job, future))
+
+            # Detección por lotes en el proceso principal (un solo modelo cargado)
+            batch = [decoding.popleft() for _ in range(min(batch_size, len(decoding)))]
+            decoded, proxies = [], []
+            for job, future in batch:
+                if future is not None:
+                    try:
+                        proxies.append(_unwrap(future.result()))
+                    except Exception as e:
+                        job_failed(on_error, job, e)
+                        continue
+                decoded.append(job)
+            for job in fill_centers(decoded, proxies, model, batch_size, bursts):
+                enhancing.append((job, enhance_pool.submit(_render_job, job, profile)))
+
+            flush = (idle or not pending) and not decoding
+            for job, outcome in _pop_ready(enhancing, max_inflight, flush, on_error):
+                images = _unwrap(outcome)
+                writing.append((job, writer_pool.submit(_save_outputs, job, images, options)))
+
+            flush = flush and not enhancing
+            for _, result in _pop_ready(writing, max_inflight, flush, on_error):
+                yield result
+            idle = idle and bool(decoding or enhancing or writing)
@@ -1,23 +1,122 @@
 import os
-from PIL import Image, ImageOps
-# Moved Google Drive imports into run_upload_pipeline
-from .config import CLASS_WEIGHTS, LOGO_SCALE, LOGO_OPACITY, LOGO_MARGIN
-from .presets import auto_luminance_smart, add_warmth, adjust_saturation_contrast
-from .watermark import logo_to_white, apply_watermark
-from .crop import choose_target_ratio, crop_to_aspect_max_area_centered
-from .yolo_name import get_roi_center_yolo
-import numpy as np
-import cv2
-from ultralytics import YOLO
 import time
-from pydrive.auth import GoogleAuth # Keep these at top if used by other parts, or move to upload func
-from pydrive.drive import GoogleDrive # Keep these at top if used by other parts, or move to upload func
+from collections import deque
+from PIL import Image
+from .watermark import logo_to_white
+from .stages import Job, load_detection_proxy, fill_centers, render_job, save_outputs
+from .parallel import run_staged_pipeline, job_failed
+from .cache import ResultCache, settings_fingerprints
+from .detections import DetectionIndex
+from .yolo_name import detect_yolo, roi_center_from_detections
+from .detector import as_settings, detector_fingerprint, load_detector
+from .manifest import UploadManifest
+from .storage import open_storage
+from .upload import Uploader
+from .codec import EncodeOptions, select_codecs, write_image
+from .scanner import scan_images, relative_name, batched
+from .watch import watch_images
+from .burst import BurstTracker
+from .renders import render_profiles, output_paths, encode_options
+from .preview import init_preview_worker, preview_cell, contact_sheet
+from . import profiling
+from .profiling import stage
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .config import (YOLO_BATCH_SIZE, DETECTION_SIZE, UPLOAD_WORKERS, UPLOAD_RATE, JPEG_CODEC, PREVIEW_DIR,
+                     PREVIEW_COLUMNS, PREVIEW_ROWS, PREVIEW_QUALITY, CACHE_GRADED)
 
 
-# ==================== PROCESSING PIPELINE ====================
-def run_processing_pipeline(input_folder, output_folder, watermark_path, preview=False, log=False):
-    model = YOLO("yolov8n.pt")  # asegúrate de tener el modelo
+class LazyModel:
+    """
+    Carga el detector (ver detector.py) en la primera inferencia: si todo
+    viene de caché o del índice, el modelo nunca se carga.
+    """
+    def __init__(self, settings=None):
+        self.settings = as_settings(settings)
+        self.model = None
+
+    def load(self):
+        if self.model is None:
+            # torch, onnxruntime u openvino se importan solo al detectar
+            self.model = load_detector(self.settings)
+        return self.model
+
+    def warm(self, size=DETECTION_SIZE):
+        # Una inferencia en vacío: la primera llamada reserva memoria y compila kernels
+        self.load()([Image.new("RGB", (size, size))], verbose=False)
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+
+def _run_sequential(jobs, model, watermark, batch_size, encoding=None, renders=None, deskew=False, bursts=None,
+                    on_error=None):
+    renders = renders or render_profiles()
+    options = encode_options(encoding, renders)
+    for batch in batched(jobs, batch_size):
+        decoded, proxies = [], []
+        for job in batch:
+            if job.center is None:
+                try:
+                    proxies.append(load_detection_proxy(job.input_path))
+                except Exception as e:
+                    job_failed(on_error, job, e)
+                    continue
+            decoded.append(job)
+        for job in fill_centers(decoded, proxies, model, batch_size, bursts):
+            try:
+                images = render_job(job, watermark, renders, deskew)
+                save_outputs(images, job.output_paths, options, job.input_path)
+            except Exception as e:
+                job_failed(on_error, job, e)
+                continue
+            yield job, images
 
+
+def _save_index(index):
+    try:
+        index.save()
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar el índice de detecciones en '{index.path}': {e}")
+
+
+# ==================== PROCESSING PIPELINE ====================
+def run_processing_pipeline(input_folder, output_folder, watermark_path, log=False, workers=1,
+                            batch_size=YOLO_BATCH_SIZE, use_cache=True, on_output=None, encoding=None,
+                            codec=JPEG_CODEC, recursive=False, include=(), exclude=(), profile=False, model=None,
+                            watch=False, renders=(), deskew=False, rel_paths=None, on_done=None, burst=None,
+                            detector=None, cache_graded=CACHE_GRADED, on_error=None, report_suffix=""):
+    """
+    `on_output(output_path)` se llama apenas cada salida queda en disco
+    (también para las omitidas por caché); lo usa `publish` para subir en streaming.
+    `encoding` (codec.EncodeOptions) controla la salida JPEG; `codec` elige el
+    códec ("auto" = el más rápido instalado). Con `recursive` se recorren las
+    subcarpetas y la salida replica su estructura; `include`/`exclude` son globs.
+    Con `profile` se mide cada etapa y se escribe <output>/profile_process.json/.csv.
+    `model` permite pasar un detector ya cargado (o uno falso en benchmarks).
+    Con `watch` la carpeta se vigila hasta Ctrl+C: cada foto nueva se procesa
+    apenas termina de escribirse, con los mismos pools y el modelo ya cargado.
+    `renders` son nombres de config.RENDER_PROFILES: cada foto se decodifica,
+    detecta y gradúa una vez y sale en todos esos formatos (con más de uno,
+    cada perfil escribe en <output>/<perfil>/). Con `deskew` se endereza la
+    foto antes de recortar (las detecciones no cambian: se mapea el centro).
+    `rel_paths` reemplaza el escaneo de la entrada por otra fuente de rutas
+    relativas (la cola de un worker distribuido; como en --watch, None =
+    "nada más por ahora") y `on_done(rel_path)` avisa cada foto terminada.
+    Con `burst` (umbral de similitud, ver burst.py) las ráfagas de cuadros
+    casi idénticos (en orden de nombre) corren YOLO solo en su primer cuadro.
+    `detector` (detector.DetectorSettings) elige backend y ajustes de inferencia.
+    Con `cache_graded` la caché guarda también los intermedios graduados.
+    Con `on_error(rel_path, error)` una foto que falla se informa y se saltea
+    (las demás siguen); sin él, el primer error detiene la corrida.
+    `report_suffix` se agrega al nombre del log y del perfil (un worker
+    distribuido no pisa los de los demás en la salida compartida).
+    """
+    detector = as_settings(detector)
+    encoding = encoding or EncodeOptions()
+    renders = render_profiles(renders)
+    started = profiling.start() if profile else None
+    processed = 0
     # Preparamos watermark
     watermark = Image.open(watermark_path).convert("RGBA")
     watermark = logo_to_white(watermark)
@@ -28,107 +127,285 @@ def run_processing_pipeline(input_folder, output_folder, watermark_path, preview
     
     print(f"🔄 Iniciando procesamiento de imágenes de '{input_folder}' a '{output_folder}'...")
 
-    for filename in os.listdir(input_folder):
-        if not filename.lower().endswith((".jpg",".jpeg",".png")):
-            continue
-        input_path = os.path.join(input_folder, filename)
-        output_path = os.path.join(output_folder, filename)
-
-        # Abrir imagen
-        image = Image.open(input_path)
-        image = ImageOps.exif_transpose(image).convert("RGBA")
-
-        # Ratio y ROI
-        target_ratio = choose_target_ratio(image)
-        cx, cy = get_roi_center_yolo(image, model)
-        image_cropped = crop_to_aspect_max_area_centered(image, target_ratio, cx, cy)
-
-        # Ajustes automáticos
-        img_cv = np.array(image_cropped.convert("RGB"))[:, :, ::-1]
-        img_cv = auto_luminance_smart(img_cv)
-        img_cv = add_warmth(img_cv)
-        img_cv = adjust_saturation_contrast(img_cv)
-        image_adjusted = Image.fromarray(cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB))
-
-        # Aplicar watermark
-        image_final = apply_watermark(image_adjusted, watermark)
-        image_final = image_final.convert("RGB")
-        image_final.save(output_path, quality=95)
-        print(f"✅ Procesado: {filename}")
-        log_lines.append(f"Procesado: {filename}")
-
-        if preview:
-            image_final.show()
-            break
+    if rel_paths is None and watch:
+        rel_paths = watch_images(input_folder, recursive, include, exclude, prune=(output_folder,))
+        print("👀 Vigilando la carpeta de entrada (Ctrl+C para detener)...")
+    elif rel_paths is None:
+        rel_paths = scan_images(input_folder, recursive, include, exclude, prune=(output_folder,))
+        if burst is not None:
+            rel_paths = iter(sorted(rel_paths))  # las ráfagas se reconocen entre archivos consecutivos
+
+    # Caché de resultados: omite entradas sin cambios y reutiliza centros/intermedios
+    cache = None
+    if use_cache:
+        cache = ResultCache(output_folder, settings_fingerprints(watermark_path, detector_fingerprint(detector),
+                                                                encoding, renders, deskew, burst),
+                            graded=cache_graded)
+
+    # Índice de detecciones: la selección de ROI se recalcula sin correr el modelo
+    index = DetectionIndex.for_folder(input_folder, detector_fingerprint(detector))
+    cache_keys = {}
+
+    def make_jobs():
+        # Trabajos generados a medida que el escáner encuentra archivos
+        created_dirs = set()
+        for rel_path in rel_paths:
+            if rel_path is None:
+                yield None  # vigilancia en espera: vaciar lo que está en vuelo
+                continue
+            input_path = os.path.join(input_folder, rel_path)
+            paths = output_paths(output_folder, rel_path, renders)
+            for output_dir in {os.path.dirname(path) for path in paths} - created_dirs:
+                os.makedirs(output_dir, exist_ok=True)
+                created_dirs.add(output_dir)
+            job = Job(input_path, paths)
+            if cache is not None:
+                entry = cache.lookup(input_path, paths)
+                if entry.done:
+                    print(f"⏩ Omitiendo '{rel_path}', sin cambios desde la última ejecución.")
+                    log_lines.append(f"Omitido (sin cambios): {rel_path}")
+                    if on_output is not None:
+                        for path in paths:
+                            on_output(path)
+                    if on_done is not None:
+                        on_done(rel_path)
+                    continue
+                cache_keys[input_path] = entry.key
+                job = Job(input_path, paths, entry.center, entry.graded_path, entry.graded_cached)
+            hit = index.get(rel_path, input_path) if job.center is None else None
+            if hit is not None:
+                with stage("roi"):
+                    job = job._replace(center=tuple(map(float, roi_center_from_detections(*hit))))
+            yield job
+
+    def job_error(job, error):
+        rel_path = relative_name(job.input_path, input_folder)
+        cache_keys.pop(job.input_path, None)
+        print(f"❌ Error en '{rel_path}': {type(error).__name__}: {error}")
+        log_lines.append(f"Error: {rel_path} ({type(error).__name__}: {error})")
+        on_error(rel_path, error)
+
+    # El modelo solo se carga cuando algún archivo necesita detección
+    model = model or LazyModel(detector)
+    bursts = BurstTracker(burst) if burst is not None else None
+
+    codecs = select_codecs(codec, encoding)
+    print(f"🧪 Códec JPEG: decodificación con {codecs[0]}, codificación con {codecs[1]}.")
+    if len(renders) > 1:
+        print(f"🖼️ Perfiles de salida: {', '.join(render.name for render in renders)}.")
+
+    # Con --workers > 1 las etapas corren en pools
+    if workers > 1:
+        print(f"⚙️ Modo paralelo con {workers} workers por etapa.")
+        results = run_staged_pipeline(make_jobs(), model, watermark, workers, batch_size, encoding, codecs,
+                                      renders, deskew, bursts, job_error if on_error else None)
+    else:
+        results = _run_sequential(make_jobs(), model, watermark, batch_size, encoding, renders, deskew, bursts,
+                                  job_error if on_error else None)
+
+    try:
+        for job, _ in results:
+            rel_path = relative_name(job.input_path, input_folder)
+            processed += 1
+            print(f"✅ Procesado: {rel_path}")
+            log_lines.append(f"Procesado: {rel_path}")
+            if cache is not None:
+                cache.store(cache_keys.pop(job.input_path), job.center, job.graded_path, job.output_paths)
+            if job.detections is not None:
+                index.put(rel_path, job.input_path, *job.detections)
+            if on_output is not None:
+                for path in job.output_paths:
+                    on_output(path)
+            if on_done is not None:
+                on_done(rel_path)
+    except KeyboardInterrupt:
+        if not watch:
+            raise
+        print("\n🛑 Vigilancia detenida.")  # se guardan igual caché, índice, log y perfil
+
+    if cache is not None:
+        cache.close()
+    _save_index(index)
+    if bursts is not None and bursts.reused:
+        print(f"🎞️ Ráfagas: {bursts.reused} cuadros reutilizaron el centro ROI de su cuadro clave (sin YOLO).")
     
     # Guardar log
     if log:
-        log_file_path = os.path.join(output_folder,"process_log.txt")
+        log_file_path = os.path.join(output_folder,f"process_log{report_suffix}.txt")
         with open(log_file_path, "w") as f:
             f.write("\n".join(log_lines))
         print(f"📄 Log de procesamiento guardado en {log_file_path}")
+
+    if profile:
+        profiling.finish(started, processed, os.path.join(output_folder, f"profile_process{report_suffix}"))
     
     print(f"🎉 Proceso de procesamiento finalizado. Imágenes guardadas en '{output_folder}'.")
 
 
-# ==================== UPLOAD PIPELINE ====================
-def run_upload_pipeline(source_folder, drive_folder_id, log=False):
-    # Google Drive auth
-    gauth = GoogleAuth()
-    gauth.LocalWebserverAuth() # Authenticates via a local webserver flow
-    gauth.Refresh() # Refreshes credentials if expired
-    drive = GoogleDrive(gauth)
+# ==================== DETECTION PIPELINE ====================
+def run_detection_pipeline(input_folder, workers=1, batch_size=YOLO_BATCH_SIZE, recursive=False, include=(), exclude=(),
+                           model=None, detector=None):
+    """
+    Solo llena el índice de detecciones de la carpeta (sin recortar ni guardar imágenes).
+    """
+    detector = as_settings(detector)
+    index = DetectionIndex.for_folder(input_folder, detector_fingerprint(detector))
+    counts = {"indexed": 0, "detected": 0}
 
-    log_lines = []
-    
-    print(f"🔄 Iniciando subida de imágenes desde '{source_folder}' a Google Drive (carpeta ID: {drive_folder_id})...")
+    def pending():
+        for rel_path in scan_images(input_folder, recursive, include, exclude):
+            if index.get(rel_path, os.path.join(input_folder, rel_path)) is None:
+                yield rel_path
+            else:
+                counts["indexed"] += 1
 
-    # Obtener lista de archivos existentes en la carpeta de Drive
-    print("🔎 Obteniendo lista de archivos existentes en la carpeta de Drive...")
-    query = f"'{drive_folder_id}' in parents and trashed=false"
-    try:
-        existing_files_in_drive = {f['title'] for f in drive.ListFile({'q': query}).GetList()}
-        print(f"✅ Encontrados {len(existing_files_in_drive)} archivos en la carpeta de Drive.")
-    except Exception as e:
-        print(f"⚠️ Error al obtener la lista de archivos de Drive: {e}. Asegúrate de que el ID de la carpeta es correcto y tienes permisos.")
-        return # Exit if we can't get existing files
+    print(f"🔎 Detectando imágenes sin indexar en '{input_folder}'...")
+    model = model or LazyModel(detector)
 
-    files_to_consider = [f for f in os.listdir(source_folder) if f.lower().endswith((".jpg", ".jpeg", ".png"))]
-    
-    if not files_to_consider:
-        print(f"ℹ️ No se encontraron imágenes JPG/JPEG/PNG en '{source_folder}' para subir.")
-        return
+    def detect_all(proxy_map):
+        for batch in batched(pending(), batch_size):
+            paths = [os.path.join(input_folder, rel_path) for rel_path in batch]
+            proxies = list(proxy_map(load_detection_proxy, paths))
+            sizes = [size for _, size in proxies]
+            detections = detect_yolo([p for p, _ in proxies], model, batch_size, sizes)
+            for rel_path, path, dets, size in zip(batch, paths, detections, sizes):
+                index.put(rel_path, path, dets, size)
+                print(f"✅ Detectado: {rel_path} ({len(dets.boxes)} objetos)")
+            counts["detected"] += len(batch)
+            _save_index(index)  # punto de control por lote
+
+    # Con un solo worker no hay pool: decodificar en este proceso (sin fork)
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            detect_all(pool.map)
+    else:
+        detect_all(map)
+
+    print(f"🎉 {counts['detected']} imágenes detectadas, {counts['indexed']} ya estaban indexadas "
+          f"(índice en '{index.path}').")
+
+
+# ==================== PREVIEW PIPELINE ====================
+def _prefetch_proxies(pool, input_folder, rel_paths, batch_size):
+    # Decodifica el lote siguiente mientras el modelo procesa el actual
+    pending = None
+    for batch in batched(rel_paths, batch_size):
+        futures = [pool.submit(load_detection_proxy, os.path.join(input_folder, rel_path)) for rel_path in batch]
+        if pending is not None:
+            yield pending[0], [future.result() for future in pending[1]]
+        pending = (batch, futures)
+    if pending is not None:
+        yield pending[0], [future.result() for future in pending[1]]
+
+
+def run_preview_pipeline(input_folder, output_folder, watermark_path, workers=None, batch_size=YOLO_BATCH_SIZE,
+                         recursive=False, include=(), exclude=(), renders=(), deskew=False, detector=None,
+                         model=None):
+    """
+    Hojas de contacto de toda la entrada en <output>/preview/ (ver preview.py),
+    con `workers` procesos (por defecto, todos los núcleos). Nada se escribe
+    en la salida normal ni en la caché; las detecciones nuevas sí quedan en
+    el índice, así la corrida completa posterior no vuelve a correr el modelo.
+    """
+    detector = as_settings(detector)
+    renders = render_profiles(renders)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    watermark = logo_to_white(Image.open(watermark_path).convert("RGBA"))
+    sheet_dir = os.path.join(output_folder, PREVIEW_DIR)
+    os.makedirs(sheet_dir, exist_ok=True)
+
+    index = DetectionIndex.for_folder(input_folder, detector_fingerprint(detector))
+    model = model or LazyModel(detector)
+    rel_paths = sorted(scan_images(input_folder, recursive, include, exclude, prune=(output_folder,)))
+    print(f"🔎 Vista previa de {len(rel_paths)} imágenes de '{input_folder}' con {workers} procesos...")
+
+    cells, sheets, counts = [], [], {"detected": 0, "indexed": 0}
+
+    def add_cell(cell):
+        cells.append(cell)
+        if len(cells) == PREVIEW_COLUMNS * PREVIEW_ROWS:
+            write_sheet()
 
-    for filename in files_to_consider:
-        local_file_path = os.path.join(source_folder, filename)
+    def write_sheet():
+        path = os.path.join(sheet_dir, f"contact_{len(sheets) + 1:03d}.jpg")
+        write_image(contact_sheet(cells), path, EncodeOptions(quality=PREVIEW_QUALITY))
+        sheets.append(path)
+        cells.clear()
+        print(f"🗂️ Hoja de contacto: {path}")
 
-        if filename in existing_files_in_drive:
-            print(f"⏩ Omitiendo '{filename}', ya existe en Google Drive.")
-            log_lines.append(f"Omitido (ya existe): {filename}")
-            continue
+    with ProcessPoolExecutor(workers, initializer=init_preview_worker, initargs=(watermark, renders, deskew)) as pool:
+        rendering = deque()
+        for batch, proxies in _prefetch_proxies(pool, input_folder, rel_paths, batch_size):
+            paths = [os.path.join(input_folder, rel_path) for rel_path in batch]
+            hits = [index.get(rel_path, path) for rel_path, path in zip(batch, paths)]
+            missing = [i for i, hit in enumerate(hits) if hit is None]
+            if missing:
+                sizes = [proxies[i][1] for i in missing]
+                detections = detect_yolo([proxies[i][0] for i in missing], model, batch_size, sizes)
+                for i, dets, size in zip(missing, detections, sizes):
+                    hits[i] = (dets, size)
+                    index.put(batch[i], paths[i], dets, size)
+            counts["detected"] += len(missing)
+            counts["indexed"] += len(batch) - len(missing)
+
+            # Recorte, grading y celdas en los procesos; este proceso queda libre para detectar
+            for rel_path, path, (proxy, size), (dets, _) in zip(batch, paths, proxies, hits):
+                center = tuple(map(float, roi_center_from_detections(dets, size)))
+                rendering.append(pool.submit(preview_cell, path, rel_path, proxy, size, dets, center))
+            while rendering and (len(rendering) > workers * 2 or rendering[0].done()):
+                add_cell(rendering.popleft().result())
+        while rendering:
+            add_cell(rendering.popleft().result())
+    if cells:
+        write_sheet()
+    _save_index(index)
+
+    print(f"🎉 {len(sheets)} hojas de contacto en '{sheet_dir}' ({time.perf_counter() - started:.1f} s; "
+          f"{counts['detected']} detectadas, {counts['indexed']} desde el índice).")
+
+
+# ==================== PUBLISH PIPELINE ====================
+def run_publish_pipeline(input_folder, output_folder, watermark_path, destination, log=False, workers=1,
+                         batch_size=YOLO_BATCH_SIZE, use_cache=True, upload_workers=UPLOAD_WORKERS,
+                         rate=UPLOAD_RATE, endpoint=None, encoding=None, codec=JPEG_CODEC,
+                         recursive=False, include=(), exclude=(), profile=False, watch=False, renders=(),
+                         deskew=False, burst=None, detector=None, cache_graded=CACHE_GRADED):
+    """
+    process + upload en streaming: cada imagen terminada entra a la cola de subida
+    mientras el resto sigue procesándose, así CPU y red trabajan a la vez.
+    Con `watch`, cada foto nueva de la entrada termina en el destino sin re-ejecutar.
+    """
+    storage = open_storage(destination, endpoint, rate)
+    started = profiling.start() if profile else None
+    manifest = UploadManifest.for_folder(output_folder, storage.destination)
+
+    with ThreadPoolExecutor(max(1, upload_workers)) as pool:
+        uploader = Uploader(storage, manifest, pool, max(1, upload_workers) * 4)
+
+        def on_output(output_path):
+            uploader.offer(relative_name(output_path, output_folder), output_path)
 
-        print(f"⬆ Subiendo '{filename}'...")
         try:
-            gfile = drive.CreateFile({
-                'title': filename,
-                'parents': [{'id': drive_folder_id}]
-            })
-            gfile.SetContentFile(local_file_path)
-            gfile.Upload()
-            print(f"✅ Subido: {filename}")
-            log_lines.append(f"Subido a Drive: {filename}")
-            time.sleep(0.5) # Pausa para evitar exceder límites de API o para una mejor UX
-
-        except Exception as e:
-            print(f"⚠️ Error subiendo '{filename}': {e}")
-            log_lines.append(f"ERROR subiendo '{filename}': {e}")
-            continue
-
-    # Guardar log de subida
+            run_processing_pipeline(input_folder, output_folder, watermark_path, log=log, workers=workers,
+                                    batch_size=batch_size, use_cache=use_cache, on_output=on_output,
+                                    encoding=encoding, codec=codec, recursive=recursive,
+                                    include=include, exclude=exclude, watch=watch, renders=renders,
+                                    deskew=deskew, burst=burst, detector=detector,
+                                    cache_graded=cache_graded)
+            print(f"⏳ Esperando {len(uploader.uploads)} subidas pendientes...")
+            uploader.collect(wait=True)
+        finally:
+            manifest.save()
+            storage.close()
+
     if log:
-        log_file_path = os.path.join(source_folder, "upload_log.txt")
+        log_file_path = os.path.join(output_folder, "upload_log.txt")
         with open(log_file_path, "w") as f:
-            f.write("\n".join(log_lines))
+            f.write("\n".join(uploader.log_lines))
         print(f"📄 Log de subida guardado en {log_file_path}")
-    
-    print("🎉 Proceso de subida a Drive finalizado.")
\ No newline at end of file
+
+    if profile:
+        profiling.finish(started, uploader.offered, os.path.join(output_folder, "profile_publish"))
+
+    print(f"🎉 Publicación finalizada: imágenes procesadas y subidas a {storage.name}.")
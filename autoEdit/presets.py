@@ -1,5 +1,6 @@
 import cv2
 import numpy as np
+from .profiling import stage
 
 # ================= FUNCIONES DE PRESET =================
 def auto_luminance_smart(img_cv, 
@@ -18,14 +19,7 @@ def auto_luminance_smart(img_cv,
     L, A, B = cv2.split(lab)
     
     mean_L = np.mean(L)
-    
-    # Determinar factor de ajuste según luminosidad promedio
-    if mean_L < min_L:          # imagen oscura → subir brillo
-        factor = min(target_L / (mean_L + 1e-5), max_change)
-    elif mean_L > max_L:        # imagen clara → bajar brillo
-        factor = max(target_L / (mean_L + 1e-5), 2 - max_change)  # evita sobrecompensar
-    else:
-        factor = 1.0             # bien expuesta → no tocar
+    factor = luminance_factor(mean_L, target_L, min_L, max_L, max_change)
     
     # Aplicar factor solo si es necesario
     if factor != 1.0:
@@ -41,6 +35,17 @@ def auto_luminance_smart(img_cv,
     return img_final
 
 
+def luminance_factor(mean_L, target_L=120, min_L=100, max_L=150, max_change=1.5):
+    """
+    Factor de ajuste de L* según la luminosidad promedio.
+    """
+    if mean_L < min_L:          # imagen oscura → subir brillo
+        return min(target_L / (mean_L + 1e-5), max_change)
+    elif mean_L > max_L:        # imagen clara → bajar brillo
+        return max(target_L / (mean_L + 1e-5), 2 - max_change)  # evita sobrecompensar
+    return 1.0                  # bien expuesta → no tocar
+
+
 def tone_map_highlights(img_cv, clip_percent=100):
     """
     Reduce un poco los valores altos para evitar sobreexposición
@@ -76,3 +81,70 @@ def adjust_saturation_contrast(img_cv, sat_factor=1.2, contrast_factor=1.05):
     img_float = np.clip(img_float, 0, 255).astype(np.uint8)
     return img_float
 
+
+# ================= MOTOR DE GRADING CON LUTs =================
+# Misma cadena que auto_luminance_smart -> add_warmth -> adjust_saturation_contrast,
+# pero cada paso por canal se precalcula como una LUT de 256 entradas y se aplica
+# con cv2.LUT sobre uint8: sin copias float32 del frame completo.
+
+_IDENTITY = np.arange(256, dtype=np.uint8)
+
+
+def _lut3(b, g, r):
+    return np.dstack([b, g, r]).astype(np.uint8)
+
+
+def _scale_lut(factor):
+    return np.clip(np.arange(256, dtype=np.float32) * factor, 0, 255).astype(np.uint8)
+
+
+def grade_image(img_cv,
+                target_L=120, min_L=100, max_L=150, max_change=1.5,
+                warmth=1.025, sat_factor=1.2, contrast_factor=1.05, rgb=False):
+    """
+    Grading completo en una pasada por etapa (entrada BGR, o RGB con rgb=True;
+    puede ser una vista recortada, la salida es un buffer nuevo contiguo):
+    - exposición con la media exacta de L* (una conversión a LAB); solo las
+      fotos fuera del rango [min_L, max_L] vuelven de LAB con L* escalado
+    - tone map de altas luces + calidez fusionados en una LUT por canal
+    - saturación con una LUT sobre el canal S (una ida y vuelta HSV)
+    - contraste como LUT final
+    """
+    if rgb:
+        to_lab, from_lab, to_hsv, from_hsv = (cv2.COLOR_RGB2LAB, cv2.COLOR_LAB2RGB,
+                                              cv2.COLOR_RGB2HSV, cv2.COLOR_HSV2RGB)
+    else:
+        to_lab, from_lab, to_hsv, from_hsv = (cv2.COLOR_BGR2LAB, cv2.COLOR_LAB2BGR,
+                                              cv2.COLOR_BGR2HSV, cv2.COLOR_HSV2BGR)
+
+    img = None
+    with stage("grade.luminance"):
+        # Media exacta: una muestra regular puede caer en una sola fase de
+        # texturas periódicas y elegir la rama equivocada
+        lab = cv2.cvtColor(img_cv, to_lab)
+        factor = luminance_factor(cv2.mean(lab)[0], target_L, min_L, max_L, max_change)
+        if factor != 1.0:
+            cv2.LUT(lab, _lut3(_scale_lut(factor), _IDENTITY, _IDENTITY), dst=lab)
+            img = cv2.cvtColor(lab, from_lab)
+        if img is None:
+            img = img_cv.copy()
+
+    # tone_map_highlights (clip_percent=100 -> el máximo) y add_warmth
+    with stage("grade.tone_warmth"):
+        high = np.float32(img.max())
+        x = np.arange(256, dtype=np.float32)
+        tone = (np.minimum(x, high) / high * 255).astype(np.uint8) if high > 0 else _IDENTITY
+        blue, red = _scale_lut(1 / warmth)[tone], _scale_lut(warmth)[tone]
+        cv2.LUT(img, _lut3(red, tone, blue) if rgb else _lut3(blue, tone, red), dst=img)
+
+    # Saturación
+    with stage("grade.saturation"):
+        hsv = cv2.cvtColor(img, to_hsv)
+        cv2.LUT(hsv, _lut3(_IDENTITY, _scale_lut(sat_factor), _IDENTITY), dst=hsv)
+        img = cv2.cvtColor(hsv, from_hsv)
+
+    # Contraste
+    with stage("grade.contrast"):
+        contrast = np.clip((x - 128) * contrast_factor + 128, 0, 255).astype(np.uint8)
+        cv2.LUT(img, _lut3(contrast, contrast, contrast), dst=img)
+    return img
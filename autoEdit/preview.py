@@ -0,0 +1,116 @@
+import math
+import signal
+import numpy as np
+import cv2
+from .presets import grade_image
+from .watermark import apply_watermark_array
+from .renders import DEFAULT_RENDERS, render_boxes, split_renders, fit_size
+from .deskew import skew_angle, deskew_transform, map_point
+from .config import CLASS_WEIGHTS, PREVIEW_THUMB, PREVIEW_COLUMNS
+
+# ================= VISTA PREVIA =================
+# --preview revisa encuadre y grading de toda la sesión antes de la corrida
+# completa: cada foto se decodifica una sola vez, al tamaño del proxy de
+# detección (modo draft de JPEG), y sobre ese proxy corren recorte, grading
+# y marca de agua. El grading son LUTs globales y el logo escala con la
+# imagen, así que el resultado es el de la foto completa en pequeño.
+# Cada celda de la hoja de contacto trae el "antes" (detecciones, caja de
+# recorte de cada perfil y centro ROI) seguido del "después" de cada perfil.
+
+_WEIGHTED_COLOR = (255, 210, 0)  # detecciones de clases que cuentan para el ROI (RGB)
+_OTHER_COLOR = (150, 150, 150)
+_CROP_COLORS = ((0, 220, 90), (0, 160, 255), (255, 80, 200), (255, 255, 255))
+_CENTER_COLOR = (255, 40, 40)
+_BACKGROUND = 24
+_CAPTION = 22  # alto de la franja con el nombre del archivo
+_GAP = 6
+
+_WATERMARK = None
+_RENDERS = DEFAULT_RENDERS
+_DESKEW = False
+
+
+def init_preview_worker(watermark, renders, deskew):
+    global _WATERMARK, _RENDERS, _DESKEW
+    # Ctrl+C lo atiende el proceso principal (guarda el índice)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _WATERMARK, _RENDERS, _DESKEW = watermark, renders, deskew
+
+
+def annotate(img, detections, scale, M, size, boxes, center, thumb=PREVIEW_THUMB):
+    """
+    Miniatura del "antes" con las detecciones (escaladas por `scale` y
+    llevadas por `M` si se enderezó), las cajas de recorte y el centro ROI.
+    """
+    small = fit_size(img, thumb)
+    small = small.copy() if small is img else small
+    k = small.shape[1] / img.shape[1]
+    if detections is not None:
+        for (x0, y0, x1, y1), cls in zip(detections.boxes, detections.classes):
+            p0 = map_point(M, (x0 * scale, y0 * scale), size)
+            p1 = map_point(M, (x1 * scale, y1 * scale), size)
+            color = _WEIGHTED_COLOR if CLASS_WEIGHTS.get(int(cls), 0) > 0 else _OTHER_COLOR
+            cv2.rectangle(small, (round(p0[0] * k), round(p0[1] * k)), (round(p1[0] * k), round(p1[1] * k)), color, 1)
+    for (x0, y0, x1, y1), color in zip(boxes, _CROP_COLORS * len(boxes)):
+        cv2.rectangle(small, (round(x0 * k), round(y0 * k)), (round(x1 * k) - 1, round(y1 * k) - 1), color, 2)
+    cv2.circle(small, (round(center[0] * k), round(center[1] * k)), 4, _CENTER_COLOR, -1, cv2.LINE_AA)
+    return small
+
+
+def render_preview(proxy, size, detections, center, watermark, renders=DEFAULT_RENDERS, angle=0.0):
+    """
+    Recorte, grading y marca de agua sobre el proxy; `size`, `center` y
+    `detections` están en coordenadas de la foto completa.
+    Devuelve (antes anotado, [después de cada perfil]).
+    """
+    img = np.asarray(proxy)
+    scale = img.shape[1] / size[0]
+    M, out_size = deskew_transform((img.shape[1], img.shape[0]), angle)
+    if M is not None:
+        img = cv2.warpAffine(img, M, out_size, flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    center = map_point(M, (center[0] * scale, center[1] * scale), out_size)
+    union, boxes = render_boxes(out_size, center, renders)
+    left, top, right, bottom = union
+    graded = grade_image(img[top:bottom, left:right], rgb=True)
+    afters = [apply_watermark_array(out, watermark, render.watermark_scale)
+              for out, render in zip(split_renders(graded, union, boxes, renders), renders)]
+    return annotate(img, detections, scale, M, out_size, boxes, center), afters
+
+
+def contact_cell(before, afters, caption, thumb=PREVIEW_THUMB):
+    """
+    Una fila de miniaturas (antes + un después por perfil) con el nombre debajo.
+    """
+    tiles = [before] + [fit_size(after, thumb) for after in afters]
+    cell = np.full((thumb + _CAPTION, thumb * len(tiles) + _GAP * (len(tiles) - 1), 3), _BACKGROUND, np.uint8)
+    for i, tile in enumerate(tiles):
+        h, w = tile.shape[:2]
+        x, y = i * (thumb + _GAP) + (thumb - w) // 2, (thumb - h) // 2
+        cell[y:y + h, x:x + w] = tile
+    max_chars = cell.shape[1] // 8
+    if len(caption) > max_chars:
+        caption = "..." + caption[-(max_chars - 3):]
+    cv2.putText(cell, caption, (4, thumb + 16), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (230, 230, 230), 1, cv2.LINE_AA)
+    return cell
+
+
+def preview_cell(input_path, caption, proxy, size, detections, center):
+    """
+    Celda de la hoja de contacto de una foto (corre en los procesos del pool).
+    """
+    angle = skew_angle(input_path) if _DESKEW else 0.0
+    before, afters = render_preview(proxy, size, detections, center, _WATERMARK, _RENDERS, angle)
+    return contact_cell(before, afters, caption)
+
+
+def contact_sheet(cells, columns=PREVIEW_COLUMNS):
+    """
+    Compone las celdas (todas del mismo tamaño) en una grilla de `columns` columnas.
+    """
+    h, w = cells[0].shape[:2]
+    rows = math.ceil(len(cells) / columns)
+    sheet = np.full((rows * (h + _GAP) + _GAP, columns * (w + _GAP) + _GAP, 3), _BACKGROUND // 2, np.uint8)
+    for i, cell in enumerate(cells):
+        y, x = _GAP + (i // columns) * (h + _GAP), _GAP + (i % columns) * (w + _GAP)
+        sheet[y:y + h, x:x + w] = cell
+    return sheet
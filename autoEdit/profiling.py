@@ -0,0 +1,140 @@
+import csv
+import json
+import time
+import resource
+import threading
+from collections import defaultdict
+from contextlib import nullcontext
+
+
+# ================= PERFILADO POR ETAPA =================
+# Temporizadores por etapa (decode, YOLO, presets, watermark, encode, subida...)
+# activados con --profile. Sin perfilado, stage() devuelve un contexto vacío
+# y el costo es una llamada. Cada proceso acumula sus muestras; los workers
+# las devuelven con drain() y el proceso principal las junta con merge().
+
+_ENABLED = False
+_SAMPLES = defaultdict(list)
+_LOCK = threading.Lock()
+_NULL = nullcontext()
+_WORKER_PEAK_KB = [0]
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def is_enabled():
+    return _ENABLED
+
+
+def set_enabled(enabled):
+    global _ENABLED
+    _ENABLED = enabled
+
+
+def stage(name):
+    """
+    Contexto que mide la etapa `name` (no hace nada si el perfilado está apagado).
+    """
+    return _Timer(name) if _ENABLED else _NULL
+
+
+def record(name, seconds):
+    with _LOCK:
+        _SAMPLES[name].append(seconds)
+
+
+def _peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def drain():
+    """
+    Devuelve y vacía las muestras de este proceso (para enviarlas desde un worker),
+    junto con su pico de memoria.
+    """
+    with _LOCK:
+        samples = dict(_SAMPLES)
+        _SAMPLES.clear()
+    return samples, _peak_rss_kb()
+
+
+def merge(drained):
+    samples, peak_kb = drained
+    with _LOCK:
+        for name, values in samples.items():
+            _SAMPLES[name].extend(values)
+        _WORKER_PEAK_KB[0] = max(_WORKER_PEAK_KB[0], peak_kb)
+
+
+def call_profiled(enabled, func, *args):
+    """
+    Ejecuta `func` en un worker con el perfilado indicado y devuelve (resultado, muestras).
+    """
+    set_enabled(enabled)
+    if enabled:
+        drain()  # descarta muestras heredadas del proceso padre (fork)
+    result = func(*args)
+    return result, drain() if enabled else None
+
+
+def start():
+    set_enabled(True)
+    with _LOCK:
+        _SAMPLES.clear()
+        _WORKER_PEAK_KB[0] = 0
+    return time.perf_counter()
+
+
+def summary(started, items):
+    """
+    Resumen por etapa: cantidad, p50/p95 (ms) y total (s), más throughput y picos de memoria.
+    """
+    import numpy as np  # solo al reportar: el perfilado no encarece el arranque
+    wall = time.perf_counter() - started
+    with _LOCK:
+        samples = {name: np.array(values) for name, values in _SAMPLES.items() if values}
+    stages = {name: {"count": int(len(v)),
+                     "p50_ms": float(np.percentile(v, 50) * 1000),
+                     "p95_ms": float(np.percentile(v, 95) * 1000),
+                     "total_s": float(v.sum())}
+              for name, v in sorted(samples.items())}
+    return {"wall_s": wall, "items": items, "items_per_s": items / wall if wall > 0 else 0.0,
+            "peak_rss_mb": {"main": _peak_rss_kb() / 1024, "workers": _WORKER_PEAK_KB[0] / 1024},
+            "stages": stages}
+
+
+def finish(started, items, report_base):
+    """
+    Imprime la tabla por etapa, escribe `<report_base>.json` y `.csv` y apaga el perfilado.
+    """
+    report = summary(started, items)
+    set_enabled(False)
+
+    print(f"\n📊 Perfil: {items} archivos en {report['wall_s']:.2f} s ({report['items_per_s']:.2f}/s), "
+          f"pico RSS {report['peak_rss_mb']['main']:.0f} MB (workers {report['peak_rss_mb']['workers']:.0f} MB)")
+    print(f"{'etapa':<22}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+    for name, s in report["stages"].items():
+        print(f"{name:<22}{s['count']:>7}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['total_s']:>10.2f}")
+
+    with open(report_base + ".json", "w") as f:
+        json.dump(report, f, indent=1)
+    with open(report_base + ".csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["stage", "count", "p50_ms", "p95_ms", "total_s"])
+        for name, s in report["stages"].items():
+            writer.writerow([name, s["count"], f"{s['p50_ms']:.3f}", f"{s['p95_ms']:.3f}", f"{s['total_s']:.4f}"])
+    print(f"📄 Reporte de perfil guardado en {report_base}.json y .csv")
+    return report
@@ -0,0 +1,87 @@
+import os
+from collections import namedtuple
+import numpy as np
+import cv2
+from .crop import choose_target_ratio, crop_box
+from .codec import EncodeOptions
+from .config import RENDER_PROFILES, LOGO_SCALE
+
+
+# ================= PERFILES DE SALIDA =================
+# Un perfil es un entregable: proporción, lado máximo, calidad JPEG y escala
+# del logo. Todos los perfiles de una corrida salen de una sola decodificación,
+# una sola detección y un solo grading: se gradúa la unión de sus recortes y
+# cada salida es una vista de ese buffer. Con un solo perfil la unión es el
+# propio recorte y el resultado es idéntico al de siempre.
+
+RenderProfile = namedtuple("RenderProfile", ["name", "ratio", "max_size", "quality", "watermark_scale"],
+                           defaults=("auto", None, None, LOGO_SCALE))
+
+DEFAULT_RENDERS = (RenderProfile("default", **RENDER_PROFILES["default"]),)
+
+
+def render_profiles(names=()):
+    """
+    Perfiles de config.RENDER_PROFILES por nombre (sin nombres: el perfil por defecto).
+    """
+    if not names:
+        return DEFAULT_RENDERS
+    unknown = [name for name in names if name not in RENDER_PROFILES]
+    if unknown:
+        raise ValueError(f"Perfil de salida desconocido: {', '.join(unknown)} "
+                         f"(disponibles: {', '.join(RENDER_PROFILES)})")
+    return tuple(RenderProfile(name, **RENDER_PROFILES[name]) for name in dict.fromkeys(names))
+
+
+def output_paths(output_folder, rel_path, renders):
+    """
+    Un perfil escribe en la carpeta de salida; varios, cada uno en su subcarpeta.
+    """
+    if len(renders) == 1:
+        return (os.path.join(output_folder, rel_path),)
+    return tuple(os.path.join(output_folder, render.name, rel_path) for render in renders)
+
+
+def encode_options(encoding, renders):
+    # La calidad del perfil reemplaza a la global; el resto de opciones se comparte
+    encoding = encoding or EncodeOptions()
+    return [encoding._replace(quality=render.quality) if render.quality else encoding for render in renders]
+
+
+def render_boxes(size, center, renders):
+    """
+    (unión, cajas): la caja de recorte de cada perfil y la unión de todas,
+    en coordenadas de la imagen completa.
+    """
+    boxes = [crop_box(size, choose_target_ratio(size, render.ratio), *center) for render in renders]
+    left, top, right, bottom = zip(*boxes)
+    return (min(left), min(top), max(right), max(bottom)), boxes
+
+
+def fit_size(img, max_size):
+    """
+    Reduce (INTER_AREA) para que el lado mayor no pase de `max_size`; sin tope devuelve `img`.
+    """
+    h, w = img.shape[:2]
+    if not max_size or max(w, h) <= max_size:
+        return img
+    scale = max_size/max(w, h)
+    return cv2.resize(img, (max(1, round(w*scale)), max(1, round(h*scale))), interpolation=cv2.INTER_AREA)
+
+
+def split_renders(graded, union, boxes, renders):
+    """
+    Salida de cada perfil a partir del buffer graduado de la unión, lista
+    para la marca de agua (que se compone en el lugar). Se copian las vistas
+    que comparten el buffer con una salida posterior.
+    """
+    left, top = union[:2]
+    last = len(renders) - 1
+    outputs = []
+    for i, ((x0, y0, x1, y1), render) in enumerate(zip(boxes, renders)):
+        view = graded[y0-top:y1-top, x0-left:x1-left]
+        img = fit_size(view, render.max_size)
+        if img is view:
+            img = view.copy() if i < last else np.ascontiguousarray(view)
+        outputs.append(img)
+    return outputs
@@ -0,0 +1,195 @@
+import os
+import hmac
+import base64
+import hashlib
+import datetime
+import mimetypes
+from itertools import count
+from urllib.parse import quote
+from xml.etree import ElementTree
+from .transport import HttpSession, HttpError
+from .hashing import file_hash
+from .config import UPLOAD_RATE, UPLOAD_MAX_RETRIES, S3_REGION, S3_PART_MB, S3_MULTIPART_THRESHOLD_MB
+
+
+# ================= CLIENTE S3 (REST, FIRMA V4) =================
+# Cliente mínimo de la API de S3 sobre el transporte compartido con Drive
+# (conexión keep-alive por hilo, token bucket y reintentos): listado
+# paginado por prefijo, PUT simple y subida multipart con partes en
+# paralelo. Funciona con AWS y con compatibles (MinIO, moto, R2...): con un
+# endpoint propio se usa direccionamiento por ruta (/bucket/clave).
+
+_EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+def _hmac(key, msg):
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+def _query(params):
+    # Query canónica de la firma V4: claves ordenadas y todo codificado
+    return "&".join(f"{quote(k, safe='-_.~')}={quote(str(v), safe='-_.~')}" for k, v in sorted(params.items()))
+
+
+def _xml_items(data, tag):
+    """
+    Elementos `tag` (sin espacio de nombres) de una respuesta XML de S3, como dicts hijo -> texto.
+    """
+    for element in ElementTree.fromstring(data).iter():
+        if element.tag.rpartition("}")[2] == tag:
+            yield {child.tag.rpartition("}")[2]: child.text for child in element}
+
+
+def _unquote_etag(etag):
+    return etag.strip('"') if etag else etag
+
+
+def s3_etag(path, part_size=S3_PART_MB << 20, threshold=S3_MULTIPART_THRESHOLD_MB << 20):
+    """
+    ETag que S3 le dará al archivo subido con estos ajustes: el md5 en una
+    subida simple, y en multipart el md5 de los md5 de las partes + "-N".
+    (Con cifrado SSE-KMS el ETag no es un md5 y el archivo se vuelve a subir.)
+    """
+    if os.path.getsize(path) < threshold:
+        return file_hash(path, "md5")
+    digests = []
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(part_size), b""):
+            digests.append(hashlib.md5(chunk).digest())
+    return f"{hashlib.md5(b''.join(digests)).hexdigest()}-{len(digests)}"
+
+
+class S3Session(HttpSession):
+    def __init__(self, bucket, endpoint=None, region=None, rate=UPLOAD_RATE, max_retries=UPLOAD_MAX_RETRIES,
+                 backoff_base=1.0):
+        self.region = region or os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION") or S3_REGION
+        self.access_key = os.environ.get("AWS_ACCESS_KEY_ID")
+        self.secret_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
+        self.token = os.environ.get("AWS_SESSION_TOKEN")
+        if not self.access_key or not self.secret_key:
+            raise RuntimeError("Faltan las credenciales de S3 (AWS_ACCESS_KEY_ID y AWS_SECRET_ACCESS_KEY)")
+        endpoint = endpoint or os.environ.get("AWS_ENDPOINT_URL")
+        if endpoint:
+            self.base = f"/{quote(bucket)}"  # por ruta: MinIO, moto y otros compatibles
+        else:
+            endpoint, self.base = f"https://{bucket}.s3.{self.region}.amazonaws.com", ""
+        super().__init__(endpoint, rate, max_retries, backoff_base)
+
+    # --- firma V4 ---
+    def _headers(self, method, url, body, headers):
+        headers = dict(headers or {})
+        now = datetime.datetime.now(datetime.timezone.utc)
+        amz_date, day = now.strftime("%Y%m%dT%H%M%SZ"), now.strftime("%Y%m%d")
+        headers.update({"Host": self.netloc, "x-amz-date": amz_date,
+                        "x-amz-content-sha256": hashlib.sha256(body).hexdigest() if body else _EMPTY_SHA256})
+        if self.token:
+            headers["x-amz-security-token"] = self.token
+        signed = sorted(k.lower() for k in headers if k.lower() == "host" or k.lower().startswith("x-amz-"))
+        values = {k.lower(): " ".join(str(v).split()) for k, v in headers.items()}
+        path, _, query = url.partition("?")
+        canonical = "\n".join([method, path, query, "".join(f"{k}:{values[k]}\n" for k in signed),
+                               ";".join(signed), values["x-amz-content-sha256"]])
+        scope = f"{day}/{self.region}/s3/aws4_request"
+        to_sign = "\n".join(["AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical.encode()).hexdigest()])
+        key = _hmac(_hmac(_hmac(_hmac(f"AWS4{self.secret_key}".encode(), day), self.region), "s3"), "aws4_request")
+        signature = hmac.new(key, to_sign.encode(), hashlib.sha256).hexdigest()
+        headers["Authorization"] = (f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+                                    f"SignedHeaders={';'.join(signed)}, Signature={signature}")
+        return headers
+
+    def _url(self, key="", **params):
+        url = f"{self.base}/{quote(key, safe='/~')}"
+        return f"{url}?{_query(params)}" if params else url
+
+    # --- operaciones ---
+    def list_prefix(self, prefix, delimiter="/"):
+        """
+        Genera lo que hay directamente bajo `prefix`: objetos (id = clave,
+        name, etag, size) y "subcarpetas" (id = prefijo, name, folder=True).
+        """
+        token = None
+        while True:
+            params = {"list-type": 2, "prefix": prefix, "delimiter": delimiter}
+            if token:
+                params["continuation-token"] = token
+            _, _, data = self.request("GET", self._url(**params))
+            for item in _xml_items(data, "Contents"):
+                yield {"id": item["Key"], "name": item["Key"][len(prefix):], "etag": _unquote_etag(item.get("ETag")),
+                       "size": item.get("Size")}
+            for item in _xml_items(data, "CommonPrefixes"):
+                yield {"id": item["Prefix"], "name": item["Prefix"][len(prefix):].rstrip(delimiter), "folder": True}
+            token = next((item.get("NextContinuationToken") for item in _xml_items(data, "ListBucketResult")), None)
+            if not token:
+                return
+
+    def put_object(self, key, content, mime):
+        """
+        Sube `content` de una vez (S3 comprueba el Content-MD5). Devuelve el ETag.
+        """
+        digest = hashlib.md5(content).digest()
+        _, headers, _ = self.request("PUT", self._url(key), content,
+                                     {"Content-Type": mime, "Content-MD5": base64.b64encode(digest).decode()})
+        return _unquote_etag(headers.get("ETag"))
+
+    def create_multipart(self, key, mime):
+        _, _, data = self.request("POST", self._url(key, uploads=""), b"", {"Content-Type": mime})
+        return next(_xml_items(data, "InitiateMultipartUploadResult"))["UploadId"]
+
+    def upload_part(self, key, upload_id, number, content):
+        digest = hashlib.md5(content).digest()
+        _, headers, _ = self.request("PUT", self._url(key, partNumber=number, uploadId=upload_id), content,
+                                     {"Content-MD5": base64.b64encode(digest).decode()})
+        return _unquote_etag(headers.get("ETag"))
+
+    def complete_multipart(self, key, upload_id, etags):
+        parts = "".join(f"<Part><PartNumber>{n}</PartNumber><ETag>\"{etag}\"</ETag></Part>"
+                        for n, etag in enumerate(etags, 1))
+        body = f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode()
+        _, _, data = self.request("POST", self._url(key, uploadId=upload_id), body, {"Content-Type": "application/xml"})
+        if b"<Error>" in data:  # S3 puede fallar con 200 una vez empezada la respuesta
+            raise HttpError(200, data)
+        return _unquote_etag(next(_xml_items(data, "CompleteMultipartUploadResult"))["ETag"])
+
+    def abort_multipart(self, key, upload_id):
+        self.request("DELETE", self._url(key, uploadId=upload_id), ok=(200, 204))
+
+    def put_multipart(self, path, key, pool, buffers, part_size=S3_PART_MB << 20):
+        """
+        Sube `path` en partes de `part_size` a través de `pool`. Cada parte
+        toma un lugar de `buffers` (semáforo compartido) antes de leerse y lo
+        devuelve al subir, así la memoria queda acotada aunque haya muchos
+        archivos grandes a la vez. Devuelve (ETag, md5 del archivo completo).
+        """
+        mime = mimetypes.guess_type(key)[0] or "application/octet-stream"
+        upload_id = self.create_multipart(key, mime)
+        whole = hashlib.md5()
+        futures = []
+
+        def upload(number, content):
+            try:
+                return self.upload_part(key, upload_id, number, content)
+            finally:
+                buffers.release()
+
+        try:
+            with open(path, "rb") as f:
+                for number in count(1):
+                    buffers.acquire()
+                    chunk = f.read(part_size)
+                    if not chunk:
+                        buffers.release()
+                        break
+                    whole.update(chunk)
+                    futures.append(pool.submit(upload, number, chunk))
+                    del chunk
+            etags = [future.result() for future in futures]
+            return self.complete_multipart(key, upload_id, etags), whole.hexdigest()
+        except BaseException:
+            for future in futures:
+                if future.cancel():
+                    buffers.release()  # la parte no llegó a subirse
+            try:
+                self.abort_multipart(key, upload_id)
+            except Exception:
+                pass  # las partes huérfanas las limpia la regla de ciclo de vida del bucket
+            raise
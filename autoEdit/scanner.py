@@ -0,0 +1,68 @@
+import os
+from fnmatch import fnmatch
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+# ================= ESCÁNER DE CARPETAS =================
+# Recorrido perezoso con os.scandir: genera rutas relativas (separadas por '/')
+# a medida que las encuentra, sin armar la lista completa. Los archivos y
+# carpetas ocultos (.autoedit_cache, índices, manifiestos) se omiten siempre.
+# Los globs se comparan contra la ruta relativa y contra el nombre.
+
+def _matches(rel_path, name, patterns):
+    return any(fnmatch(rel_path, p) or fnmatch(name, p) for p in patterns)
+
+
+def scan_images(root, recursive=False, include=(), exclude=(), prune=(), extensions=IMAGE_EXTENSIONS):
+    """
+    Genera las rutas relativas de las imágenes bajo `root`.
+    `include`/`exclude` son globs (un exclude sobre una carpeta poda todo su
+    subárbol); `prune` son carpetas que nunca se recorren (p. ej. la salida).
+    """
+    prune = {os.path.realpath(p) for p in prune}
+    pending = [""]
+    while pending:
+        rel_dir = pending.pop()
+        subdirs = []
+        with os.scandir(os.path.join(root, rel_dir)) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir():
+                    if (recursive and not _matches(rel_path, entry.name, exclude)
+                            and os.path.realpath(entry.path) not in prune):
+                        subdirs.append(rel_path)
+                    continue
+                if not entry.name.lower().endswith(extensions):
+                    continue
+                if include and not _matches(rel_path, entry.name, include):
+                    continue
+                if _matches(rel_path, entry.name, exclude):
+                    continue
+                yield rel_path
+        pending.extend(reversed(subdirs))
+
+
+def relative_name(path, root):
+    """
+    Ruta de `path` relativa a `root`, con '/' como separador (clave de índices y manifiestos).
+    """
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def batched(iterable, size):
+    """
+    Agrupa un iterable en listas de `size` elementos, sin materializarlo.
+    Un None en el iterable (fuente en espera, ver watch.py) cierra el lote en curso.
+    """
+    batch = []
+    for item in iterable:
+        if item is not None:
+            batch.append(item)
+        if batch and (item is None or len(batch) == size):
+            yield batch
+            batch = []
+    if batch:
+        yield batch
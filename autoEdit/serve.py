@@ -0,0 +1,182 @@
+import os
+import json
+import socket
+import tempfile
+import threading
+import socketserver
+import multiprocessing
+from multiprocessing import forkserver
+from contextlib import redirect_stdout
+from .config import SERVE_SOCKET
+
+
+# ================= DAEMON DE PROCESAMIENTO =================
+# `autoedit serve` deja el modelo YOLO cargado (y precalentado) y el códec
+# JPEG elegido en un proceso que escucha en un socket Unix. `process`
+# (también con --preview) y `detect` con --server le envían el trabajo en
+# vez de pagar el import de torch y la carga de pesos en cada invocación.
+# Protocolo: una línea JSON {"command", "kwargs"} por conexión; el daemon
+# responde con líneas {"out": texto} (la salida del pipeline) y termina con
+# {"status": 0|1, "error": ...}. Cada conexión tiene su hilo, pero los
+# trabajos corren de a uno con el modelo compartido: los que llegan mientras
+# hay otro en curso avisan que están en cola y esperan su turno. `ping`
+# responde siempre al instante. --watch no se acepta: ocuparía el daemon
+# hasta Ctrl+C y dejaría a todos los demás clientes esperando.
+# Los pools de procesos de los trabajos (--workers) salen de un forkserver
+# arrancado antes que el modelo y los hilos: hacer fork de un proceso con
+# hilos y estado de torch/OpenMP puede dejar a los hijos bloqueados.
+
+COMMANDS = ("process", "preview", "detect", "ping")
+
+
+def default_socket():
+    return os.path.join(tempfile.gettempdir(), SERVE_SOCKET)
+
+
+class _LineWriter:
+    """
+    stdout del pipeline reenviado al cliente, una línea JSON por print.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.pending = ""
+
+    def write(self, text):
+        self.pending += text
+        *lines, self.pending = self.pending.split("\n")
+        for line in lines:
+            self.send({"out": line})
+        return len(text)
+
+    def flush(self):
+        if self.pending:
+            self.send({"out": self.pending})
+            self.pending = ""
+
+    def send(self, message):
+        self.stream.write((json.dumps(message, ensure_ascii=False) + "\n").encode())
+        self.stream.flush()
+
+
+def _run_command(command, kwargs, model):
+    from .pipeline import run_processing_pipeline, run_preview_pipeline, run_detection_pipeline
+    from .codec import EncodeOptions
+    from .detector import as_settings
+    if as_settings(kwargs.get("detector")) != model.settings:
+        model = None  # otro backend o ajustes: el trabajo carga su propio detector
+    if command == "process":
+        if kwargs.get("encoding") is not None:
+            kwargs["encoding"] = EncodeOptions(*kwargs["encoding"])
+        run_processing_pipeline(model=model, **kwargs)
+    elif command == "preview":
+        run_preview_pipeline(model=model, **kwargs)
+    elif command == "detect":
+        run_detection_pipeline(model=model, **kwargs)
+
+
+def _make_handler(model):
+    # Un trabajo a la vez: comparten el modelo y redirect_stdout es global al proceso
+    busy = threading.Lock()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            line = self.rfile.readline()
+            if not line.strip():
+                return  # conexión de prueba (p. ej. _claim_socket de otro daemon)
+            writer = _LineWriter(self.wfile)
+            try:
+                request = json.loads(line)
+                command = request.get("command")
+                if command not in COMMANDS:
+                    raise ValueError(f"Comando desconocido: {command!r}")
+                if request.get("kwargs", {}).get("watch"):
+                    raise ValueError("--watch no se puede enviar al daemon: ejecútalo sin --server")
+                if command == "ping":
+                    writer.send({"out": "🏓 pong"})
+                    writer.send({"status": 0})
+                    return
+                if not busy.acquire(blocking=False):
+                    writer.send({"out": "⏳ El daemon está ocupado con otro trabajo; este queda en cola..."})
+                    busy.acquire()
+                try:
+                    with redirect_stdout(writer):
+                        _run_command(command, request.get("kwargs", {}), model)
+                finally:
+                    busy.release()
+                writer.flush()
+                writer.send({"status": 0})
+            except BrokenPipeError:
+                print("⚠️ El cliente se desconectó; trabajo cancelado.")
+            except Exception as e:
+                writer.flush()
+                writer.send({"status": 1, "error": f"{type(e).__name__}: {e}"})
+    return Handler
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True  # Ctrl+C no espera a los clientes en cola
+
+
+def _claim_socket(path):
+    """
+    Borra un socket abandonado; falla si ya hay un daemon escuchando ahí.
+    """
+    if not os.path.exists(path):
+        return
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(path)
+        return
+    raise RuntimeError(f"Ya hay un daemon escuchando en '{path}'")
+
+
+def serve(socket_path=None, detector=None):
+    from .pipeline import LazyModel
+    from .codec import EncodeOptions, select_codecs
+    from .detector import detector_fingerprint
+
+    socket_path = socket_path or default_socket()
+    _claim_socket(socket_path)
+
+    multiprocessing.set_start_method("forkserver", force=True)
+    multiprocessing.set_forkserver_preload(["autoEdit.parallel", "autoEdit.preview"])
+    forkserver.ensure_running()  # todavía sin torch ni hilos
+
+    model = LazyModel(detector)
+    print(f"🔥 Cargando y precalentando {detector_fingerprint(model.settings)}...")
+    model.warm()
+    select_codecs("auto", EncodeOptions())  # el benchmark de códecs queda memorizado para los trabajos
+
+    with _Server(socket_path, _make_handler(model)) as server:
+        print(f"🟢 Daemon escuchando en '{socket_path}' (Ctrl+C para detener).")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Daemon detenido.")
+        finally:
+            os.remove(socket_path)
+
+
+def submit(command, kwargs, socket_path=None):
+    """
+    Envía un trabajo al daemon e imprime su salida a medida que llega.
+    Devuelve el estado (0 = ok). Lanza OSError si no hay daemon escuchando.
+    """
+    socket_path = socket_path or default_socket()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        with client.makefile("rwb") as stream:
+            stream.write((json.dumps({"command": command, "kwargs": kwargs}) + "\n").encode())
+            stream.flush()
+            for line in stream:
+                message = json.loads(line)
+                if "out" in message:
+                    print(message["out"])
+                    continue
+                if message["status"] != 0:
+                    print(f"❌ El daemon reportó un error: {message.get('error')}")
+                return message["status"]
+    print("❌ El daemon cerró la conexión sin terminar el trabajo.")
+    return 1
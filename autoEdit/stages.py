@@ -0,0 +1,137 @@
+from collections import namedtuple
+from PIL import Image, ImageOps
+from .presets import grade_image
+from .watermark import apply_watermark_array
+from .crop import image_size
+from .renders import DEFAULT_RENDERS, render_boxes, split_renders
+from .deskew import skew_angle, deskew_transform, deskew_array, map_point
+from .config import DETECTION_SIZE
+from .cache import load_graded, store_graded
+from .codec import oriented_size, read_rgb, write_image
+from .yolo_name import detect_yolo, roi_center_from_detections
+from .profiling import stage
+
+# Trabajo por archivo. `output_paths` tiene una ruta por perfil de salida;
+# `center` es None si hay que detectar; `graded_path` es la ruta del
+# intermedio en caché (None sin caché) y `graded_cached` indica si ya existe
+# y es válido. `detections` = (Detections, size) si se acaba de detectar.
+Job = namedtuple("Job", ["input_path", "output_paths", "center", "graded_path", "graded_cached", "detections"],
+                 defaults=(None, None, False, None))
+
+
+# ================= ETAPAS DE PROCESAMIENTO =================
+# Cada etapa es una función de nivel de módulo para que pueda ejecutarse
+# tanto en el bucle secuencial como dentro de un pool de procesos.
+# Representación en memoria: un único array RGB uint8 (HxWx3) desde la
+# decodificación hasta el guardado; el recorte es una vista y la marca de
+# agua se compone en el lugar.
+
+def load_array(input_path):
+    """
+    Decodifica la imagen a un array RGB uint8 ya orientado (sin pasar por RGBA),
+    con el códec JPEG activo.
+    """
+    return read_rgb(input_path)
+
+
+def read_size(input_path):
+    """
+    Tamaño (W, H) de la imagen ya orientada, leyendo solo la cabecera.
+    """
+    with Image.open(input_path) as image:
+        return oriented_size(image)
+
+
+def load_detection_proxy(input_path, max_size=DETECTION_SIZE):
+    """
+    Decodifica una versión reducida de la imagen para la detección
+    (modo draft de JPEG + thumbnail con reducing_gap).
+    Devuelve (proxy, full_size) con el tamaño de la imagen completa ya orientada.
+    """
+    with stage("decode_proxy"), Image.open(input_path) as image:
+        W, H = oriented_size(image)
+        image.draft("RGB", (max_size, max_size))
+        proxy = ImageOps.exif_transpose(image).convert("RGB")
+        proxy.thumbnail((max_size, max_size), reducing_gap=2.0)
+    return proxy, (W, H)
+
+
+def fill_centers(jobs, proxies, model, batch_size, bursts=None):
+    """
+    Completa el centro ROI de los trabajos que no lo traen de caché con una
+    inferencia por lotes; `proxies` va alineado con esos trabajos.
+    Con `bursts` (burst.BurstTracker) solo se detectan los cuadros clave y el
+    resto de cada ráfaga toma el centro de su cuadro clave.
+    """
+    if bursts is None:
+        assigned = [([None], True) for _ in proxies]
+    else:
+        pending = [job for job in jobs if job.center is None]
+        assigned = [bursts.assign(job.input_path, proxy, size) for job, (proxy, size) in zip(pending, proxies)]
+    keyframes = [(proxy, size, slot) for (proxy, size), (slot, is_key) in zip(proxies, assigned) if is_key]
+
+    sizes = [size for _, size, _ in keyframes]
+    detections = detect_yolo([proxy for proxy, _, _ in keyframes], model, batch_size, sizes) if keyframes else []
+    for (_, size, slot), dets in zip(keyframes, detections):
+        with stage("roi"):
+            center = tuple(map(float, roi_center_from_detections(dets, size)))
+        slot[0] = (center, (dets, size))
+
+    filled = []
+    assigned = iter(assigned)
+    for job in jobs:
+        if job.center is None:
+            slot, is_key = next(assigned)
+            center, dets = slot[0]
+            # Solo el cuadro clave lleva sus detecciones al índice
+            job = job._replace(center=center, detections=dets if is_key else None)
+        filled.append(job)
+    return filled
+
+
+def render_job(job, watermark, renders=DEFAULT_RENDERS, deskew=False):
+    """
+    Etapa posterior a la detección: reutiliza el intermedio graduado en caché
+    si existe; si no, decodifica la imagen completa, la endereza (`deskew`),
+    recorta la unión de los perfiles y la gradúa una vez.
+    Devuelve una imagen por perfil.
+    """
+    if job.graded_cached:
+        with stage("cache_load"):
+            graded = load_graded(job.graded_path)
+        if len(renders) == 1:
+            H, W = graded.shape[:2]
+            union = box = (0, 0, W, H)  # un solo perfil: el intermedio es su recorte
+            boxes = [box]
+        else:
+            size, center = read_size(job.input_path), job.center
+            if deskew:
+                M, size = deskew_transform(size, skew_angle(job.input_path))
+                center = map_point(M, center, size)
+            union, boxes = render_boxes(size, center, renders)
+    else:
+        img, center = load_array(job.input_path), job.center
+        if deskew:
+            img, center = deskew_array(img, skew_angle(job.input_path), center)
+        union, boxes = render_boxes(image_size(img), center, renders)
+        with stage("crop"):
+            left, top, right, bottom = union
+            view = img[top:bottom, left:right]
+        graded = grade_image(view, rgb=True)
+        if job.graded_path:
+            with stage("cache_store"):
+                store_graded(graded, job.graded_path)
+    with stage("crop"):
+        images = split_renders(graded, union, boxes, renders)
+    with stage("watermark"):
+        return [apply_watermark_array(img, watermark, render.watermark_scale)
+                for img, render in zip(images, renders)]
+
+
+def save_outputs(images, output_paths, options, source_path=None):
+    """
+    Guarda la salida de cada perfil con sus opciones de codificación.
+    """
+    for image, output_path, image_options in zip(images, output_paths, options):
+        write_image(image, output_path, image_options, source_path)
+
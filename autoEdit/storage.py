@@ -0,0 +1,123 @@
+import os
+import hashlib
+import threading
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from .drive import DriveSession, DriveError, FOLDER_MIME
+from .s3 import S3Session, s3_etag
+from .hashing import file_hash
+from .config import UPLOAD_RATE, S3_PART_WORKERS, S3_MAX_BUFFERS, S3_MULTIPART_THRESHOLD_MB
+
+
+# ================= BACKENDS DE ALMACENAMIENTO =================
+# upload y publish suben a través de un backend elegido por el esquema del destino:
+#   ID o drive://ID      -> DriveStorage (carpeta de Google Drive)
+#   s3://bucket/prefijo  -> S3Storage (S3 o compatibles: MinIO, moto, R2...)
+# Todos exponen lo que usa el Uploader:
+#   destination                 destino normalizado (clave del manifiesto)
+#   root                        carpeta raíz (ID de Drive o prefijo de S3)
+#   list(folder)                {nombre: recurso} de lo que hay en la carpeta
+#   is_folder(recurso)          el recurso es una subcarpeta
+#   subfolder(name, parent)     carpeta hija (en Drive se crea)
+#   same(recurso, path)         el remoto ya es idéntico al archivo local
+#   put(path, name, folder, id) sube o reemplaza; devuelve el recurso ({"id", ...})
+# Los archivos grandes van por la subida en partes de cada backend
+# (resumible en Drive, put_multipart en S3).
+
+def open_storage(destination, endpoint=None, rate=UPLOAD_RATE):
+    scheme = urlsplit(destination).scheme
+    if scheme == "s3":
+        return S3Storage(destination, endpoint, rate)
+    if scheme in ("", "drive"):
+        return DriveStorage(destination, endpoint, rate)
+    raise ValueError(f"Destino no soportado: {destination!r} (usa un ID de Drive, drive://ID o s3://bucket/prefijo)")
+
+
+def drive_session(endpoint, rate):
+    if endpoint:
+        # Drive falso u otro endpoint compatible: sin OAuth
+        return DriveSession(endpoint, rate=rate)
+    # Google Drive auth (pydrive solo se importa si hace falta OAuth)
+    from pydrive.auth import GoogleAuth
+    gauth = GoogleAuth()
+    gauth.LocalWebserverAuth() # Authenticates via a local webserver flow
+    gauth.Refresh() # Refreshes credentials if expired
+    return DriveSession(gauth=gauth, rate=rate)
+
+
+class DriveStorage:
+    name = "Drive"
+
+    def __init__(self, destination, endpoint=None, rate=UPLOAD_RATE):
+        # "drive://ID" y el ID a secas son el mismo destino (y el mismo manifiesto)
+        self.destination = self.root = destination.split("://", 1)[-1]
+        self.session = drive_session(endpoint, rate)
+
+    def list(self, folder):
+        return {f["name"]: f for f in self.session.list_folder(folder)}
+
+    def is_folder(self, remote):
+        return remote.get("mimeType") == FOLDER_MIME
+
+    def subfolder(self, name, parent):
+        return self.session.create_folder(name, parent)["id"]
+
+    def same(self, remote, path):
+        return remote.get("md5Checksum") == file_hash(path, "md5")
+
+    def put(self, path, name, folder, remote_id=None):
+        try:
+            return self.session.upload_file(path, name, folder, remote_id)
+        except DriveError as e:
+            if remote_id is None or e.status != 404:
+                raise
+            return self.session.upload_file(path, name, folder)  # borrado en Drive
+
+    def close(self):
+        pass
+
+
+class S3Storage:
+    """
+    Las "carpetas" son prefijos: no se crean, y el ID de cada archivo es su
+    clave. La omisión compara el ETag del listado con el que tendría el
+    archivo local (s3_etag), así que S3_PART_MB no debe cambiar entre corridas.
+    """
+    name = "S3"
+
+    def __init__(self, destination, endpoint=None, rate=UPLOAD_RATE):
+        url = urlsplit(destination)
+        prefix = url.path.strip("/")
+        self.destination = f"s3://{url.netloc}/{prefix}"
+        self.root = prefix + "/" if prefix else ""
+        self.session = S3Session(url.netloc, endpoint, rate=rate)
+        # Partes de todas las subidas multipart: hilos propios y memoria acotada
+        self.parts = ThreadPoolExecutor(S3_PART_WORKERS)
+        self.buffers = threading.BoundedSemaphore(S3_MAX_BUFFERS)
+
+    def list(self, folder):
+        return {f["name"]: f for f in self.session.list_prefix(folder)}
+
+    def is_folder(self, remote):
+        return remote.get("folder", False)
+
+    def subfolder(self, name, parent):
+        return f"{parent}{name}/"
+
+    def same(self, remote, path):
+        return remote.get("etag") == s3_etag(path)
+
+    def put(self, path, name, folder, remote_id=None):
+        key = folder + name
+        if os.path.getsize(path) >= S3_MULTIPART_THRESHOLD_MB << 20:
+            etag, md5 = self.session.put_multipart(path, key, self.parts, self.buffers)
+        else:
+            with open(path, "rb") as f:
+                content = f.read()
+            etag = self.session.put_object(key, content, mimetypes.guess_type(name)[0] or "application/octet-stream")
+            md5 = hashlib.md5(content).hexdigest()
+        return {"id": key, "name": name, "etag": etag, "md5Checksum": md5}
+
+    def close(self):
+        self.parts.shutdown()
@@ -0,0 +1,123 @@
+import time
+import random
+import threading
+import http.client
+from urllib.parse import urlsplit
+from .config import UPLOAD_RATE, UPLOAD_MAX_RETRIES
+
+
+# ================= TRANSPORTE HTTP =================
+# Base común de los clientes de almacenamiento (Drive, S3): una conexión
+# keep-alive por hilo, un token bucket compartido por todos los hilos y
+# reintentos con backoff exponencial de los errores transitorios. Cada
+# cliente agrega su autenticación en `_headers` y sus operaciones.
+
+class HttpError(Exception):
+    def __init__(self, status, body):
+        super().__init__(f"HTTP {status}: {body[:200]!r}")
+        self.status = status
+        self.body = body
+
+
+class TokenBucket:
+    """
+    Limita las peticiones a `rate` por segundo con ráfagas de hasta `capacity`.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _path(url):
+    parts = urlsplit(url)
+    return parts.path + ("?" + parts.query if parts.query else "")
+
+
+class HttpSession:
+    retry_statuses = {429, 500, 502, 503, 504}
+
+    def __init__(self, endpoint, rate=UPLOAD_RATE, max_retries=UPLOAD_MAX_RETRIES, backoff_base=1.0):
+        url = urlsplit(endpoint)
+        self.scheme, self.netloc = url.scheme, url.netloc
+        self.bucket = TokenBucket(rate) if rate else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.netloc, timeout=120)
+        return conn
+
+    def _headers(self, method, url, body, headers):
+        # Sin autenticación; los clientes la agregan aquí
+        return dict(headers or {})
+
+    def _expired(self, status):
+        """
+        True si `status` indica credenciales vencidas que se pudieron renovar.
+        """
+        return False
+
+    def _retryable(self, status, body):
+        """
+        True si la respuesta es un error transitorio que vale la pena reintentar.
+        """
+        return status in self.retry_statuses
+
+    def _backoff(self, attempt):
+        time.sleep(min(self.backoff_base * 2 ** attempt, 32) + random.uniform(0, self.backoff_base))
+
+    def _send(self, method, url, body, headers):
+        if self.bucket is not None:
+            self.bucket.acquire()
+        conn = self._connection()
+        try:
+            conn.request(method, url, body=body, headers=self._headers(method, url, body, headers))
+            resp = conn.getresponse()
+            return resp.status, resp.headers, resp.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            raise
+
+    def request(self, method, url, body=None, headers=None, ok=(200,), max_retries=None):
+        """
+        Envía la petición reintentando errores transitorios.
+        Devuelve (status, headers, body) o lanza HttpError.
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in range(max_retries + 1):
+            last = attempt == max_retries
+            try:
+                status, resp_headers, data = self._send(method, url, body, headers)
+            except (OSError, http.client.HTTPException):
+                if last:
+                    raise
+                self._backoff(attempt)
+                continue
+            if status in ok:
+                return status, resp_headers, data
+            if not last and self._expired(status):
+                continue
+            if not last and self._retryable(status, data):
+                self._backoff(attempt)
+                continue
+            raise HttpError(status, data)
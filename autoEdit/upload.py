@@ -0,0 +1,177 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .storage import open_storage
+from .manifest import UploadManifest
+from .scanner import scan_images
+from . import profiling
+from .profiling import stage
+from .config import UPLOAD_WORKERS, UPLOAD_RATE
+
+
+# ==================== UPLOAD PIPELINE ====================
+def _upload_one(storage, local_file_path, rel_path, folder_id, file_id=None):
+    """
+    Sube un archivo (o reemplaza su contenido por ID). Devuelve (recurso remoto o None, línea de log).
+    """
+    name = rel_path.rpartition("/")[2]
+    print(f"⬆ {'Actualizando' if file_id else 'Subiendo'} '{rel_path}'...")
+    try:
+        with stage("upload"):
+            remote = storage.put(local_file_path, name, folder_id, file_id)
+        print(f"✅ Subido: {rel_path}")
+        return remote, f"{'Actualizado en' if file_id else 'Subido a'} {storage.name}: {rel_path}"
+    except Exception as e:
+        print(f"⚠️ Error subiendo '{rel_path}': {e}")
+        return None, f"ERROR subiendo '{rel_path}': {e}"
+
+
+def _list_remote_folder(storage, folder_id):
+    print(f"🔎 Obteniendo lista de archivos existentes en la carpeta de {storage.name}...")
+    try:
+        with stage("remote_list"):
+            existing_files = storage.list(folder_id)
+        print(f"✅ Encontrados {len(existing_files)} archivos en la carpeta de {storage.name}.")
+        return existing_files
+    except Exception as e:
+        print(f"⚠️ Error al obtener la lista de archivos de {storage.name}: {e}. Asegúrate de que el destino es correcto y tienes permisos.")
+        return None
+
+
+def _resolve_upload(storage, manifest, rel_path, local_file_path, remote_files, reconcile=False):
+    """
+    Decide qué hacer con un archivo local según el manifiesto y, si no lo conoce,
+    el listado de su carpeta remota (`remote_files()`, que se pide solo entonces).
+    Devuelve (subir, file_id a reemplazar, línea de log si se omite).
+    """
+    entry = manifest.get(rel_path)
+    if entry is not None and not reconcile:
+        if manifest.unchanged(rel_path, local_file_path):
+            print(f"⏩ Omitiendo '{rel_path}', sin cambios desde la última subida.")
+            return False, None, f"Omitido (sin cambios): {rel_path}"
+        return True, entry["id"], None
+
+    existing_files = remote_files()
+    if existing_files is None:
+        raise RuntimeError(f"no se pudo listar la carpeta de {storage.name}")
+    remote = existing_files.get(rel_path.rpartition("/")[2])
+    if remote is None or storage.is_folder(remote):
+        return True, None, None
+    if storage.same(remote, local_file_path):
+        print(f"⏩ Omitiendo '{rel_path}', ya existe en {storage.name}.")
+        manifest.put(rel_path, local_file_path, remote)
+        return False, None, f"Omitido (ya existe): {rel_path}"
+    return True, remote['id'], None  # re-procesado: se reemplaza por ID
+
+
+class Uploader:
+    """
+    Cola de subidas en streaming, compartida por upload y publish y común a
+    todos los backends (storage.py). Resuelve cada archivo con el manifiesto,
+    lista en el destino solo las carpetas donde hay archivos desconocidos,
+    crea las subcarpetas que faltan y mantiene acotado el número de subidas
+    en vuelo. El manifiesto solo se toca en este hilo.
+    """
+    def __init__(self, storage, manifest, pool, max_pending, reconcile=False):
+        self.storage = storage
+        self.manifest = manifest
+        self.pool = pool
+        self.max_pending = max_pending
+        self.reconcile = reconcile
+        self.listings = {}  # folder_id -> {nombre: recurso} (None si falló el listado)
+        self.uploads = deque()
+        self.log_lines = []
+        self.offered = 0
+
+    def _listing(self, folder_id):
+        if folder_id not in self.listings:
+            self.listings[folder_id] = _list_remote_folder(self.storage, folder_id)
+        return self.listings[folder_id]
+
+    def _folder_id(self, rel_dir):
+        if not rel_dir:
+            return self.storage.root
+        folder_id = self.manifest.folder(rel_dir)
+        if folder_id is not None:
+            return folder_id
+        parent, _, name = rel_dir.rpartition("/")
+        parent_id = self._folder_id(parent)
+        listing = self._listing(parent_id)
+        if listing is None:
+            raise RuntimeError(f"no se pudo listar la carpeta de {self.storage.name} de '{parent or '.'}'")
+        remote = listing.get(name)
+        if remote is not None and self.storage.is_folder(remote):
+            folder_id = remote["id"]
+        else:
+            with stage("remote_folder"):
+                folder_id = self.storage.subfolder(name, parent_id)
+            self.listings[folder_id] = {}
+            print(f"📁 Carpeta nueva en {self.storage.name}: {rel_dir}")
+        self.manifest.put_folder(rel_dir, folder_id)
+        return folder_id
+
+    def offer(self, rel_path, local_file_path):
+        self.offered += 1
+        try:
+            folder_id = self._folder_id(rel_path.rpartition("/")[0])
+            upload, file_id, log_line = _resolve_upload(self.storage, self.manifest, rel_path, local_file_path,
+                                                        lambda: self._listing(folder_id), self.reconcile)
+        except Exception as e:
+            print(f"⚠️ Error preparando la subida de '{rel_path}': {e}")
+            self.log_lines.append(f"ERROR subiendo '{rel_path}': {e}")
+            return
+        if not upload:
+            self.log_lines.append(log_line)
+            return
+        future = self.pool.submit(_upload_one, self.storage, local_file_path, rel_path, folder_id, file_id)
+        self.uploads.append((rel_path, local_file_path, future))
+        self.collect()
+
+    def collect(self, wait=False):
+        # Registrar en orden las subidas terminadas; con la cola llena se espera a la primera
+        while self.uploads and (wait or len(self.uploads) >= self.max_pending or self.uploads[0][2].done()):
+            rel_path, local_file_path, future = self.uploads.popleft()
+            remote, log_line = future.result()
+            self.log_lines.append(log_line)
+            if remote is not None:
+                self.manifest.put(rel_path, local_file_path, remote)
+
+
+def run_upload_pipeline(source_folder, destination, log=False, workers=UPLOAD_WORKERS, rate=UPLOAD_RATE,
+                        endpoint=None, reconcile=False, recursive=False, include=(), exclude=(), profile=False):
+    storage = open_storage(destination, endpoint, rate)
+    started = profiling.start() if profile else None
+
+    print(f"🔄 Iniciando subida de imágenes desde '{source_folder}' a {storage.name} ({storage.destination})...")
+
+    # Manifiesto local; el listado paginado del destino solo corre para conciliar archivos desconocidos
+    manifest = UploadManifest.for_folder(source_folder, storage.destination)
+    found = False
+
+    # Subidas concurrentes; el token bucket y el backoff reemplazan la pausa fija
+    with ThreadPoolExecutor(max(1, workers)) as pool:
+        uploader = Uploader(storage, manifest, pool, max(1, workers) * 4, reconcile)
+        try:
+            for rel_path in scan_images(source_folder, recursive, include, exclude):
+                found = True
+                uploader.offer(rel_path, os.path.join(source_folder, rel_path))
+            uploader.collect(wait=True)
+        finally:
+            manifest.save()
+            storage.close()
+
+    if not found:
+        print(f"ℹ️ No se encontraron imágenes JPG/JPEG/PNG en '{source_folder}' para subir.")
+        return
+
+    # Guardar log de subida
+    if log:
+        log_file_path = os.path.join(source_folder, "upload_log.txt")
+        with open(log_file_path, "w") as f:
+            f.write("\n".join(uploader.log_lines))
+        print(f"📄 Log de subida guardado en {log_file_path}")
+
+    if profile:
+        profiling.finish(started, uploader.offered, os.path.join(source_folder, "profile_upload"))
+    
+    print(f"🎉 Proceso de subida a {storage.name} finalizado.")
@@ -0,0 +1,73 @@
+import os
+import time
+from .scanner import scan_images, IMAGE_EXTENSIONS
+from .codec import JPEG_EXTENSIONS
+from .config import WATCH_INTERVAL, WATCH_SETTLE
+
+
+# ================= CARPETA VIGILADA =================
+# Modo --watch: la carpeta de entrada se vuelve a escanear cada `interval`
+# segundos y cada imagen nueva se entrega una sola vez, cuando ya terminó de
+# escribirse (tamaño y mtime estables durante `settle` segundos y, en JPEG,
+# marcador de fin de imagen presente). Entre rondas el generador entrega
+# None: "no hay nada más por ahora", para que el pipeline vacíe lo que tiene
+# en vuelo sin esperar a completar un lote.
+# Se usa sondeo y no inotify: funciona igual en Linux, macOS, Windows y
+# carpetas de red, sin dependencias; el escaneo con scandir solo hace stat
+# de los archivos todavía no entregados.
+
+_EOI = b"\xff\xd9"
+_TAIL_BYTES = 4096  # algunas cámaras agregan relleno después del fin de imagen
+
+
+def _jpeg_complete(path, size):
+    with open(path, "rb") as f:
+        f.seek(max(0, size - _TAIL_BYTES))
+        return _EOI in f.read()
+
+
+def _ready(path, size, stable_for, settle):
+    if stable_for < settle:
+        return False
+    if not path.lower().endswith(JPEG_EXTENSIONS):
+        return True
+    # Sin fin de imagen se espera más; pasado 4x settle se entrega igual
+    # (JPEG truncado de origen, no una copia en curso)
+    return _jpeg_complete(path, size) or stable_for >= 4 * settle
+
+
+def watch_images(root, recursive=False, include=(), exclude=(), prune=(), extensions=IMAGE_EXTENSIONS,
+                 interval=WATCH_INTERVAL, settle=WATCH_SETTLE):
+    """
+    Genera sin fin las rutas relativas de las imágenes de `root` a medida que
+    quedan completas (también las que ya estaban al empezar), y None al
+    terminar cada ronda de escaneo. Se detiene con Ctrl+C.
+    """
+    delivered = set()
+    candidates = {}  # rel_path -> ((tamaño, mtime_ns), estable desde)
+    while True:
+        now = time.monotonic()
+        seen = set()
+        for rel_path in scan_images(root, recursive, include, exclude, prune, extensions):
+            if rel_path in delivered:
+                continue
+            seen.add(rel_path)
+            path = os.path.join(root, rel_path)
+            try:
+                st = os.stat(path)
+                signature = (st.st_size, st.st_mtime_ns)
+                previous = candidates.get(rel_path)
+                if previous is None or previous[0] != signature:
+                    candidates[rel_path] = (signature, now)
+                    continue
+                if not _ready(path, st.st_size, now - previous[1], settle):
+                    continue
+            except FileNotFoundError:
+                continue  # borrado o renombrado mientras se copiaba
+            delivered.add(rel_path)
+            del candidates[rel_path]
+            yield rel_path
+        for rel_path in candidates.keys() - seen:
+            del candidates[rel_path]
+        yield None
+        time.sleep(interval)
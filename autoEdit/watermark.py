@@ -1,3 +1,4 @@
+import numpy as np
 from PIL import Image, ImageEnhance
 from .config import LOGO_SCALE, LOGO_OPACITY, LOGO_MARGIN
 
@@ -8,18 +9,52 @@ def logo_to_white(img):
     white = Image.new("RGB",img.size,(255,255,255))
     return Image.merge("RGBA",(*white.split(),a))
 
-def apply_watermark(image, watermark):
-    img_w,img_h=image.size
-    wm_width = int(img_w*LOGO_SCALE)
+# Logo listo para mezclar por ancho de salida: las fotos de una sesión tienen
+# pocos tamaños distintos (4:5 y 5:4 de la misma cámara)
+_PREPARED = {}
+_PREPARED_MAX = 16
+
+
+def prepare_watermark(watermark, img_w, scale=LOGO_SCALE):
+    """
+    Devuelve (logo RGB redimensionado, logo premultiplicado por el alfa con
+    la opacidad aplicada, alfa inverso) para un ancho de imagen, cacheado
+    por (watermark, ancho, escala).
+    """
+    key = (id(watermark), img_w, scale)
+    cached = _PREPARED.get(key)
+    if cached is not None and cached[0] is watermark:
+        return cached[1]
+
+    wm_width = int(img_w*scale)
     wm_ratio = wm_width/watermark.width
     wm_height = int(watermark.height*wm_ratio)
     watermark_resized = watermark.resize((wm_width, wm_height),Image.LANCZOS)
     alpha = watermark_resized.split()[3]
     alpha = ImageEnhance.Brightness(alpha).enhance(LOGO_OPACITY/255)
-    watermark_resized.putalpha(alpha)
-    x = (img_w-wm_width)//2
-    y = img_h-wm_height-LOGO_MARGIN
-    result = Image.new("RGBA",image.size)
-    result.paste(image,(0,0))
-    result.paste(watermark_resized,(x,y),watermark_resized)
-    return result
+    logo = watermark_resized.convert("RGB")
+    # Versión lista para mezclar sobre arrays: logo premultiplicado y alfa inverso
+    a = np.asarray(alpha, dtype=np.uint32)[:, :, None]
+    premultiplied = np.asarray(logo, dtype=np.uint32) * a
+    prepared = (logo, premultiplied, 255 - a)
+
+    if len(_PREPARED) >= _PREPARED_MAX:
+        _PREPARED.clear()
+    _PREPARED[key] = (watermark, prepared)
+    return prepared
+
+
+def apply_watermark_array(img, watermark, scale=LOGO_SCALE):
+    """
+    Compone el logo sobre un array RGB uint8, en el lugar y solo en la región
+    del logo. Reproduce la mezcla entera de Image.paste con máscara.
+    `scale` es el ancho del logo relativo al de la imagen.
+    """
+    img_h, img_w = img.shape[:2]
+    logo, premultiplied, inverse_alpha = prepare_watermark(watermark, img_w, scale)
+    x = (img_w-logo.width)//2
+    y = img_h-logo.height-LOGO_MARGIN
+    region = img[y:y+logo.height, x:x+logo.width]
+    blended = region * inverse_alpha + premultiplied + 128
+    region[...] = ((blended >> 8) + blended) >> 8
+    return img
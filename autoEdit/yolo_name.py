@@ -1,35 +1,88 @@
+from collections import namedtuple
 import numpy as np
-from .config import CLASS_WEIGHTS
-from .boxes import is_big_enough, is_group, union_boxes, box_center, score_box, find_related_objects
+from .profiling import stage
+from .boxes import box_center, candidate_mask, score_boxes, is_group_array, related_mask, union_box_array
 
 # ================= FUNCION ROI YOLO =================
 
+# Detecciones crudas de una imagen: cajas xyxy (float32, coordenadas de la
+# imagen completa), clases (int) y confianzas
+Detections = namedtuple("Detections", ["boxes", "classes", "confs"])
+
+
 def get_roi_center_yolo(img_pil, model):
-    W,H = img_pil.size
+    return get_roi_centers_yolo([img_pil], model, batch_size=1)[0]
+
+
+def get_roi_centers_yolo(images, model, batch_size=16, sizes=None):
+    """
+    Versión por lotes: una sola llamada al modelo por cada `batch_size` imágenes
+    (ultralytics hace el letterbox de todo el lote) y luego la misma lógica
+    de selección de ROI para cada resultado.
+    Si `images` son proxies reducidos, `sizes` da el tamaño real de cada imagen
+    y los centros se devuelven en coordenadas de resolución completa.
+    """
+    sizes = sizes or [img.size for img in images]
+    detections = detect_yolo(images, model, batch_size, sizes)
+    return [roi_center_from_detections(d, size) for d, size in zip(detections, sizes)]
+
+
+def detect_yolo(images, model, batch_size=16, sizes=None):
+    """
+    Corre el modelo por lotes y devuelve las Detections de cada imagen,
+    reescaladas a `sizes` si se dan.
+    """
+    sizes = sizes or [None]*len(images)
+    detections = []
+    for i in range(0, len(images), batch_size):
+        batch = images[i:i+batch_size]
+        with stage("yolo"):
+            results = model([img.convert("RGB") for img in batch], verbose=False)
+        for img_pil, result, full_size in zip(batch, results, sizes[i:i+batch_size]):
+            detections.append(result_to_detections(result, img_pil.size, full_size))
+    return detections
+
+
+def result_to_detections(results, img_size, full_size=None):
+    """
+    Resultado de ultralytics (o Detections de otro backend, ver detector.py)
+    -> Detections, reescaladas a `full_size` si se da.
+    """
+    if isinstance(results, Detections):
+        boxes, classes, confs = results
+    elif results.boxes is None:
+        return Detections(np.zeros((0, 4), np.float32), np.zeros(0, int), np.zeros(0, np.float32))
+    else:
+        boxes = results.boxes.xyxy.cpu().numpy()
+        classes, confs = results.boxes.cls.cpu().numpy(), results.boxes.conf.cpu().numpy()
+
+    if full_size is not None:
+        # cajas del proxy -> coordenadas de la imagen completa
+        W,H = full_size
+        boxes = boxes * np.array([W/img_size[0], H/img_size[1]]*2)
+    return Detections(boxes.astype(np.float32), classes.astype(int), confs.astype(np.float32))
+
+
+def roi_center_from_detections(detections, img_size):
+    W,H = img_size
     img_center = np.array([W/2,H/2])
     img_area = W*H
 
-    img_rgb = img_pil.convert("RGB")
-    results = model(img_rgb, verbose=False)[0]
-    if results.boxes is None: return img_center
-
-    boxes = results.boxes.xyxy.cpu().numpy()
-    classes = results.boxes.cls.cpu().numpy().astype(int)
+    boxes = np.asarray(detections.boxes).reshape(-1, 4)
+    classes = np.asarray(detections.classes, dtype=int)
 
     # filtrar por tamaño y clase
-    candidates = [(b,c) for b,c in zip(boxes,classes) if c in CLASS_WEIGHTS and is_big_enough(b,img_area)]
-    if not candidates: return img_center
+    mask = candidate_mask(boxes, classes, img_area)
+    if not mask.any(): return img_center
+    boxes, classes = boxes[mask], classes[mask]
 
-    person_boxes = [b for b,c in candidates if c==0]
+    person_boxes = boxes[classes==0]
 
-    if is_group(person_boxes,(W,H)):
-        roi = union_boxes(person_boxes)
-        return box_center(roi)
+    if is_group_array(person_boxes,(W,H)):
+        return box_center(union_box_array(person_boxes))
 
-    scored = [(score_box(b,c,img_center),b,c) for b,c in candidates]
-    _,main_box,_ = max(scored,key=lambda x:x[0])
+    main_box = boxes[np.argmax(score_boxes(boxes, classes, img_center))]
 
-    related = [b for b,c in candidates if c in (1,3)]
-    fused = [main_box]+find_related_objects(main_box,related,(W,H))
-    roi = union_boxes(fused)
-    return box_center(roi)
\ No newline at end of file
+    related = boxes[np.isin(classes, (1,3))]
+    fused = np.vstack([main_box[None], related[related_mask(main_box, related, (W,H))]])
+    return box_center(union_box_array(fused))
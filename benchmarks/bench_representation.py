@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+# ================= BENCHMARK: REPRESENTACIÓN EN MEMORIA =================
+# Compara el camino PIL clásico (RGBA -> RGB -> BGR -> RGB -> RGBA -> RGB),
+# que ya no está en el paquete y se conserva aquí como referencia, con el
+# array RGB único (recorte como vista, marca de agua en el lugar).
+# Cada variante (y la generación de la entrada) corre en su propio proceso:
+# en Linux ru_maxrss se hereda a través de exec, así el pico queda limpio.
+#   python benchmarks/bench_representation.py --megapixels 24 --runs 5
+
+def make_inputs(folder, megapixels, seed=0):
+    """
+    Genera una foto sintética (gradiente + ruido) y un logo RGBA.
+    """
+    W = int((megapixels * 1e6 * 3 / 2) ** 0.5)
+    H = W * 2 // 3
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:H, 0:W]
+    base = np.stack([x * 255 // W, y * 255 // H, (x + y) * 255 // (W + H)], axis=-1).astype(np.int16)
+    noise = rng.integers(-20, 20, (H // 8, W // 8, 3), dtype=np.int16).repeat(8, 0).repeat(8, 1)
+    base[:noise.shape[0], :noise.shape[1]] += noise
+    photo_path = os.path.join(folder, f"photo_{megapixels}mp.jpg")
+    Image.fromarray(np.clip(base, 0, 255).astype(np.uint8)).save(photo_path, quality=92)
+
+    logo = np.zeros((200, 600, 4), dtype=np.uint8)
+    logo[40:160, 40:560] = (20, 20, 20, 255)
+    logo_path = os.path.join(folder, "logo.png")
+    Image.fromarray(logo, "RGBA").save(logo_path)
+    return photo_path, logo_path
+
+
+# --- Camino PIL de referencia (el de antes del array único; solo vive aquí) ---
+def load_image_pil(photo_path):
+    from PIL import ImageOps
+    return ImageOps.exif_transpose(Image.open(photo_path)).convert("RGBA")
+
+
+def watermark_pil(image, watermark):
+    from PIL import ImageEnhance
+    from autoEdit.config import LOGO_SCALE, LOGO_OPACITY, LOGO_MARGIN
+    img_w, img_h = image.size
+    wm_width = int(img_w * LOGO_SCALE)
+    wm_height = int(watermark.height * wm_width / watermark.width)
+    watermark_resized = watermark.resize((wm_width, wm_height), Image.LANCZOS)
+    alpha = ImageEnhance.Brightness(watermark_resized.split()[3]).enhance(LOGO_OPACITY / 255)
+    watermark_resized.putalpha(alpha)
+    result = Image.new("RGBA", image.size)
+    result.paste(image, (0, 0))
+    result.paste(watermark_resized, ((img_w - wm_width) // 2, img_h - wm_height - LOGO_MARGIN), watermark_resized)
+    return result
+
+
+def enhance_image_pil(image, center, watermark):
+    import cv2
+    from autoEdit.crop import choose_target_ratio, crop_to_aspect_max_area_centered
+    from autoEdit.presets import grade_image
+    cropped = crop_to_aspect_max_area_centered(image, choose_target_ratio(image), *center)
+    img_cv = grade_image(np.array(cropped.convert("RGB"))[:, :, ::-1])
+    return watermark_pil(Image.fromarray(cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB)), watermark).convert("RGB")
+
+
+def enhance_array(img, center, watermark):
+    from autoEdit.crop import choose_target_ratio, crop_array_to_aspect
+    from autoEdit.presets import grade_image
+    from autoEdit.watermark import apply_watermark_array
+    view = crop_array_to_aspect(img, choose_target_ratio(img), *center)
+    return apply_watermark_array(grade_image(view, rgb=True), watermark)
+
+
+def run_variant(variant, photo_path, logo_path, output_path, runs):
+    from autoEdit.watermark import logo_to_white
+    from autoEdit.stages import load_array
+    from autoEdit.codec import write_image
+
+    watermark = logo_to_white(Image.open(logo_path).convert("RGBA"))
+    W, H = Image.open(photo_path).size
+    center = (W * 0.4, H * 0.5)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        if variant == "pil":
+            image_final = np.asarray(enhance_image_pil(load_image_pil(photo_path), center, watermark))
+        else:
+            image_final = enhance_array(load_array(photo_path), center, watermark)
+        write_image(image_final, output_path)
+        times.append(time.perf_counter() - start)
+        del image_final
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"variant": variant, "times": times, "peak_mb": peak_kb / 1024}))
+
+
+def _child(*args):
+    cmd = [sys.executable, os.path.abspath(__file__), *map(str, args)]
+    return json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+
+
+def measure(variant, photo_path, logo_path, folder, runs):
+    output_path = os.path.join(folder, f"out_{variant}.jpg")
+    result = _child("--child", variant, "--photo", photo_path, "--logo", logo_path,
+                    "--out", output_path, "--runs", runs)
+    result["output"] = output_path
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del camino PIL frente al array RGB único.")
+    parser.add_argument("--megapixels", type=float, default=24)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", choices=["make", "pil", "array"], help=argparse.SUPPRESS)
+    parser.add_argument("--photo", help=argparse.SUPPRESS)
+    parser.add_argument("--logo", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child == "make":
+        print(json.dumps(make_inputs(args.out, args.megapixels)))
+        return
+    if args.child:
+        run_variant(args.child, args.photo, args.logo, args.out, args.runs)
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        photo_path, logo_path = _child("--child", "make", "--out", folder, "--megapixels", args.megapixels)
+        print(f"📷 Entrada sintética: {Image.open(photo_path).size} ({args.megapixels} MP), {args.runs} runs")
+        results = [measure(v, photo_path, logo_path, folder, args.runs) for v in ("pil", "array")]
+
+        print(f"{'variante':<10}{'p50 (s)':>10}{'min (s)':>10}{'pico RSS (MB)':>16}")
+        for r in results:
+            print(f"{r['variant']:<10}{np.median(r['times']):>10.3f}{min(r['times']):>10.3f}{r['peak_mb']:>16.0f}")
+        pil, arr = results
+        identical = np.array_equal(np.asarray(Image.open(pil["output"])), np.asarray(Image.open(arr["output"])))
+        print(f"⚡ Latencia x{np.median(pil['times']) / np.median(arr['times']):.2f}, "
+              f"RSS -{pil['peak_mb'] - arr['peak_mb']:.0f} MB, salida idéntica: {identical}")
+
+
+if __name__ == "__main__":
+    main()
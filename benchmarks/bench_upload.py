@@ -0,0 +1,86 @@
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from autoEdit.config import UPLOAD_WORKERS, UPLOAD_MANIFEST
+from autoEdit.fakedrive import start_fake_drive
+from autoEdit.upload import run_upload_pipeline
+
+
+# ================= RENDIMIENTO DE SUBIDA =================
+# Sube la misma carpeta con un archivo por vez (--workers 1, como el bucle
+# original) y con subidas concurrentes, a Drive falso (con latencia y ancho
+# de banda por conexión simulados) y, si se indica, a un S3 compatible local
+# (MinIO o `moto_server`). Los archivos son bytes aleatorios con extensión
+# .jpg; los de --large-mb superan el umbral multipart de S3.
+#   moto_server -p 5000 &
+#   AWS_ACCESS_KEY_ID=test AWS_SECRET_ACCESS_KEY=test \
+#     python benchmarks/bench_upload.py --s3 s3://bench --endpoint http://127.0.0.1:5000
+
+def make_files(folder, count, size_mb, large, large_mb, seed=0):
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+    total = 0
+    for i in range(count):
+        size = int((large_mb if i < large else size_mb) * (1 << 20))
+        with open(os.path.join(folder, f"foto_{i:03d}.jpg"), "wb") as f:
+            f.write(rng.bytes(size))
+        total += size
+    return total
+
+
+def timed_upload(folder, destination, endpoint, workers):
+    manifest = os.path.join(folder, UPLOAD_MANIFEST)
+    if os.path.exists(manifest):
+        os.remove(manifest)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_upload_pipeline(folder, destination, workers=workers, rate=None, endpoint=endpoint)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput de subida: un archivo por vez vs concurrente, Drive falso y S3.")
+    parser.add_argument("--files", type=int, default=24)
+    parser.add_argument("--size-mb", type=float, default=4, help="Tamaño de cada archivo.")
+    parser.add_argument("--large", type=int, default=4, help="Cuántos archivos son grandes.")
+    parser.add_argument("--large-mb", type=float, default=24, help="Tamaño de los archivos grandes.")
+    parser.add_argument("--workers", type=int, default=UPLOAD_WORKERS, help="Subidas concurrentes.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia por petición del Drive falso (s).")
+    parser.add_argument("--bandwidth", type=float, default=50, help="MB/s por conexión del Drive falso.")
+    parser.add_argument("--s3", default=None, help="Destino s3://bucket (existente) para medir también S3.")
+    parser.add_argument("--endpoint", default=None, help="Endpoint del S3 compatible (MinIO, moto).")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="autoedit_bench_upload_")
+    try:
+        total = make_files(folder, args.files, args.size_mb, args.large, args.large_mb)
+        print(f"📦 {args.files} archivos, {total / (1 << 20):.0f} MB")
+        server, _, url = start_fake_drive(latency=args.latency, bandwidth_mb=args.bandwidth)
+        targets = [("drive", "drive://bench", url)]
+        if args.s3:
+            targets.append(("s3", args.s3.rstrip("/"), args.endpoint))
+
+        print(f"{'destino':<10}{'workers':>8}{'s':>9}{'MB/s':>9}")
+        for name, base, endpoint in targets:
+            for workers in (1, args.workers):
+                # Carpeta nueva por corrida: si no, los archivos ya subidos se omitirían
+                destination = f"{base}{'/' if name == 's3' else '_'}{int(time.time() * 1000)}"
+                elapsed = timed_upload(folder, destination, endpoint, workers)
+                print(f"{name:<10}{workers:>8}{elapsed:>9.2f}{total / (1 << 20) / elapsed:>9.1f}")
+        server.shutdown()
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
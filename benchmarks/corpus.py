@@ -0,0 +1,92 @@
+import os
+from collections import namedtuple
+import numpy as np
+from PIL import Image
+
+
+# ================= CORPUS SINTÉTICO =================
+# Fotos deterministas (misma semilla -> mismos archivos) que cubren los casos
+# que cambian el costo del pipeline: resolución, horizontal/vertical, rotación
+# EXIF, exposición oscura/normal/clara (fuerza o evita la corrección en LAB)
+# y formato JPEG/PNG.
+
+EXIF_ORIENTATION = 0x0112
+
+# (ancho, alto) a escala 1.0
+RESOLUTIONS = [(6000, 4000), (4000, 6000), (4032, 3024), (3000, 2000), (2048, 1365), (1080, 1350)]
+ORIENTATIONS = [1, 6, 1, 3, 8, 1]
+EXPOSURES = {"dark": 0.45, "normal": 1.0, "bright": 1.6}
+
+CorpusImage = namedtuple("CorpusImage", ["filename", "size", "orientation", "exposure", "format"])
+
+
+def corpus_specs(count, scale=1.0):
+    specs = []
+    exposures = list(EXPOSURES)
+    for i in range(count):
+        W, H = RESOLUTIONS[i % len(RESOLUTIONS)]
+        size = (max(64, int(W * scale)), max(64, int(H * scale)))
+        fmt = "PNG" if i % 7 == 6 else "JPEG"
+        ext = ".png" if fmt == "PNG" else ".jpg"
+        specs.append(CorpusImage(f"synthetic_{i:04d}{ext}", size, ORIENTATIONS[i % len(ORIENTATIONS)],
+                                 exposures[i % len(exposures)], fmt))
+    return specs
+
+
+def synthetic_photo(size, exposure, seed):
+    """
+    Cielo en gradiente, un par de "sujetos" con bordes y textura de ruido por bloques.
+    """
+    W, H = size
+    rng = np.random.default_rng(seed)
+    y = np.linspace(0, 1, H, dtype=np.float32)[:, None]
+    x = np.linspace(0, 1, W, dtype=np.float32)[None, :]
+    img = np.empty((H, W, 3), dtype=np.float32)
+    img[..., 0] = 90 + 110 * y + 20 * x
+    img[..., 1] = 110 + 80 * y
+    img[..., 2] = 170 - 60 * y + 10 * x
+    for _ in range(3):
+        cx, cy = rng.uniform(0.2, 0.8), rng.uniform(0.3, 0.8)
+        rx, ry = rng.uniform(0.05, 0.12), rng.uniform(0.15, 0.3)
+        mask = ((x - cx) / rx) ** 2 + ((y - cy) / ry) ** 2 < 1
+        img[mask] = rng.uniform(30, 220, 3)
+    block = 16
+    noise = rng.normal(0, 10, (H // block + 1, W // block + 1, 1)).astype(np.float32)
+    img += np.repeat(np.repeat(noise, block, 0), block, 1)[:H, :W]
+    return np.clip(img * EXPOSURES[exposure], 0, 255).astype(np.uint8)
+
+
+def make_corpus(folder, count=12, scale=0.25, seed=0):
+    """
+    Escribe el corpus en `folder` (no rehace archivos existentes) y devuelve sus specs.
+    Con orientación EXIF 6/8 los píxeles se guardan rotados, como en una cámara.
+    """
+    os.makedirs(folder, exist_ok=True)
+    specs = corpus_specs(count, scale)
+    for i, spec in enumerate(specs):
+        path = os.path.join(folder, spec.filename)
+        if os.path.exists(path):
+            continue
+        W, H = spec.size
+        stored = (H, W) if spec.orientation in (6, 8) else (W, H)
+        image = Image.fromarray(synthetic_photo(stored, spec.exposure, seed + i))
+        if spec.format == "JPEG":
+            exif = Image.Exif()
+            exif[EXIF_ORIENTATION] = spec.orientation
+            image.save(path, quality=92, exif=exif)
+        else:
+            image.save(path, compress_level=1)
+    return specs
+
+
+def make_watermark(path, width=800, height=240):
+    """
+    Logo RGBA con alfa en degradé (ejercita la mezcla completa de la marca de agua).
+    """
+    if not os.path.exists(path):
+        logo = np.zeros((height, width, 4), dtype=np.uint8)
+        logo[..., :3] = 40
+        logo[..., 3] = np.linspace(0, 255, width, dtype=np.uint8)[None, :]
+        logo[:height // 6, :, 3] = 0
+        Image.fromarray(logo, "RGBA").save(path)
+    return path
@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from autoEdit.config import DETECTOR_BACKENDS, YOLO_BATCH_SIZE, YOLO_MODEL, DETECTION_CONF
+from autoEdit.detector import DetectorSettings, detector_fingerprint, load_detector
+from autoEdit.scanner import scan_images
+from autoEdit.stages import load_detection_proxy
+from autoEdit.yolo_name import detect_yolo, roi_center_from_detections
+from corpus import make_corpus
+
+
+# ================= PARIDAD DE BACKENDS =================
+# Corre cada backend de detección sobre las mismas fotos y compara los
+# centros ROI con los de la referencia (ultralytics fp32): la desviación
+# máxima, en % del lado mayor, debe quedar bajo --tolerance. También mide
+# ms por imagen. Los backends sin su paquete instalado se omiten.
+#   python benchmarks/parity.py --input fotos/ --int8
+# Sin --input usa las fotos de ejemplo de ultralytics (o el corpus
+# sintético, donde casi no hay detecciones y la paridad es trivial).
+
+def default_input():
+    try:
+        from ultralytics.utils import ASSETS
+        return str(ASSETS)
+    except ImportError:
+        folder = os.path.join(tempfile.gettempdir(), "autoedit_corpus_12_0.25")
+        make_corpus(folder, 12, 0.25)
+        return folder
+
+
+def run_backend(settings, proxies, batch_size):
+    """
+    (centros ROI, ms por imagen sin contar la carga ni la primera inferencia).
+    """
+    model = load_detector(settings)
+    detect_yolo([proxies[0][0]], model, 1)  # calentamiento
+    sizes = [size for _, size in proxies]
+    started = time.perf_counter()
+    detections = detect_yolo([p for p, _ in proxies], model, batch_size, sizes)
+    elapsed = time.perf_counter() - started
+    centers = np.array([roi_center_from_detections(d, size) for d, size in zip(detections, sizes)], dtype=float)
+    return centers, elapsed / len(proxies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridad de centros ROI y velocidad entre backends de detección.")
+    parser.add_argument("--input", default=None, help="Carpeta con fotos (por defecto, las de ejemplo de ultralytics).")
+    parser.add_argument("--backends", nargs="+", choices=DETECTOR_BACKENDS, default=list(DETECTOR_BACKENDS))
+    parser.add_argument("--weights", default=YOLO_MODEL, help="Pesos de ultralytics (.pt); los exportados se generan al lado.")
+    parser.add_argument("--conf", type=float, default=DETECTION_CONF, help="Confianza mínima.")
+    parser.add_argument("--int8", action="store_true", help="Probar también los pesos int8 de onnx y openvino.")
+    parser.add_argument("--class-filter", action="store_true", help="Filtrar clases a CLASS_WEIGHTS en todos los backends.")
+    parser.add_argument("--batch-size", type=int, default=YOLO_BATCH_SIZE)
+    parser.add_argument("--tolerance", type=float, default=2.0, help="Desviación máxima admitida (%% del lado mayor).")
+    args = parser.parse_args()
+
+    folder = args.input or default_input()
+    paths = [os.path.join(folder, rel_path) for rel_path in sorted(scan_images(folder))]
+    if not paths:
+        sys.exit(f"No hay imágenes en '{folder}'")
+    proxies = [load_detection_proxy(path) for path in paths]
+    long_sides = np.array([max(size) for _, size in proxies], dtype=float)
+    print(f"🔎 {len(paths)} imágenes de '{folder}'")
+
+    common = dict(weights=args.weights, conf=args.conf, class_filter=args.class_filter)
+    variants = [DetectorSettings(backend, **common) for backend in args.backends]
+    if args.int8:
+        variants += [DetectorSettings(backend, int8=True, **common) for backend in args.backends if backend != "ultralytics"]
+
+    reference = None
+    failed = False
+    print(f"{'detector':<58}{'ms/img':>9}{'desv. máx %':>13}")
+    for settings in variants:
+        name = detector_fingerprint(settings)
+        try:
+            centers, ms = run_backend(settings, proxies, args.batch_size)
+        except ImportError as e:
+            print(f"{name:<58}  omitido ({e.name} no está instalado)")
+            continue
+        if reference is None:
+            reference = centers  # el primero (ultralytics fp32 por defecto) es la referencia
+        deviation = float((np.linalg.norm(centers - reference, axis=1) / long_sides).max() * 100)
+        failed |= deviation > args.tolerance
+        print(f"{name:<58}{ms:>9.1f}{deviation:>13.2f}{'  ❌' if deviation > args.tolerance else ''}")
+
+    if failed:
+        sys.exit(f"❌ Algún backend se aparta más de {args.tolerance}% de la referencia")
+    print("✅ Centros ROI consistentes entre backends")
+
+
+if __name__ == "__main__":
+    main()
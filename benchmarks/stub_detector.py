@@ -0,0 +1,55 @@
+import time
+import numpy as np
+
+
+# ================= DETECTOR FALSO =================
+# Imita la interfaz de resultados de ultralytics (boxes.xyxy/cls/conf con
+# .cpu().numpy()) con cajas deterministas por imagen, para medir el pipeline
+# sin pesos ni GPU. Un costo fijo opcional por imagen simula la inferencia.
+
+class _Tensor:
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+
+class _Boxes:
+    def __init__(self, xyxy, cls, conf):
+        self.xyxy, self.cls, self.conf = _Tensor(xyxy), _Tensor(cls), _Tensor(conf)
+
+
+class _Result:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class StubDetector:
+    def __init__(self, seconds_per_image=0.0):
+        self.seconds_per_image = seconds_per_image
+        self.calls = 0
+
+    def _detect(self, image):
+        W, H = image.size
+        # semilla a partir del contenido: misma imagen -> mismas cajas
+        seed = int(np.asarray(image.resize((8, 8))).sum())
+        rng = np.random.default_rng(seed)
+        n = int(rng.integers(1, 5))
+        cx = rng.uniform(0.2, 0.8, n) * W
+        cy = rng.uniform(0.3, 0.7, n) * H
+        w = rng.uniform(0.08, 0.3, n) * W
+        h = rng.uniform(0.2, 0.6, n) * H
+        xyxy = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1).clip(0, [W, H, W, H])
+        cls = rng.choice([0, 0, 0, 1, 2, 16], n).astype(np.float32)
+        conf = rng.uniform(0.3, 0.95, n).astype(np.float32)
+        return _Result(_Boxes(xyxy.astype(np.float32), cls, conf))
+
+    def __call__(self, images, verbose=False):
+        self.calls += 1
+        if self.seconds_per_image:
+            time.sleep(self.seconds_per_image * len(images))
+        return [self._detect(image) for image in images]
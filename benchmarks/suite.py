@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import numpy as np
+from PIL import Image
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from autoEdit import profiling
+from autoEdit.config import DETECTIONS_INDEX
+from autoEdit.presets import (grade_image, auto_luminance_smart, tone_map_highlights, add_warmth,
+                              adjust_saturation_contrast)
+from autoEdit.crop import choose_target_ratio, crop_array_to_aspect, crop_to_aspect_max_area_centered
+from autoEdit.watermark import logo_to_white, apply_watermark_array
+from autoEdit.yolo_name import Detections, roi_center_from_detections
+from autoEdit.pipeline import run_processing_pipeline
+from corpus import make_corpus, make_watermark, synthetic_photo
+from stub_detector import StubDetector
+
+
+# ================= SUITE DE BENCHMARKS =================
+# Micro-benchmarks de presets, crop, watermark y boxes, más el pipeline
+# completo (secuencial y por etapas) sobre un corpus sintético con un
+# detector falso: corre sin red ni pesos del modelo. Compara contra
+# benchmarks/baseline.json (guardado con --save-baseline).
+#   python benchmarks/suite.py
+#   python benchmarks/suite.py --images 24 --scale 0.5 --workers 4 --save-baseline
+
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+
+
+def bench(func, repeat=5, warmup=1):
+    """
+    Mediana de `repeat` ejecuciones, en segundos.
+    """
+    for _ in range(warmup):
+        func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def legacy_chain(img_bgr):
+    img = auto_luminance_smart(img_bgr)
+    img = tone_map_highlights(img)
+    img = add_warmth(img)
+    return adjust_saturation_contrast(img)
+
+
+def random_detections(size, n, seed=0):
+    W, H = size
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 1, (n, 2)) * [W, H]
+    wh = rng.uniform(0.05, 0.3, (n, 2)) * [W, H]
+    boxes = np.hstack([xy, np.minimum(xy + wh, [W, H])]).astype(np.float32)
+    return Detections(boxes, rng.choice([0, 0, 1, 2, 16], n), rng.uniform(0.3, 1, n).astype(np.float32))
+
+
+def run_micro(megapixels, repeat):
+    W = int((megapixels * 1e6 * 3 / 2) ** 0.5)
+    H = W * 2 // 3
+    normal = synthetic_photo((W, H), "normal", seed=1)
+    dark = synthetic_photo((W, H), "dark", seed=2)
+    watermark = logo_to_white(Image.open(make_watermark(os.path.join(tempfile.gettempdir(), "autoedit_bench_logo.png")))
+                              .convert("RGBA"))
+    pil = Image.fromarray(normal)
+    center = (W * 0.4, H * 0.5)
+    detections = random_detections((W, H), 30)
+
+    cases = {
+        "presets.grade_image": lambda: grade_image(normal, rgb=True),
+        "presets.grade_image_dark": lambda: grade_image(dark, rgb=True),
+        "presets.legacy_chain": lambda: legacy_chain(normal[:, :, ::-1]),
+        "crop.array_view": lambda: crop_array_to_aspect(normal, choose_target_ratio(normal), *center),
+        "crop.pil": lambda: crop_to_aspect_max_area_centered(pil, choose_target_ratio(pil), *center).load(),
+        "watermark.apply_array": lambda: apply_watermark_array(normal.copy(), watermark),
+        "boxes.roi_center_30": lambda: roi_center_from_detections(detections, (W, H)),
+    }
+    results = {}
+    for name, func in cases.items():
+        results[name] = bench(func, repeat)
+        print(f"  {name:<28}{results[name] * 1000:>10.2f} ms")
+    return results
+
+
+def run_pipeline(corpus_dir, watermark_path, workers, batch_size):
+    output = tempfile.mkdtemp(prefix="autoedit_bench_out_")
+    try:
+        count = len([f for f in os.listdir(corpus_dir) if not f.startswith(".")])
+        started = profiling.start()
+        run_processing_pipeline(corpus_dir, output, watermark_path, workers=workers, batch_size=batch_size,
+                                use_cache=False, model=StubDetector(), codec="auto")
+        report = profiling.summary(started, count)
+        profiling.set_enabled(False)
+        return report
+    finally:
+        shutil.rmtree(output, ignore_errors=True)
+        index_path = os.path.join(corpus_dir, DETECTIONS_INDEX)
+        if os.path.exists(index_path):
+            os.remove(index_path)  # con el índice la siguiente corrida no detectaría
+
+
+def compare(current, baseline):
+    """
+    Imprime el cambio de cada métrica frente a la línea base (negativo = más rápido).
+    """
+    print(f"\n📏 Comparación con la línea base ({baseline.get('created', '?')}, {baseline.get('machine', '?')}):")
+    for name, value in current["micro"].items():
+        base = baseline.get("micro", {}).get(name)
+        if base:
+            print(f"  {name:<28}{(value / base - 1) * 100:>+9.1f} % tiempo")
+    for name, report in current["pipeline"].items():
+        base = baseline.get("pipeline", {}).get(name)
+        if base:
+            print(f"  pipeline.{name:<19}{(report['items_per_s'] / base['items_per_s'] - 1) * 100:>+9.1f} % imágenes/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks reproducibles de AutoEdit sobre un corpus sintético.")
+    parser.add_argument("--images", type=int, default=12, help="Imágenes del corpus.")
+    parser.add_argument("--scale", type=float, default=0.25, help="Escala de las resoluciones (1.0 = 24 MP).")
+    parser.add_argument("--megapixels", type=float, default=12, help="Tamaño de los micro-benchmarks.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4, help="Workers del pipeline por etapas.")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--corpus", default=None, help="Carpeta donde generar (o reutilizar) el corpus.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Línea base con la que comparar.")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar los resultados como nueva línea base.")
+    parser.add_argument("--json", default=None, help="Escribir los resultados en este archivo.")
+    args = parser.parse_args()
+
+    corpus_dir = args.corpus or os.path.join(tempfile.gettempdir(), f"autoedit_corpus_{args.images}_{args.scale}")
+    make_corpus(corpus_dir, args.images, args.scale)
+    watermark_path = make_watermark(os.path.join(tempfile.gettempdir(), "autoedit_bench_logo.png"))
+
+    print(f"⏱️ Micro-benchmarks ({args.megapixels} MP, mediana de {args.repeat}):")
+    results = {"created": time.strftime("%Y-%m-%d"), "machine": f"{platform.machine()} {os.cpu_count()} CPU",
+               "python": platform.python_version(), "micro": run_micro(args.megapixels, args.repeat),
+               "pipeline": {}}
+
+    for name, workers in (("sequential", 1), (f"staged_{args.workers}w", args.workers)):
+        print(f"\n🔄 Pipeline {name} sobre {args.images} imágenes (escala {args.scale})...")
+        report = run_pipeline(corpus_dir, watermark_path, workers, args.batch_size)
+        results["pipeline"][name] = report
+        print(f"⚡ {name}: {report['items_per_s']:.2f} imágenes/s ({report['wall_s']:.2f} s)")
+        for stage, s in report["stages"].items():
+            print(f"  {stage:<22}{s['count']:>5}{s['p50_ms']:>10.2f} ms p50{s['total_s']:>9.2f} s total")
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"💾 Línea base guardada en {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
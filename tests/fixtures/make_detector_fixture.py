@@ -0,0 +1,93 @@
+import os
+import numpy as np
+import torch
+from ultralytics.data.augment import LetterBox
+from ultralytics.utils import ops
+from ultralytics.utils.nms import non_max_suppression
+
+
+# ================= FIXTURE DE PARIDAD DEL DETECTOR =================
+# Genera detector_fixture.npz con la salida de ultralytics (LetterBox,
+# non_max_suppression y scale_boxes) para entradas fijas, de modo que
+# tests/test_detector_parity.py compare letterbox y postprocess de
+# autoEdit/detector.py sin necesitar ultralytics ni torch.
+# Solo hace falta volver a correrlo si cambia el fixture:
+#   python tests/fixtures/make_detector_fixture.py
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+IMGSZ = 96
+NUM_CLASSES = 80
+CONF, IOU = 0.25, 0.7
+CLASSES = [0, 1, 2, 3, 5]  # filtro de clases (sorted(CLASS_WEIGHTS) al generarlo)
+IMAGES = {"wide": (150, 100), "tall": (70, 130), "small": (40, 30)}  # (ancho, alto): reduce, reduce, amplía
+MODES = {"fixed": False, "dynamic": True}
+
+
+def make_image(size, seed):
+    W, H = size
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:H, 0:W]
+    gradient = np.stack([x * 255 / W, y * 255 / H, (x + y) * 127 / (W + H)], axis=-1)
+    return np.clip(gradient + rng.normal(0, 25, (H, W, 3)), 0, 255).astype(np.uint8)
+
+
+def make_prediction(seed, objects=40, noise=200):
+    """
+    Salida cruda estilo YOLOv8 (4 + nc, N) en el marco IMGSZ x IMGSZ: grupos de
+    cajas casi iguales (una a suprimir por NMS), a veces de otra clase, y
+    candidatos bajo el umbral de confianza.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(objects):
+        center = rng.uniform(0, IMGSZ, 2)
+        wh = rng.uniform(4, IMGSZ / 2, 2)
+        cls = rng.choice([0, 0, 1, 2, 3, 5, 16, 56])
+        for _ in range(rng.integers(1, 5)):
+            box = np.concatenate([center + rng.normal(0, 1.5, 2), wh * rng.uniform(0.85, 1.15, 2)])
+            other = cls if rng.random() < 0.8 else rng.choice([0, 2, 16])
+            rows.append((box, other, rng.uniform(0.2, 0.95)))
+    for _ in range(noise):
+        rows.append((np.concatenate([rng.uniform(0, IMGSZ, 2), rng.uniform(2, IMGSZ / 3, 2)]),
+                     rng.integers(NUM_CLASSES), rng.uniform(0.0, 0.24)))
+
+    prediction = np.zeros((4 + NUM_CLASSES, len(rows)), np.float32)
+    prediction[4:] = rng.uniform(0, 0.05, prediction[4:].shape)
+    for i, (box, cls, conf) in enumerate(rows):
+        prediction[:4, i] = box
+        prediction[4 + cls, i] = conf
+    return prediction
+
+
+def expected_detections(prediction, frame_shape, orig_shape, classes):
+    """
+    (xyxy, conf, cls) como los devuelve el predictor de detección de ultralytics.
+    """
+    output = non_max_suppression(torch.from_numpy(prediction[None]), CONF, IOU, classes=classes)[0]
+    output[:, :4] = ops.scale_boxes(frame_shape, output[:, :4], orig_shape)
+    output = output.numpy()
+    return output[:, :4].astype(np.float32), output[:, 4].astype(np.float32), output[:, 5].astype(int)
+
+
+def main():
+    fixture = {"imgsz": np.array(IMGSZ), "conf": np.array(CONF), "iou": np.array(IOU),
+               "classes": np.array(CLASSES), "prediction": make_prediction(0)}
+    for seed, (name, size) in enumerate(IMAGES.items()):
+        image = make_image(size, seed)
+        fixture[f"image_{name}"] = image
+        for mode, dynamic in MODES.items():
+            letterboxed = LetterBox(IMGSZ, auto=dynamic, stride=32)(image=image)
+            fixture[f"letterbox_{name}_{mode}"] = letterboxed
+            for label, classes in (("all", None), ("filtered", CLASSES)):
+                boxes, confs, cls = expected_detections(fixture["prediction"], letterboxed.shape[:2], image.shape[:2],
+                                                        classes)
+                fixture[f"boxes_{name}_{mode}_{label}"] = boxes
+                fixture[f"confs_{name}_{mode}_{label}"] = confs
+                fixture[f"classes_{name}_{mode}_{label}"] = cls
+    path = os.path.join(HERE, "detector_fixture.npz")
+    np.savez_compressed(path, **fixture)
+    print(f"✅ {path} ({os.path.getsize(path) / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
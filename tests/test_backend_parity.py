@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from PIL import Image
+from autoEdit.detector import DetectorSettings, load_detector
+from autoEdit.stages import Job, fill_centers
+
+onnx = pytest.importorskip("onnx")
+from onnx import helper, numpy_helper, TensorProto
+
+
+# ================= PARIDAD DE CENTROS ROI ENTRE BACKENDS =================
+# Un modelo ONNX mínimo devuelve siempre la misma salida cruda de YOLOv8
+# (multitudes, grupos, bicis y autos solapados) en un marco fijo de 640 px;
+# cada backend instalado lo carga, y fill_centers debe elegir el mismo centro
+# ROI en todas las fotos. ultralytics carga el .onnx con su propio letterbox
+# y NMS, así que también es la referencia de los backends exportados.
+
+IMGSZ = 640
+NUM_CLASSES = 80
+TOLERANCE = 0.005  # desviación máxima, en fracción del lado mayor
+SIZES = [(6000, 4000), (4000, 6000), (4032, 3024), (3000, 3000), (1080, 1350), (320, 200)]
+BACKEND_MODULES = {"onnx": "onnxruntime", "openvino": "openvino", "ultralytics": "ultralytics"}
+
+
+def raw_prediction(seed=0, objects=30, noise=400):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(objects):
+        center = rng.uniform(80, IMGSZ - 80, 2)
+        wh = rng.uniform(30, 260, 2)
+        cls = rng.choice([0, 0, 0, 1, 2, 3, 16])
+        for _ in range(rng.integers(1, 4)):  # duplicados casi iguales que el NMS debe suprimir
+            rows.append((np.concatenate([center + rng.normal(0, 4, 2), wh * rng.uniform(0.9, 1.1, 2)]), cls,
+                         rng.uniform(0.3, 0.95)))
+    for _ in range(noise):
+        rows.append((np.concatenate([rng.uniform(0, IMGSZ, 2), rng.uniform(5, 200, 2)]),
+                     rng.integers(NUM_CLASSES), rng.uniform(0.0, 0.2)))
+    prediction = np.zeros((1, 4 + NUM_CLASSES, len(rows)), np.float32)
+    prediction[0, 4:] = rng.uniform(0, 0.02, prediction[0, 4:].shape)
+    for i, (box, cls, conf) in enumerate(rows):
+        prediction[0, :4, i] = box
+        prediction[0, 4 + cls, i] = conf
+    return prediction
+
+
+def constant_model(path, prediction):
+    """
+    ONNX de entrada fija (1, 3, 640, 640): salida = prediction + 0 * media(entrada),
+    con la entrada conectada para que ningún backend la descarte.
+    """
+    nodes = [
+        helper.make_node("ReduceMean", ["images"], ["mean"], keepdims=1),
+        helper.make_node("Reshape", ["mean", "shape"], ["mean3"]),
+        helper.make_node("Mul", ["mean3", "zero"], ["zeroed"]),
+        helper.make_node("Add", ["zeroed", "prediction"], ["output0"]),
+    ]
+    graph = helper.make_graph(
+        nodes, "constant_yolo",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, [1, 3, IMGSZ, IMGSZ])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, list(prediction.shape))],
+        [numpy_helper.from_array(np.array([1, 1, 1], np.int64), "shape"),
+         numpy_helper.from_array(np.zeros(1, np.float32), "zero"),
+         numpy_helper.from_array(prediction, "prediction")])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    # Metadatos como los de una exportación de ultralytics (los lee al cargar el .onnx)
+    names = {i: f"class{i}" for i in range(NUM_CLASSES)}
+    helper.set_model_props(model, {"task": "detect", "stride": "32", "batch": "1", "imgsz": f"[{IMGSZ}, {IMGSZ}]",
+                                   "names": str(names)})
+    onnx.save(model, path)
+    return path
+
+
+def backend_centers(backend, weights, proxies):
+    model = load_detector(DetectorSettings(backend, weights))
+    jobs = [Job(f"foto_{i}.jpg", [f"foto_{i}.jpg"], None, None, False, None) for i in range(len(proxies))]
+    return np.array([job.center for job in fill_centers(jobs, proxies, model, batch_size=4)], dtype=float)
+
+
+@pytest.fixture(scope="module")
+def proxies():
+    rng = np.random.default_rng(1)
+    result = []
+    for W, H in SIZES:
+        scale = min(1.0, 640 / max(W, H))
+        size = (round(W * scale), round(H * scale))
+        result.append((Image.fromarray(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)), (W, H)))
+    return result
+
+
+@pytest.fixture(scope="module")
+def weights(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("constant_yolo")
+    return constant_model(str(folder / "constant_yolo.onnx"), raw_prediction())
+
+
+@pytest.mark.parametrize("backend", ["openvino", "ultralytics"])
+def test_backends_agree_on_roi_centers(backend, weights, proxies):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip(BACKEND_MODULES[backend])
+    reference = backend_centers("onnx", weights, proxies)
+    centers = backend_centers(backend, weights, proxies)
+    long_sides = np.array([max(size) for _, size in proxies], dtype=float)
+    deviation = np.linalg.norm(centers - reference, axis=1) / long_sides
+    assert deviation.max() <= TOLERANCE, f"{backend}: desviación máxima {deviation.max():.2%} del lado mayor"
@@ -0,0 +1,123 @@
+import io
+import numpy as np
+import pytest
+from PIL import Image, ImageCms
+from autoEdit import codec
+from autoEdit.codec import (CODECS, EncodeOptions, EXIF_ORIENTATION, insert_metadata, read_metadata, use_codecs,
+                            write_image)
+
+
+# ================= METADATOS EXIF/ICC EN LA SALIDA =================
+# Cada códec codifica sin metadatos; write_image inserta EXIF (orientación
+# normalizada a 1) e ICC sin recodificar, igual para todos.
+
+MAKE, MODEL, ARTIST, MAKER_NOTE = 0x010F, 0x0110, 0x013B, 0x927C
+SRGB = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+
+
+@pytest.fixture(autouse=True)
+def restore_codecs():
+    active = dict(codec._ACTIVE)
+    yield
+    codec._ACTIVE.update(active)
+
+
+def make_source(path, icc=SRGB, maker_note=None, orientation=6):
+    exif = Image.Exif()
+    exif[MAKE], exif[MODEL], exif[ARTIST] = "Fujifilm", "X-T5", "Estudio Luz"
+    exif[EXIF_ORIENTATION] = orientation
+    if maker_note is not None:
+        exif[MAKER_NOTE] = maker_note
+    rng = np.random.default_rng(0)
+    image = Image.fromarray(rng.integers(0, 256, (48, 64, 3), dtype=np.uint8))
+    image.save(path, exif=exif.tobytes(), **({"icc_profile": icc} if icc else {}))
+    return str(path)
+
+
+def output_metadata(path):
+    with Image.open(path) as image:
+        image.load()
+        return image.getexif(), image.info.get("icc_profile")
+
+
+def app_segments(jpeg, marker):
+    # Segmentos APPn antes del primer SOS
+    segments, pos = [], 2
+    while jpeg[pos] == 0xFF and jpeg[pos + 1] != 0xDA:
+        length = int.from_bytes(jpeg[pos + 2:pos + 4], "big")
+        if jpeg[pos + 1] == marker:
+            segments.append(jpeg[pos + 4:pos + 2 + length])
+        pos += 2 + length
+    return segments
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_exif_and_icc_round_trip(tmp_path, name):
+    use_codecs(name, name)
+    source = make_source(tmp_path / "fuente.jpg")
+    img = np.full((40, 30, 3), 128, np.uint8)
+    output = write_image(img, str(tmp_path / "salida.jpg"), EncodeOptions(keep_metadata=True), source)
+
+    exif, icc = output_metadata(output)
+    assert (exif[MAKE], exif[MODEL], exif[ARTIST]) == ("Fujifilm", "X-T5", "Estudio Luz")
+    assert exif[EXIF_ORIENTATION] == 1  # los píxeles ya salen orientados
+    assert icc == SRGB
+    with Image.open(output) as image:
+        assert image.size == (30, 40)
+        assert np.abs(np.asarray(image.convert("RGB")).astype(int) - 128).max() <= 2
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_metadata_dropped_on_request(tmp_path, name):
+    use_codecs(name, name)
+    source = make_source(tmp_path / "fuente.jpg")
+    output = write_image(np.zeros((16, 16, 3), np.uint8), str(tmp_path / "salida.jpg"),
+                         EncodeOptions(keep_metadata=False), source)
+    exif, icc = output_metadata(output)
+    assert MAKE not in exif and icc is None
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_large_icc_is_split_in_chunks(tmp_path, name):
+    use_codecs(name, name)
+    icc = bytes(np.random.default_rng(1).integers(0, 256, 150_000, dtype=np.uint8))
+    source = make_source(tmp_path / "fuente.png", icc=icc)
+    output = write_image(np.zeros((16, 16, 3), np.uint8), str(tmp_path / "salida.jpg"),
+                         EncodeOptions(keep_metadata=True), source)
+    with open(output, "rb") as f:
+        chunks = app_segments(f.read(), 0xE2)
+    assert [chunk[12:14] for chunk in chunks] == [bytes((i, 3)) for i in (1, 2, 3)]
+    assert output_metadata(output)[1] == icc
+
+
+def test_oversized_exif_is_dropped(tmp_path, capsys):
+    # Un maker note enorme no entra en un APP1: la salida va sin EXIF pero conserva el ICC
+    source = make_source(tmp_path / "fuente.png", maker_note=b"\x00" * 70_000)
+    exif, icc = read_metadata(source)
+    assert exif is None and icc == SRGB
+    assert "demasiado grande" in capsys.readouterr().out
+
+    output = write_image(np.zeros((16, 16, 3), np.uint8), str(tmp_path / "salida.jpg"),
+                         EncodeOptions(keep_metadata=True), source)
+    exif, icc = output_metadata(output)
+    assert MAKE not in exif and icc == SRGB
+
+
+def test_exif_segment_size_limit():
+    jpeg = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(jpeg, "JPEG")
+    jpeg = jpeg.getvalue()
+    fits = b"Exif\x00\x00" + b"\x00" * (65533 - 6)
+    assert app_segments(insert_metadata(jpeg, fits), 0xE1) == [fits]
+    assert app_segments(insert_metadata(jpeg, fits + b"\x00"), 0xE1) == []
+    assert insert_metadata(jpeg, fits + b"\x00") == jpeg
+
+
+def test_metadata_goes_after_jfif():
+    jpeg = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(jpeg, "JPEG")
+    jpeg = jpeg.getvalue()
+    assert jpeg[2:4] == b"\xff\xe0"
+    result = insert_metadata(jpeg, b"Exif\x00\x00MM", SRGB)
+    jfif_end = 4 + int.from_bytes(jpeg[4:6], "big")
+    assert result[:jfif_end] == jpeg[:jfif_end] and result[jfif_end:jfif_end + 2] == b"\xff\xe1"
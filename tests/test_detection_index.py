@@ -0,0 +1,72 @@
+import os
+import multiprocessing
+import numpy as np
+from autoEdit.detections import DetectionIndex
+from autoEdit.yolo_name import Detections
+
+
+# ================= ÍNDICE DE DETECCIONES =================
+
+MODEL = "yolov8n.pt"
+
+
+def make_photo(folder, name):
+    path = folder / name
+    path.write_bytes(name.encode())
+    return str(path)
+
+
+def make_detections(seed):
+    rng = np.random.default_rng(seed)
+    count = int(rng.integers(0, 5))
+    boxes = rng.uniform(0, 500, (count, 4)).astype(np.float32)
+    return Detections(boxes, rng.integers(0, 4, count), rng.uniform(0, 1, count).astype(np.float32))
+
+
+def test_round_trip_and_stale_files(tmp_path):
+    paths = {f"foto_{i}.jpg": make_photo(tmp_path, f"foto_{i}.jpg") for i in range(5)}
+    index = DetectionIndex.for_folder(str(tmp_path), MODEL)
+    for i, (name, path) in enumerate(paths.items()):
+        index.put(name, path, make_detections(i), (600, 400))
+    index.save()
+
+    reloaded = DetectionIndex.for_folder(str(tmp_path), MODEL)
+    for i, (name, path) in enumerate(paths.items()):
+        detections, size = reloaded.get(name, path)
+        expected = make_detections(i)
+        assert size == (600, 400)
+        np.testing.assert_array_equal(detections.boxes, expected.boxes)
+        np.testing.assert_array_equal(detections.classes, expected.classes)
+
+    (tmp_path / "foto_0.jpg").write_bytes(b"editada")  # cambió: hay que volver a detectar
+    assert reloaded.get("foto_0.jpg", paths["foto_0.jpg"]) is None
+    assert DetectionIndex.for_folder(str(tmp_path), "otro.pt").get("foto_1.jpg", paths["foto_1.jpg"]) is None
+
+
+def save_rows(folder, worker, count, start):
+    start.wait()
+    for i in range(count):
+        name = f"w{worker}_{i}.jpg"
+        index = DetectionIndex.for_folder(folder, MODEL)
+        index.put(name, os.path.join(folder, name), make_detections(worker * 1000 + i), (600, 400))
+        index.save()
+
+
+def test_concurrent_saves_keep_every_row(tmp_path):
+    # Workers distribuidos guardando a la vez: ninguno pisa las filas del otro
+    workers, count = 4, 15
+    for worker in range(workers):
+        for i in range(count):
+            make_photo(tmp_path, f"w{worker}_{i}.jpg")
+    context = multiprocessing.get_context("fork")
+    start = context.Barrier(workers)
+    processes = [context.Process(target=save_rows, args=(str(tmp_path), worker, count, start))
+                 for worker in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    index = DetectionIndex.for_folder(str(tmp_path), MODEL)
+    assert len(index.rows) == workers * count
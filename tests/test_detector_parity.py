@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from autoEdit.detector import letterbox, postprocess
+
+
+# ================= PARIDAD DEL DETECTOR CON ULTRALYTICS =================
+# Compara el letterbox y el postproceso (umbral, filtro de clases, NMS por
+# clase y reescalado) de los backends exportados con la salida real de
+# ultralytics guardada en fixtures/detector_fixture.npz (generado por
+# fixtures/make_detector_fixture.py): el test no necesita ultralytics.
+
+FIXTURE = np.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "detector_fixture.npz"))
+IMGSZ = int(FIXTURE["imgsz"])
+NAMES = ["wide", "tall", "small"]
+MODES = {"fixed": False, "dynamic": True}
+
+
+def run_letterbox(name, mode):
+    image = Image.fromarray(FIXTURE[f"image_{name}"])
+    batch, metas = letterbox([image], IMGSZ, MODES[mode])
+    return image, batch, metas[0]
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("name", NAMES)
+def test_letterbox_matches_ultralytics(name, mode):
+    _, batch, _ = run_letterbox(name, mode)
+    assert batch.dtype == np.float32 and batch.shape[:2] == (1, 3)
+    pixels = np.rint(batch[0].transpose(1, 2, 0) * 255).astype(np.uint8)
+    np.testing.assert_array_equal(pixels, FIXTURE[f"letterbox_{name}_{mode}"])
+
+
+def test_letterbox_mixed_sizes_use_fixed_frame():
+    # Con tamaños distintos en el lote no hay recorte a múltiplos de 32
+    images = [Image.fromarray(FIXTURE[f"image_{name}"]) for name in NAMES]
+    batch, _ = letterbox(images, IMGSZ, dynamic=True)
+    assert batch.shape == (len(NAMES), 3, IMGSZ, IMGSZ)
+    for blob, name in zip(batch, NAMES):
+        np.testing.assert_array_equal(np.rint(blob.transpose(1, 2, 0) * 255).astype(np.uint8),
+                                      FIXTURE[f"letterbox_{name}_fixed"])
+
+
+@pytest.mark.parametrize("label", ["all", "filtered"])
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("name", NAMES)
+def test_postprocess_matches_ultralytics(name, mode, label):
+    image, _, (scale, pad) = run_letterbox(name, mode)
+    classes = FIXTURE["classes"].tolist() if label == "filtered" else None
+    detections = postprocess(FIXTURE["prediction"], scale, pad, image.size, float(FIXTURE["conf"]),
+                             float(FIXTURE["iou"]), classes)
+
+    np.testing.assert_array_equal(detections.classes, FIXTURE[f"classes_{name}_{mode}_{label}"])
+    np.testing.assert_allclose(detections.confs, FIXTURE[f"confs_{name}_{mode}_{label}"], rtol=1e-6)
+    np.testing.assert_allclose(detections.boxes, FIXTURE[f"boxes_{name}_{mode}_{label}"], atol=1e-3)
+
+
+def test_postprocess_without_candidates():
+    prediction = FIXTURE["prediction"].copy()
+    prediction[4:] = 0.1  # todo bajo el umbral
+    detections = postprocess(prediction, (1.0, 1.0), (0, 0), (IMGSZ, IMGSZ), 0.25, 0.7)
+    assert detections.boxes.shape == (0, 4) and len(detections.classes) == 0 and len(detections.confs) == 0
@@ -0,0 +1,163 @@
+import os
+import time
+import sqlite3
+import multiprocessing
+import numpy as np
+import pytest
+from PIL import Image
+from autoEdit import distributed
+from autoEdit.distributed import JobStore, run_coordinator, run_worker
+from autoEdit.yolo_name import Detections
+
+
+# ================= COLA DE TRABAJOS DISTRIBUIDA =================
+
+PATHS = [f"foto_{i:02d}.jpg" for i in range(6)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    store.enqueue(PATHS)
+    yield store
+    store.close()
+
+
+def job_row(store, rel_path):
+    return store.db.execute("SELECT state, worker, attempts, error FROM jobs WHERE rel_path=?", (rel_path,)).fetchone()
+
+
+def test_lease_takes_pending_jobs_in_order(store):
+    assert store.lease("w1", 4) == PATHS[:4]
+    assert store.lease("w2", 4) == PATHS[4:]
+    assert store.lease("w3", 4) == []
+    assert store.counts() == {"pending": 0, "leased": 6, "done": 0, "failed": 0}
+    assert job_row(store, PATHS[0])[:3] == ("leased", "w1", 1)
+
+
+def test_renew_keeps_lease_and_expiry_releases_to_another_worker(store):
+    store.lease("w1", 2, lease=0.3)
+    time.sleep(0.2)
+    assert store.renew("w1", lease=0.3) == 2
+    time.sleep(0.2)
+    assert store.lease("w2", 2) == PATHS[2:4]  # renovado: los de w1 siguen siendo suyos
+    time.sleep(0.4)
+    assert store.lease("w2", 2) == PATHS[:2]   # vencido: otro worker los retoma
+    assert job_row(store, PATHS[0])[:3] == ("leased", "w2", 2)
+
+
+def test_stale_worker_cannot_complete(store):
+    store.lease("w1", 1, lease=0.05)
+    time.sleep(0.1)
+    assert store.lease("w2", 1) == PATHS[:1]
+    assert store.complete("w1", PATHS[0]) == 0
+    assert job_row(store, PATHS[0])[:2] == ("leased", "w2")
+    assert store.complete("w2", PATHS[0]) == 1
+    assert job_row(store, PATHS[0])[0] == "done"
+
+
+def test_fail_retries_until_max_attempts(store):
+    for attempt in range(1, 3):
+        assert store.lease("w1", 1, max_attempts=3) == PATHS[:1]
+        assert store.fail("w1", PATHS[0], "OSError: corrupto", max_attempts=3) == 1
+        assert job_row(store, PATHS[0]) == ("pending", None, attempt, "OSError: corrupto")
+    assert store.lease("w1", 1, max_attempts=3) == PATHS[:1]
+    store.fail("w1", PATHS[0], "OSError: corrupto", max_attempts=3)
+    assert job_row(store, PATHS[0])[0] == "failed"
+    assert store.failed() == [(PATHS[0], "OSError: corrupto")]
+    assert store.lease("w1", 1, max_attempts=3) == PATHS[1:2]  # el fallido ya no se reparte
+
+
+def test_expired_leases_count_as_attempts(store):
+    for _ in range(2):
+        store.lease("w1", 1, lease=0.01, max_attempts=2)
+        time.sleep(0.02)
+    assert store.lease("w2", 1, max_attempts=2) == PATHS[1:2]
+    state, _, attempts, error = job_row(store, PATHS[0])
+    assert (state, attempts) == ("failed", 2) and "lease vencido" in error
+
+
+def test_release_without_error_keeps_the_attempt(store):
+    store.lease("w1", 2)
+    assert store.release("w1") == 2
+    assert job_row(store, PATHS[0]) == ("pending", None, 0, None)
+
+
+def test_release_after_error_spends_the_attempt(store):
+    store.lease("w1", 2)
+    store.lease("w2", 1)
+    assert store.release("w1", "RuntimeError: sin memoria") == 2
+    assert job_row(store, PATHS[0]) == ("pending", None, 1, "RuntimeError: sin memoria")
+    assert job_row(store, PATHS[2])[:2] == ("leased", "w2")  # los de otros workers no se tocan
+
+
+def test_enqueue_does_not_touch_leased_jobs(store):
+    store.lease("w1", 1)
+    store.complete("w1", PATHS[0])
+    store.lease("w1", 1)
+    store.enqueue(PATHS)
+    assert job_row(store, PATHS[0])[:3] == ("pending", None, 0)  # terminado: se reencola
+    assert job_row(store, PATHS[1])[:2] == ("leased", "w1")
+
+
+# ==================== WORKERS ====================
+class FakeModel:
+    """
+    Una persona centrada por foto (yolo_name.result_to_detections acepta Detections).
+    """
+    def __call__(self, images, verbose=False):
+        results = []
+        for image in images:
+            W, H = image.size
+            boxes = np.array([[W * 0.3, H * 0.2, W * 0.6, H * 0.9]], np.float32)
+            results.append(Detections(boxes, np.array([0]), np.array([0.9], np.float32)))
+        return results
+
+
+def make_session(tmp_path, count):
+    input_folder, output_folder = tmp_path / "entrada", tmp_path / "salida"
+    input_folder.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        Image.fromarray(rng.integers(0, 256, (90, 120, 3), dtype=np.uint8)).save(input_folder / f"foto_{i:02d}.jpg")
+    (input_folder / "rota.jpg").write_bytes(b"no es un jpeg")
+    watermark = tmp_path / "logo.png"
+    Image.new("RGBA", (60, 20), (0, 0, 0, 255)).save(watermark)
+    run_coordinator(str(input_folder), str(output_folder), str(watermark), wait=False)
+    return output_folder, distributed.default_store(str(output_folder))
+
+
+def work(store_path, start):
+    start.wait()
+    run_worker(store_path, batch_size=2, codec="pillow", model=FakeModel(), log=True)
+
+
+def test_two_workers_finish_every_job_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(distributed, "JOBQUEUE_POLL", 0.05)  # lo heredan los procesos hijos
+    output_folder, store_path = make_session(tmp_path, 10)
+    context = multiprocessing.get_context("fork")
+    start = context.Barrier(2)
+    processes = [context.Process(target=work, args=(store_path, start)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    db = sqlite3.connect(store_path)
+    rows = dict((rel_path, (state, attempts)) for rel_path, state, attempts
+                in db.execute("SELECT rel_path, state, attempts FROM jobs"))
+    db.close()
+    healthy = [f"foto_{i:02d}.jpg" for i in range(10)]
+    assert all(rows[rel_path] == ("done", 1) for rel_path in healthy)
+    assert rows["rota.jpg"][0] == "failed"  # la foto corrupta no frena al resto
+
+    # Cada foto la procesó un solo worker, una sola vez
+    processed = []
+    logs = [name for name in os.listdir(output_folder) if name.startswith("process_log_")]
+    assert len(logs) == 2
+    for name in logs:
+        with open(output_folder / name) as f:
+            processed += [line.split(": ", 1)[1] for line in f.read().splitlines() if line.startswith("Procesado")]
+    assert sorted(processed) == healthy
+    assert all((output_folder / rel_path).exists() for rel_path in healthy)
@@ -0,0 +1,199 @@
+import json
+import time
+import hashlib
+import pytest
+from autoEdit.drive import DriveSession, DriveError
+from autoEdit.transport import TokenBucket
+from autoEdit.fakedrive import start_fake_drive
+
+
+# ================= SUBIDAS A DRIVE: LÍMITE DE TASA, REINTENTOS Y REANUDACIÓN =================
+
+FOLDER = "carpeta"
+
+
+class ScriptedSession(DriveSession):
+    """
+    DriveSession sin red: `_send` devuelve las respuestas del guion en orden
+    y `_backoff` anota el intento en vez de dormir.
+    """
+    def __init__(self, responses):
+        super().__init__("http://drive.invalid", rate=None, max_retries=3)
+        self.responses = list(responses)
+        self.sent = 0
+        self.backoffs = []
+
+    def _send(self, method, url, body, headers):
+        self.sent += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def _backoff(self, attempt):
+        self.backoffs.append(attempt)
+
+
+def drive_error(status, reason):
+    return status, {}, json.dumps({"error": {"code": status, "errors": [{"reason": reason}]}}).encode()
+
+
+OK = (200, {}, b'{"files": []}')
+
+
+@pytest.fixture
+def drive():
+    server, state, url = start_fake_drive()
+    yield state, url
+    server.shutdown()
+    server.server_close()
+
+
+def write_file(tmp_path, name, size, seed=0):
+    path = tmp_path / name
+    path.write_bytes(hashlib.sha256(str(seed).encode()).digest() * (size // 32) + b"x" * (size % 32))
+    return str(path)
+
+
+def md5(path):
+    with open(path, "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+# ==================== TOKEN BUCKET ====================
+def test_token_bucket_allows_the_burst_then_paces():
+    bucket = TokenBucket(rate=50, capacity=5)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05  # la ráfaga no espera
+    for _ in range(10):
+        bucket.acquire()
+    assert time.monotonic() - start >= 10 / 50 * 0.9
+
+
+def test_session_rate_limits_requests(drive):
+    _, url = drive
+    session = DriveSession(url, rate=40)
+    start = time.monotonic()
+    for _ in range(21):
+        list(session.list_folder(FOLDER))
+    assert time.monotonic() - start >= 20 / 40 * 0.9
+
+
+# ==================== REINTENTOS ====================
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_transient_errors_back_off_and_retry(status):
+    session = ScriptedSession([(status, {}, b""), (status, {}, b""), OK])
+    assert list(session.list_folder(FOLDER)) == []
+    assert session.backoffs == [0, 1]  # backoff exponencial: base * 2 ** intento
+
+
+def test_transient_errors_give_up_after_max_retries():
+    session = ScriptedSession([(503, {}, b"")] * 4)
+    with pytest.raises(DriveError) as error:
+        list(session.list_folder(FOLDER))
+    assert error.value.status == 503
+    assert session.sent == 4 and session.backoffs == [0, 1, 2]
+
+
+def test_connection_errors_are_retried():
+    session = ScriptedSession([ConnectionResetError(), OK])
+    assert list(session.list_folder(FOLDER)) == []
+    assert session.backoffs == [0]
+
+
+@pytest.mark.parametrize("reason", ["rateLimitExceeded", "userRateLimitExceeded"])
+def test_rate_limit_403_is_retried(reason):
+    session = ScriptedSession([drive_error(403, reason), OK])
+    assert list(session.list_folder(FOLDER)) == []
+    assert session.backoffs == [0]
+
+
+@pytest.mark.parametrize("reason", ["insufficientPermissions", "storageQuotaExceeded", "dailyLimitExceeded"])
+def test_other_403_fail_fast(reason):
+    session = ScriptedSession([drive_error(403, reason), OK])
+    with pytest.raises(DriveError) as error:
+        list(session.list_folder(FOLDER))
+    assert error.value.status == 403 and reason in error.value.body.decode()
+    assert session.sent == 1 and session.backoffs == []
+
+
+def test_403_without_reason_fails_fast():
+    session = ScriptedSession([(403, {}, b"<html>Forbidden</html>"), OK])
+    with pytest.raises(DriveError):
+        list(session.list_folder(FOLDER))
+    assert session.sent == 1
+
+
+def test_resumable_chunk_403_fails_fast(tmp_path):
+    path = write_file(tmp_path, "grande.jpg", 3000)
+    session = ScriptedSession([(200, {"Location": "http://drive.invalid/upload/resumable/s1"}, b""),
+                               drive_error(403, "storageQuotaExceeded")])
+    with pytest.raises(DriveError):
+        session.upload_file(path, "grande.jpg", FOLDER, chunk_size=1024, resumable_threshold=1024)
+    assert session.sent == 2 and session.backoffs == []
+
+
+def test_uploads_survive_a_flaky_server(drive, tmp_path):
+    state, url = drive
+    state.fail_rate = 0.3  # 429/503 al azar
+    state.random.seed(3)
+    session = DriveSession(url, rate=None, max_retries=8, backoff_base=0.001)
+    paths = [write_file(tmp_path, f"foto_{i}.jpg", 2000 + 700 * i, seed=i) for i in range(6)]
+    for path in paths:
+        session.upload_file(path, path.rsplit("/", 1)[1], FOLDER, chunk_size=1024, resumable_threshold=3000)
+    assert state.failures > 0
+    uploaded = {f["name"]: f["md5Checksum"] for f in state.files.values()}
+    assert uploaded == {path.rsplit("/", 1)[1]: md5(path) for path in paths}
+
+
+# ==================== SUBIDA RESUMIBLE ====================
+class InterruptedSession(DriveSession):
+    """
+    Corta la conexión en los PUT de chunk indicados: antes de enviarlo o
+    después de que el servidor lo recibió (se pierde solo la respuesta).
+    """
+    def __init__(self, url, cuts):
+        super().__init__(url, rate=None, max_retries=5, backoff_base=0.001)
+        self.cuts = dict(cuts)
+        self.chunk_puts = 0
+        self.probes = 0
+
+    def _send(self, method, url, body, headers):
+        if method != "PUT":
+            return super()._send(method, url, body, headers)
+        if not body:
+            self.probes += 1
+            return super()._send(method, url, body, headers)
+        self.chunk_puts += 1
+        cut = self.cuts.get(self.chunk_puts)
+        if cut == "before":
+            raise ConnectionResetError("conexión cortada")
+        response = super()._send(method, url, body, headers)
+        if cut == "after":
+            raise ConnectionResetError("respuesta perdida")
+        return response
+
+
+@pytest.mark.parametrize("cuts", [{2: "before"}, {2: "after"}, {1: "after", 3: "before", 4: "after"}])
+def test_resumable_upload_resumes_from_server_offset(drive, tmp_path, cuts):
+    state, url = drive
+    path = write_file(tmp_path, "grande.jpg", 5 * 1024 + 100)
+    session = InterruptedSession(url, cuts)
+    result = session.upload_file(path, "grande.jpg", FOLDER, chunk_size=1024, resumable_threshold=1024)
+    assert result["md5Checksum"] == md5(path)
+    assert session.probes == len(cuts)  # cada corte pregunta el offset al servidor
+    resent = sum(cut == "before" for cut in cuts.values())
+    assert session.chunk_puts == 6 + resent  # lo que el servidor ya recibió no se vuelve a enviar
+    assert [f["name"] for f in state.files.values()] == ["grande.jpg"]
+
+
+def test_resumable_upload_replaces_by_id(drive, tmp_path):
+    state, url = drive
+    session = DriveSession(url, rate=None, backoff_base=0.001)
+    first = session.upload_file(write_file(tmp_path, "a.jpg", 500, seed=1), "a.jpg", FOLDER)
+    path = write_file(tmp_path, "b.jpg", 4000, seed=2)
+    second = session.upload_file(path, "a.jpg", FOLDER, file_id=first["id"], chunk_size=1024, resumable_threshold=1024)
+    assert second["id"] == first["id"] and second["md5Checksum"] == md5(path)
+    assert len(state.files) == 1
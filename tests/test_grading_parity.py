@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from autoEdit.presets import grade_image, auto_luminance_smart, add_warmth, adjust_saturation_contrast
+
+
+# ================= PARIDAD DEL GRADING: LUTs VS CADENA ORIGINAL =================
+# `legacy_chain` es el ajuste automático del pipeline original (BGR, con
+# copias float32 por paso); grade_image debe dar lo mismo con ±1 nivel.
+
+def legacy_chain(img_bgr):
+    img = auto_luminance_smart(img_bgr)
+    img = add_warmth(img)
+    return adjust_saturation_contrast(img)
+
+
+def assert_parity(img_bgr):
+    expected = legacy_chain(img_bgr).astype(int)
+    diff = np.abs(grade_image(img_bgr).astype(int) - expected)
+    assert diff.max() <= 1, f"diferencia máxima {diff.max()}"
+    diff_rgb = np.abs(grade_image(np.ascontiguousarray(img_bgr[:, :, ::-1]), rgb=True)[:, :, ::-1].astype(int) - expected)
+    assert diff_rgb.max() <= 1, f"diferencia máxima (RGB) {diff_rgb.max()}"
+
+
+def realistic_photo(rng, size, exposure):
+    """
+    Cielo en gradiente, un par de sujetos con bordes y ruido de sensor.
+    """
+    W, H = size
+    y, x = np.mgrid[0:H, 0:W].astype(np.float32)
+    img = np.empty((H, W, 3), np.float32)
+    img[..., 0] = 200 - 80 * y / H   # azul (BGR)
+    img[..., 1] = 170 - 60 * y / H
+    img[..., 2] = 120 + 40 * x / W
+    for _ in range(3):
+        cx, cy, r = rng.uniform(0, W), rng.uniform(0, H), rng.uniform(H / 8, H / 3)
+        img[(x - cx) ** 2 + (y - cy) ** 2 < r ** 2] = rng.uniform(20, 240, 3)
+    img += rng.normal(0, 6, img.shape)
+    return np.clip(img * exposure, 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_random_noise(seed):
+    rng = np.random.default_rng(seed)
+    low, high = sorted(rng.integers(0, 256, 2))
+    assert_parity(rng.integers(low, high + 1, (97, 131, 3), dtype=np.uint8))
+
+
+@pytest.mark.parametrize("exposure", [0.35, 0.6, 0.8, 1.0, 1.2, 1.5, 1.9])
+@pytest.mark.parametrize("seed", range(3))
+def test_realistic_photos(seed, exposure):
+    assert_parity(realistic_photo(np.random.default_rng(seed), (300, 200), exposure))
+
+
+@pytest.mark.parametrize("period", [2, 3, 4, 8])
+@pytest.mark.parametrize("dark, bright", [(10, 200), (60, 255), (0, 170)])
+def test_periodic_patterns(period, dark, bright):
+    # Rejilla de alta frecuencia: cualquier submuestreo regular vería solo una fase
+    H, W = 120, 160
+    y, x = np.mgrid[0:H, 0:W]
+    grid = (y % period == 0) & (x % period == 0)
+    img = np.where(grid[..., None], np.uint8(dark), np.uint8(bright)).astype(np.uint8).repeat(3, axis=2)
+    assert_parity(img)
+    stripes = np.where((x % period == 0)[..., None], np.uint8(dark), np.uint8(bright)).astype(np.uint8)
+    assert_parity(np.ascontiguousarray(stripes.repeat(3, axis=2)))
+
+
+@pytest.mark.parametrize("background", [64, 88, 190, 235])
+def test_mean_hidden_from_regular_sampling(background):
+    # Fondo fuera de [min_L, max_L] y un píxel de cada 4x4 bien expuesto: la media
+    # de una muestra cada 4 píxeles cae dentro del rango, la del frame no
+    H, W = 120, 160
+    y, x = np.mgrid[0:H, 0:W]
+    grid = (y % 4 == 0) & (x % 4 == 0)
+    assert_parity(np.where(grid[..., None], np.uint8(125), np.uint8(background)).astype(np.uint8).repeat(3, axis=2))
+
+
+@pytest.mark.parametrize("level", [1, 128, 254, 255])  # 0: la cadena original divide por cero
+def test_flat_frames(level):
+    assert_parity(np.full((40, 60, 3), level, np.uint8))
+
+
+def test_cropped_view():
+    # grade_image recibe vistas recortadas (no contiguas) del frame decodificado
+    img = realistic_photo(np.random.default_rng(7), (320, 240), 0.7)
+    view = img[17:201, 33:290]
+    assert not view.flags["C_CONTIGUOUS"]
+    expected = legacy_chain(np.ascontiguousarray(view)).astype(int)
+    assert np.abs(grade_image(view).astype(int) - expected).max() <= 1
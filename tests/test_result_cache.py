@@ -0,0 +1,214 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from autoEdit import config
+from autoEdit.cache import ResultCache, settings_fingerprints, store_graded
+from autoEdit.codec import EncodeOptions
+from autoEdit.pipeline import run_processing_pipeline
+from autoEdit.renders import render_profiles
+from autoEdit.yolo_name import Detections
+
+
+# ================= CACHÉ DE RESULTADOS =================
+
+MODEL = "yolov8n.pt"
+
+
+@pytest.fixture
+def watermark(tmp_path):
+    path = tmp_path / "logo.png"
+    Image.new("RGBA", (60, 20), (0, 0, 0, 255)).save(path)
+    return str(path)
+
+
+def fingerprints(watermark_path, model_name=MODEL, **settings):
+    return settings_fingerprints(watermark_path, model_name, **settings)
+
+
+def make_input(folder, name, seed=0):
+    folder.mkdir(exist_ok=True)
+    path = folder / name
+    rng = np.random.default_rng(seed)
+    Image.fromarray(rng.integers(0, 256, (90, 120, 3), dtype=np.uint8)).save(path)
+    return str(path)
+
+
+def make_output(folder, name):
+    path = folder / name
+    path.write_bytes(b"jpeg")
+    return str(path)
+
+
+# ==================== HUELLAS POR NIVEL ====================
+def changed_levels(before, after):
+    return [level for level in ("detect", "grade", "output") if before[level] != after[level]]
+
+
+def test_fingerprint_levels(watermark, tmp_path, monkeypatch):
+    base = fingerprints(watermark)
+    assert fingerprints(watermark) == base
+
+    other_logo = tmp_path / "otro_logo.png"
+    Image.new("RGBA", (60, 20), (255, 0, 0, 255)).save(other_logo)
+    assert changed_levels(base, fingerprints(str(other_logo))) == ["output"]
+    assert changed_levels(base, fingerprints(watermark, encoding=EncodeOptions(quality=80))) == ["output"]
+    assert changed_levels(base, fingerprints(watermark, renders=render_profiles(["instagram"]))) == ["grade", "output"]
+    assert changed_levels(base, fingerprints(watermark, deskew=True)) == ["grade", "output"]
+    assert changed_levels(base, fingerprints(watermark, "yolov8s.pt")) == ["detect", "grade", "output"]
+    assert changed_levels(base, fingerprints(watermark, burst=0.9)) == ["detect", "grade", "output"]
+
+    monkeypatch.setattr(config, "LOGO_OPACITY", 0.5)
+    assert changed_levels(base, fingerprints(watermark)) == ["output"]
+    monkeypatch.setattr(config, "DETECTION_SIZE", 320)
+    assert changed_levels(base, fingerprints(watermark)) == ["detect", "grade", "output"]
+
+
+def test_unrelated_constants_do_not_invalidate(watermark, monkeypatch):
+    base = fingerprints(watermark)
+    for name, value in [("UPLOAD_RATE", 1), ("UPLOAD_MAX_RETRIES", 0), ("WATCH_INTERVAL", 9.0),
+                        ("JOBQUEUE_STORE", "otra.sqlite"), ("CACHE_MAX_MB", 1)]:
+        monkeypatch.setattr(config, name, value)
+    assert fingerprints(watermark) == base
+
+
+# ==================== LOOKUP / STORE ====================
+def test_lookup_invalidates_each_level(watermark, tmp_path):
+    input_path = make_input(tmp_path / "entrada", "foto.jpg")
+    outputs = [make_output(tmp_path, "foto_out.jpg")]
+    base = fingerprints(watermark)
+    cache = ResultCache(str(tmp_path), base, graded=True)
+    entry = cache.lookup(input_path, outputs)
+    assert entry.center is None and not entry.graded_cached and not entry.done
+    store_graded(np.zeros((8, 8, 3), np.uint8), entry.graded_path)
+    cache.store(entry.key, (0.25, 0.75), entry.graded_path, outputs)
+    cache.close()
+
+    def reopen(prints):
+        cache = ResultCache(str(tmp_path), prints, graded=True)
+        entry = cache.lookup(input_path, outputs)
+        cache.close()
+        return entry.center, entry.graded_cached, entry.done
+
+    assert reopen(base) == ((0.25, 0.75), True, True)
+    output_changed = dict(base, output="otra")
+    assert reopen(output_changed) == ((0.25, 0.75), True, False)   # nueva marca de agua: solo re-codificar
+    grade_changed = dict(output_changed, grade="otra")
+    assert reopen(grade_changed) == ((0.25, 0.75), False, False)   # nuevo recorte: re-graduar, sin YOLO
+    detect_changed = dict(grade_changed, detect="otra")
+    assert reopen(detect_changed) == (None, False, False)          # nuevo modelo: todo de nuevo
+
+    os.remove(outputs[0])
+    assert reopen(base) == ((0.25, 0.75), True, False)  # la salida se borró: hay que volver a escribirla
+
+
+def test_edited_input_misses(watermark, tmp_path):
+    input_path = make_input(tmp_path / "entrada", "foto.jpg")
+    outputs = [make_output(tmp_path, "foto_out.jpg")]
+    cache = ResultCache(str(tmp_path), fingerprints(watermark))
+    entry = cache.lookup(input_path, outputs)
+    cache.store(entry.key, (0.5, 0.5), None, outputs)
+    assert cache.lookup(input_path, outputs).done
+
+    make_input(tmp_path / "entrada", "foto.jpg", seed=1)  # mismo nombre, otro contenido
+    edited = cache.lookup(input_path, outputs)
+    assert edited.key != entry.key and edited.center is None and not edited.done
+    cache.close()
+
+
+def test_outputs_are_per_path(watermark, tmp_path):
+    # Dos copias idénticas en carpetas distintas: mismo centro, cada una con su salida
+    first = make_input(tmp_path / "a", "foto.jpg")
+    second = make_input(tmp_path / "b", "foto.jpg")
+    first_out, second_out = [make_output(tmp_path, "a.jpg")], [make_output(tmp_path, "b.jpg")]
+    cache = ResultCache(str(tmp_path), fingerprints(watermark))
+    entry = cache.lookup(first, first_out)
+    cache.store(entry.key, (0.5, 0.5), None, first_out)
+    copy = cache.lookup(second, second_out)
+    assert copy.key == entry.key and copy.center == (0.5, 0.5) and not copy.done
+    cache.close()
+
+
+# ==================== EXPULSIÓN LRU ====================
+def test_graded_eviction_is_lru(watermark, tmp_path):
+    graded = np.zeros((64, 64, 3), np.uint8)  # ~12 KB por intermedio
+    cache = ResultCache(str(tmp_path), fingerprints(watermark), max_mb=40 / 1024, graded=True)
+    entries = {}
+    for i in range(3):
+        input_path = make_input(tmp_path / "entrada", f"foto_{i}.jpg", seed=i)
+        outputs = [make_output(tmp_path, f"foto_{i}_out.jpg")]
+        entry = cache.lookup(input_path, outputs)
+        store_graded(graded, entry.graded_path)
+        cache.store(entry.key, (0.5, 0.5), entry.graded_path, outputs)
+        entries[i] = (input_path, outputs, entry)
+    assert all(os.path.exists(entry.graded_path) for _, _, entry in entries.values())
+
+    cache.lookup(*entries[0][:2])  # foto_0 vuelve a usarse: la menos reciente es foto_1
+    input_path = make_input(tmp_path / "entrada", "foto_3.jpg", seed=3)
+    outputs = [make_output(tmp_path, "foto_3_out.jpg")]
+    entry = cache.lookup(input_path, outputs)
+    store_graded(graded, entry.graded_path)
+    cache.store(entry.key, (0.5, 0.5), entry.graded_path, outputs)
+
+    remaining = sorted(name for name in os.listdir(cache.graded_dir))
+    assert remaining == sorted(e.key + ".npy" for e in (entries[0][2], entries[2][2], entry))
+    evicted = cache.lookup(*entries[1][:2])
+    assert evicted.center == (0.5, 0.5) and not evicted.graded_cached and evicted.done  # solo se va el intermedio
+    total = sum(os.path.getsize(os.path.join(cache.graded_dir, name)) for name in remaining)
+    assert total <= cache.max_bytes
+    cache.close()
+
+
+# ==================== PIPELINE ====================
+class CountingModel:
+    """
+    Una persona centrada por foto; cuenta las imágenes que pasan por el detector.
+    """
+    def __init__(self):
+        self.images = 0
+
+    def __call__(self, images, verbose=False):
+        self.images += len(images)
+        results = []
+        for image in images:
+            W, H = image.size
+            boxes = np.array([[W * 0.3, H * 0.2, W * 0.6, H * 0.9]], np.float32)
+            results.append(Detections(boxes, np.array([0]), np.array([0.9], np.float32)))
+        return results
+
+
+def run(input_folder, output_folder, watermark, **kwargs):
+    model = CountingModel()
+    run_processing_pipeline(str(input_folder), str(output_folder), watermark, codec="pillow", model=model, **kwargs)
+    return model.images
+
+
+def test_rerun_skips_unchanged_inputs(watermark, tmp_path):
+    input_folder, output_folder = tmp_path / "entrada", tmp_path / "salida"
+    names = [f"foto_{i}.jpg" for i in range(4)]
+    for i, name in enumerate(names):
+        make_input(input_folder, name, seed=i)
+    assert run(input_folder, output_folder, watermark) == 4
+    os.remove(input_folder / config.DETECTIONS_INDEX)  # sin índice: solo la caché evita YOLO
+    mtimes = {name: os.stat(output_folder / name).st_mtime_ns for name in names}
+
+    assert run(input_folder, output_folder, watermark) == 0
+    assert {name: os.stat(output_folder / name).st_mtime_ns for name in mtimes} == mtimes  # nada se reescribe
+
+    make_input(input_folder, "foto_1.jpg", seed=10)
+    assert run(input_folder, output_folder, watermark) == 1
+    changed = [name for name in mtimes if os.stat(output_folder / name).st_mtime_ns != mtimes[name]]
+    assert changed == ["foto_1.jpg"]
+
+
+def test_new_encoding_reuses_centers(watermark, tmp_path):
+    input_folder, output_folder = tmp_path / "entrada", tmp_path / "salida"
+    names = [f"foto_{i}.jpg" for i in range(3)]
+    for i, name in enumerate(names):
+        make_input(input_folder, name, seed=i)
+    assert run(input_folder, output_folder, watermark) == 3
+    os.remove(input_folder / config.DETECTIONS_INDEX)
+    before = {name: (output_folder / name).read_bytes() for name in names}
+
+    assert run(input_folder, output_folder, watermark, encoding=EncodeOptions(quality=60)) == 0
+    assert all((output_folder / name).read_bytes() != data for name, data in before.items())  # re-codificadas
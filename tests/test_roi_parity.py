@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+from PIL import Image
+from autoEdit.config import CLASS_WEIGHTS
+from autoEdit.boxes import is_big_enough, is_group, union_boxes, box_center, score_box, find_related_objects
+from autoEdit.yolo_name import Detections, get_roi_center_yolo, roi_center_from_detections
+
+
+# ================= PARIDAD ROI: ESCALAR VS VECTORIZADO =================
+# `scalar_roi_center` es la selección de ROI original de get_roi_center_yolo
+# (bucles sobre las funciones escalares de boxes.py); la versión vectorizada
+# debe dar el mismo centro para cualquier conjunto de detecciones.
+
+SIZE = (6000, 4000)
+
+
+def scalar_roi_center(boxes, classes, img_size):
+    W,H = img_size
+    img_center = np.array([W/2,H/2])
+    img_area = W*H
+
+    candidates = [(b,c) for b,c in zip(boxes,classes) if c in CLASS_WEIGHTS and is_big_enough(b,img_area)]
+    if not candidates: return img_center
+
+    person_boxes = [b for b,c in candidates if c==0]
+
+    if is_group(person_boxes,(W,H)):
+        return box_center(union_boxes(person_boxes))
+
+    scored = [(score_box(b,c,img_center),b,c) for b,c in candidates]
+    _,main_box,_ = max(scored,key=lambda x:x[0])
+
+    related = [b for b,c in candidates if c in (1,3)]
+    fused = [main_box]+find_related_objects(main_box,related,(W,H))
+    return box_center(union_boxes(fused))
+
+
+def make_detections(boxes, classes):
+    boxes = np.asarray(boxes, np.float32).reshape(-1, 4)
+    classes = np.asarray(classes, int)
+    return Detections(boxes, classes, np.ones(len(classes), np.float32))
+
+
+def random_detections(rng, count, img_size, classes=(0, 0, 0, 1, 2, 3, 5, 16), cluster=None):
+    """
+    `count` cajas al azar (de 1 % a 30 % del lado); con `cluster` = (centro, radio)
+    las cajas se concentran alrededor de ese punto.
+    """
+    W,H = img_size
+    if cluster is None:
+        centers = rng.uniform((0, 0), (W, H), (count, 2))
+    else:
+        center, radius = cluster
+        centers = np.asarray(center) + rng.uniform(-radius, radius, (count, 2))
+    half = rng.uniform(0.005, 0.15, (count, 2)) * (W, H)
+    boxes = np.clip(np.hstack([centers - half, centers + half]), 0, (W, H, W, H))
+    return make_detections(boxes, rng.choice(classes, count))
+
+
+def assert_same_center(detections, img_size=SIZE):
+    expected = scalar_roi_center(detections.boxes, detections.classes, img_size)
+    np.testing.assert_allclose(roi_center_from_detections(detections, img_size), expected, atol=1e-3)
+
+
+@pytest.mark.parametrize("seed", range(40))
+@pytest.mark.parametrize("count", [3, 30, 300])
+def test_random_crowds(seed, count):
+    assert_same_center(random_detections(np.random.default_rng(seed), count, SIZE))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_clustered_groups(seed):
+    # Personas juntas: ejercita is_group con grupos que pasan y no pasan el umbral
+    rng = np.random.default_rng(1000 + seed)
+    radius = rng.uniform(200, 2500)
+    assert_same_center(random_detections(rng, rng.integers(2, 40), SIZE, classes=(0, 0, 0, 1),
+                                         cluster=((3000, 2000), radius)))
+
+
+def test_no_boxes():
+    detections = make_detections(np.zeros((0, 4)), [])
+    assert_same_center(detections)
+    np.testing.assert_allclose(roi_center_from_detections(detections, SIZE), (3000, 2000))
+
+
+def test_only_small_or_ignored_boxes():
+    # Cajas chicas (< 2 % del área) o de clases fuera de CLASS_WEIGHTS: centro de la imagen
+    detections = make_detections([[10, 10, 60, 60], [100, 100, 4000, 3000]], [0, 16])
+    assert_same_center(detections)
+    np.testing.assert_allclose(roi_center_from_detections(detections, SIZE), (3000, 2000))
+
+
+@pytest.mark.parametrize("cls", [0, 1, 2, 3])
+def test_single_box(cls):
+    assert_same_center(make_detections([[500, 400, 2500, 3500]], [cls]))
+
+
+def test_group_of_people():
+    detections = make_detections([[2000, 1000, 2800, 3000], [2900, 1100, 3600, 3100], [3700, 900, 4400, 3000]],
+                                 [0, 0, 0])
+    assert_same_center(detections)
+    np.testing.assert_allclose(roi_center_from_detections(detections, SIZE), (3200, 2000))
+
+
+def test_scattered_people_are_not_a_group():
+    detections = make_detections([[0, 0, 1200, 1800], [4800, 2200, 6000, 4000]], [0, 0])
+    assert_same_center(detections)
+
+
+def test_related_objects_fused_with_main_box():
+    # Persona con su bicicleta cerca (se fusiona) y una moto lejos (no)
+    detections = make_detections([[2000, 1000, 3000, 3500], [2800, 2500, 3800, 3600], [100, 100, 900, 700]],
+                                 [0, 1, 3])
+    assert_same_center(detections)
+    np.testing.assert_allclose(roi_center_from_detections(detections, SIZE), (2900, 2300))
+
+
+def test_car_never_wins():
+    # El auto (peso 0) es más grande, pero gana la persona
+    detections = make_detections([[0, 0, 4000, 3000], [5000, 3000, 5900, 3900]], [2, 0])
+    assert_same_center(detections)
+
+
+class FakeModel:
+    """
+    Devuelve Detections ya hechas (result_to_detections las acepta tal cual).
+    """
+    def __init__(self, detections):
+        self.detections = detections
+
+    def __call__(self, images, verbose=False):
+        return [self.detections for _ in images]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_get_roi_center_yolo_matches_scalar_path(seed):
+    rng = np.random.default_rng(2000 + seed)
+    img_size = (640, 427)
+    detections = random_detections(rng, 50, img_size)
+    center = get_roi_center_yolo(Image.new("RGB", img_size), FakeModel(detections))
+    expected = scalar_roi_center(detections.boxes, detections.classes, img_size)
+    np.testing.assert_allclose(center, expected, atol=1e-3)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageEnhance
+from autoEdit.config import LOGO_SCALE, LOGO_OPACITY, LOGO_MARGIN
+from autoEdit.watermark import apply_watermark_array, logo_to_white
+
+
+# ================= MARCA DE AGUA: MEZCLA EN EL LUGAR VS IMAGE.PASTE =================
+# La referencia es la composición original con Pillow: logo redimensionado,
+# alfa atenuado por LOGO_OPACITY y Image.paste con máscara; la mezcla entera
+# sobre el array debe dar exactamente los mismos bytes.
+
+def paste_reference(img, watermark, scale=LOGO_SCALE):
+    img_h, img_w = img.shape[:2]
+    wm_width = int(img_w * scale)
+    wm_height = int(watermark.height * wm_width / watermark.width)
+    resized = watermark.resize((wm_width, wm_height), Image.LANCZOS)
+    alpha = ImageEnhance.Brightness(resized.split()[3]).enhance(LOGO_OPACITY / 255)
+    result = Image.fromarray(img)
+    result.paste(resized.convert("RGB"), ((img_w - wm_width) // 2, img_h - wm_height - LOGO_MARGIN), alpha)
+    return np.asarray(result)
+
+
+def make_logo(rng, size=(300, 100), white=True):
+    W, H = size
+    y, x = np.mgrid[0:H, 0:W]
+    alpha = np.clip(255 * (x / W) + rng.normal(0, 40, (H, W)), 0, 255)  # gradiente con bordes suaves
+    alpha[H // 3:2 * H // 3, W // 4:3 * W // 4] = 255
+    alpha[:, :W // 10] = 0
+    rgba = np.dstack([rng.integers(0, 256, (H, W, 3)), alpha]).astype(np.uint8)
+    logo = Image.fromarray(rgba, "RGBA")
+    return logo_to_white(logo) if white else logo
+
+
+@pytest.mark.parametrize("size", [(1080, 1350), (1350, 1080), (640, 480), (401, 333)])
+@pytest.mark.parametrize("white", [True, False])
+def test_matches_pil_paste(size, white):
+    rng = np.random.default_rng(size[0])
+    W, H = size
+    img = rng.integers(0, 256, (H, W, 3), dtype=np.uint8)
+    watermark = make_logo(rng, white=white)
+    expected = paste_reference(img, watermark)
+    result = apply_watermark_array(img.copy(), watermark)
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize("scale", [0.1, 0.3, 0.5])
+def test_matches_pil_paste_with_profile_scale(scale):
+    rng = np.random.default_rng(7)
+    img = rng.integers(0, 256, (900, 1200, 3), dtype=np.uint8)
+    watermark = make_logo(rng)
+    np.testing.assert_array_equal(apply_watermark_array(img.copy(), watermark, scale),
+                                  paste_reference(img, watermark, scale))
+
+
+@pytest.mark.parametrize("level", [0, 255])
+def test_extreme_levels(level):
+    # Fondo negro o blanco: el redondeo de la mezcla entera no debe desbordar
+    img = np.full((600, 800, 3), level, np.uint8)
+    watermark = make_logo(np.random.default_rng(3))
+    np.testing.assert_array_equal(apply_watermark_array(img.copy(), watermark), paste_reference(img, watermark))
+
+
+def test_composites_in_place_only_in_logo_region():
+    rng = np.random.default_rng(11)
+    frame = rng.integers(0, 256, (700, 900, 3), dtype=np.uint8)
+    original = frame.copy()
+    view = frame[50:650, 100:850]  # vista recortada, no contigua
+    watermark = make_logo(rng)
+    result = apply_watermark_array(view, watermark)
+    assert result is view
+    np.testing.assert_array_equal(view, paste_reference(original[50:650, 100:850], watermark))
+    outside = np.ones(frame.shape[:2], bool)
+    outside[50:650, 100:850] = False
+    np.testing.assert_array_equal(frame[outside], original[outside])  # fuera de la vista no se toca nada
+
+
+def test_prepared_logo_is_not_shared_between_watermarks():
+    # El logo preparado se cachea por ancho: otro watermark del mismo ancho no reutiliza el anterior
+    rng = np.random.default_rng(5)
+    img = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    first, second = make_logo(rng, white=False), make_logo(rng, white=False)
+    np.testing.assert_array_equal(apply_watermark_array(img.copy(), first), paste_reference(img, first))
+    np.testing.assert_array_equal(apply_watermark_array(img.copy(), second), paste_reference(img, second))